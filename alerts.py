@@ -0,0 +1,261 @@
+"""
+Módulo de Alertas de Valor
+--------------------------
+Este módulo avisa cada chat, logo após uma atualização, das apostas com
+valor que surgiram ou melhoraram e que passam pela regra do chat (valor
+mínimo, ligas e mercados).
+
+- Só os jogos com odds alteradas na atualização são comparados com o
+  snapshot anterior.
+- As regras ficam em um índice por (liga, mercado), com os valores
+  mínimos ordenados: cada aposta consulta quatro baldes por busca
+  binária, então o custo cresce com os chats avisados, não com o total
+  de regras.
+- O envio usa o BroadcastEngine, com os mesmos limites de taxa das
+  sugestões diárias.
+"""
+
+import bisect
+import asyncio
+import logging
+
+from telegram.helpers import escape_markdown
+
+from market_kernels import MARKET_NAMES
+from config import ALERT_MIN_IMPROVEMENT, ALERT_MAX_PER_MESSAGE
+
+logger = logging.getLogger(__name__)
+
+class AlertIndex:
+    """Regras de alerta indexadas por (liga, mercado) e valor mínimo."""
+    
+    def __init__(self, rules=()):
+        """
+        Monta o índice.
+        
+        Args:
+            rules (iterable): Regras (chat_id, min_value, ligas, mercados);
+                ligas ou mercados vazios valem para todos
+        """
+        # (liga ou None, mercado ou None) -> (valores mínimos ordenados, chats na mesma ordem)
+        self._buckets = {}
+        self._rules = {}
+        for chat_id, min_value, leagues, markets in rules:
+            self.add(chat_id, min_value, leagues, markets)
+    
+    def __len__(self):
+        return len(self._rules)
+    
+    def _keys(self, leagues, markets):
+        """Baldes de uma regra."""
+        return [(league, market) for league in (leagues or [None]) for market in (markets or [None])]
+    
+    def add(self, chat_id, min_value, leagues=(), markets=()):
+        """Adiciona (ou substitui) a regra de um chat."""
+        self.remove(chat_id)
+        leagues, markets = tuple(leagues), tuple(markets)
+        for key in self._keys(leagues, markets):
+            values, chats = self._buckets.setdefault(key, ([], []))
+            position = bisect.bisect_right(values, min_value)
+            values.insert(position, min_value)
+            chats.insert(position, chat_id)
+        self._rules[chat_id] = (min_value, leagues, markets)
+    
+    def remove(self, chat_id):
+        """Remove a regra de um chat (se houver)."""
+        rule = self._rules.pop(chat_id, None)
+        if rule is None:
+            return
+        min_value, leagues, markets = rule
+        for key in self._keys(leagues, markets):
+            values, chats = self._buckets[key]
+            position = bisect.bisect_left(values, min_value)
+            while chats[position] != chat_id:
+                position += 1
+            del values[position], chats[position]
+            if not values:
+                del self._buckets[key]
+    
+    def match(self, league, market, value):
+        """
+        Chats cuja regra aceita uma aposta.
+        
+        Args:
+            league (str): Liga (sport_key) do jogo
+            market (str): Tipo do mercado (h2h, totals, spreads)
+            value (float): Valor esperado da aposta
+            
+        Returns:
+            list: IDs dos chats (sem repetição)
+        """
+        matched = []
+        for key in ((league, market), (league, None), (None, market), (None, None)):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                values, chats = bucket
+                matched.extend(chats[:bisect.bisect_right(values, value)])
+        return matched if len(matched) < 2 else list(dict.fromkeys(matched))
+
+def _bet_key(bet):
+    return bet['bookmaker'], bet['market'], bet['outcome']
+
+def detect_value_changes(previous, snapshot, changes, min_improvement=ALERT_MIN_IMPROVEMENT):
+    """
+    Encontra as apostas com valor novas ou melhoradas em uma atualização.
+    
+    Args:
+        previous (DataSnapshot): Snapshot substituído (None = nenhum alerta,
+            para não avisar de tudo na primeira atualização)
+        snapshot (DataSnapshot): Snapshot publicado
+        changes (ChangeSet): Mudanças da atualização
+        min_improvement (float): Aumento de valor que alerta de novo uma aposta existente
+        
+    Returns:
+        list: Eventos (game, league, bookmaker, market, outcome, odds, value,
+            previous_value, commence_time), do maior valor para o menor
+    """
+    if previous is None:
+        return []
+        
+    events = []
+    for game_key in changes.affected:
+        bets = snapshot.value_bets.get(game_key)
+        if not bets:
+            continue
+        before = {_bet_key(bet): bet['value'] for bet in previous.value_bets.get(game_key, ())}
+        info = None
+        for bet in bets:
+            old_value = before.get(_bet_key(bet))
+            if old_value is not None and bet['value'] < old_value + min_improvement:
+                continue
+            if info is None:
+                info = snapshot.odds.game_info(game_key)
+            events.append({
+                'game': game_key,
+                'league': info.get('sport_key') or info.get('league'),
+                'bookmaker': bet['bookmaker'],
+                'market': bet['market'],
+                'outcome': bet['outcome'],
+                'odds': bet['odds'],
+                'value': bet['value'],
+                'previous_value': old_value,
+                'commence_time': info.get('commence_time')
+            })
+    events.sort(key=lambda event: event['value'], reverse=True)
+    return events
+
+def format_alert_message(events, limit=ALERT_MAX_PER_MESSAGE):
+    """
+    Formata os alertas de um chat.
+    
+    Args:
+        events (list): Eventos do chat, do maior valor para o menor
+        limit (int): Máximo de apostas listadas
+        
+    Returns:
+        str: Mensagem formatada
+    """
+    lines = ["🚨 *Alerta de Valor*", ""]
+    for event in events[:limit]:
+        market = MARKET_NAMES.get(event['market'], event['market'])
+        change = "nova" if event['previous_value'] is None else f"antes {event['previous_value']:.1%}"
+        # Fora do negrito: no Markdown do Telegram, a barra só escapa fora de entidades
+        lines.append(f"⚽ {escape_markdown(event['game'])}")
+        lines.append(f"📊 {escape_markdown(market)} - {escape_markdown(event['outcome'])} @ {event['odds']:.2f} "
+                     f"({escape_markdown(event['bookmaker'])})")
+        lines.append(f"📈 Valor: {event['value']:.1%} ({change})")
+        lines.append("")
+    if len(events) > limit:
+        lines.append(f"_E mais {len(events) - limit} apostas. Use /apostas para ver as sugestões._")
+    else:
+        lines.append("_Use /alerta off para parar os alertas._")
+    return "\n".join(lines)
+
+class AlertPipeline:
+    """Detecta, casa com as regras e envia os alertas de cada atualização."""
+    
+    def __init__(self, store, min_improvement=ALERT_MIN_IMPROVEMENT, max_per_message=ALERT_MAX_PER_MESSAGE):
+        """
+        Inicializa o pipeline.
+        
+        Args:
+            store (SubscriptionStore): Onde ficam as regras de alerta
+            min_improvement (float): Aumento de valor que alerta de novo uma aposta existente
+            max_per_message (int): Apostas listadas em um alerta
+        """
+        self.store = store
+        self.min_improvement = min_improvement
+        self.max_per_message = max_per_message
+        self.index = AlertIndex()
+        self._revision = None
+    
+    def refresh_rules(self):
+        """
+        Remonta o índice se as regras mudaram (em qualquer worker).
+        
+        Returns:
+            bool: True se o índice foi remontado
+        """
+        if self.store.alert_revision() == self._revision:
+            return False
+        revision, rules = self.store.alert_rules()
+        self.index = AlertIndex(rules)
+        self._revision = revision
+        logger.info(f"Índice de alertas remontado: {len(rules)} regras (revisão {revision}).")
+        return True
+    
+    def match(self, events):
+        """
+        Agrupa os eventos pelos chats que devem recebê-los.
+        
+        Args:
+            events (list): Eventos de detect_value_changes
+            
+        Returns:
+            dict: Eventos por chat
+        """
+        by_chat = {}
+        for event in events:
+            for chat_id in self.index.match(event['league'], event['market'], event['value']):
+                by_chat.setdefault(chat_id, []).append(event)
+        return by_chat
+    
+    def process(self, previous, snapshot, changes):
+        """
+        Calcula os alertas de uma atualização.
+        
+        Args:
+            previous (DataSnapshot): Snapshot substituído
+            snapshot (DataSnapshot): Snapshot publicado
+            changes (ChangeSet): Mudanças da atualização
+            
+        Returns:
+            dict: Mensagem por chat
+        """
+        events = detect_value_changes(previous, snapshot, changes, self.min_improvement)
+        if not events:
+            return {}
+        self.refresh_rules()
+        by_chat = self.match(events)
+        if by_chat:
+            logger.info(f"Snapshot v{snapshot.version}: {len(events)} apostas com valor novas ou melhores, "
+                        f"alertas para {len(by_chat)} chats.")
+        return {chat_id: format_alert_message(chat_events, self.max_per_message)
+                for chat_id, chat_events in by_chat.items()}
+    
+    async def deliver(self, engine, messages):
+        """
+        Envia os alertas e remove as regras dos chats que bloquearam o bot.
+        
+        Args:
+            engine (BroadcastEngine): Motor de envio
+            messages (dict): Mensagem por chat
+            
+        Returns:
+            dict: Resultado por chat (sent, blocked ou failed)
+        """
+        outcomes = await engine.deliver(messages, parse_mode='Markdown')
+        for chat_id, outcome in outcomes.items():
+            if outcome == "blocked":
+                await asyncio.to_thread(self.store.remove_alert, chat_id)
+        return outcomes
@@ -8,23 +8,71 @@ e geração de sugestões de apostas.
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import heapq
 import logging
 
+from odds_matrix import OddsMatrix, market_base
+from consensus import consensus_probabilities, bookmaker_weights
+from market_kernels import run_market_kernels, MARKET_NAMES
+from config import DEVIG_METHOD
+
 logger = logging.getLogger(__name__)
 
+# Ordem das confianças no desempate das sugestões
+CONFIDENCE_RANK = {"Alta": 2, "Média": 1, "Baixa": 0}
+
+def confidence_label(value):
+    """Classifica a confiança de uma aposta pelo valor esperado."""
+    return "Alta" if value > 0.15 else "Média" if value > 0.08 else "Baixa"
+
+def kickoff_timestamp(commence_time):
+    """
+    Converte o horário de início (ISO) em segundos desde a época.
+    
+    Args:
+        commence_time (str): Horário no formato da API (ex: 2024-01-01T20:00:00Z)
+        
+    Returns:
+        float: Timestamp (infinito se ausente ou inválido)
+    """
+    try:
+        return datetime.fromisoformat(commence_time.replace('Z', '+00:00')).timestamp()
+    except (AttributeError, ValueError):
+        return float('inf')
+
+def suggestion_rank(suggestion):
+    """
+    Chave de ordenação das sugestões: maior valor, depois maior
+    confiança, depois jogo que começa mais cedo.
+    """
+    return (
+        suggestion['value'],
+        CONFIDENCE_RANK.get(suggestion['confidence'], -1),
+        -kickoff_timestamp(suggestion.get('commence_time'))
+    )
+
 class BettingAnalyzer:
     """Classe para análise de apostas e geração de sugestões."""
     
-    def __init__(self, games_data, odds_data):
+    def __init__(self, games_data, odds_data, devig_method=DEVIG_METHOD, weights=None):
         """
         Inicializa o analisador com dados de jogos e odds.
         
         Args:
             games_data (pd.DataFrame): DataFrame com dados dos jogos
-            odds_data (dict): Dicionário com dados de odds
+            odds_data (OddsMatrix | dict): Matriz de odds (análise vetorizada)
+                ou dicionário com dados de odds (análise jogo a jogo)
+            devig_method (str): Remoção da margem (multiplicative, shin, power)
+            weights (dict): Peso de cada casa no consenso (padrão: config)
         """
         self.games_data = games_data
         self.odds_data = odds_data
+        self.devig_method = devig_method
+        self.weights = weights
+        self.vectorized = isinstance(odds_data, OddsMatrix)
+        self._h2h = None
+        self._market_cache = {}
+        self._kickoffs = {}
         
     def calculate_implied_probability(self, odds):
         """
@@ -64,10 +112,39 @@ class BettingAnalyzer:
         implied_probs = [self.calculate_implied_probability(odd) for odd in odds_list]
         return sum(implied_probs) - 1.0
     
+    def consensus_probabilities(self, game_odds):
+        """
+        Calcula a probabilidade de consenso do h2h de um jogo.
+        
+        Args:
+            game_odds (dict): Dados de odds do jogo
+            
+        Returns:
+            dict: Probabilidade "justa" por resultado (vazio sem consenso)
+        """
+        books = {bookie_name: markets['h2h']
+                 for bookie_name, markets in game_odds.get('bookmakers', {}).items() if 'h2h' in markets}
+        outcome_names = list(dict.fromkeys(name for outcomes in books.values() for name in outcomes))
+        
+        prices = np.full((1, len(books), len(outcome_names)), np.nan)
+        for b, outcomes in enumerate(books.values()):
+            for o, outcome_name in enumerate(outcome_names):
+                if outcomes.get(outcome_name) is not None:
+                    prices[0, b, o] = outcomes[outcome_name]
+                    
+        fair = consensus_probabilities(prices, bookmaker_weights(list(books), self.weights), self.devig_method)[0]
+        return {name: float(p) for name, p in zip(outcome_names, fair) if not np.isnan(p)}
+    
     def find_value_bets(self, game_odds, threshold=0.05):
         """
         Encontra apostas com valor em um jogo.
         
+        O valor esperado de cada odd é calculado contra a probabilidade
+        de consenso entre as casas (sem margem e ponderada pelas casas
+        "sharp"). Só analisa o h2h: no formato de dicionário as linhas
+        dos mercados totals e spreads se perdem; esses mercados são
+        analisados pela OddsMatrix (analyze_markets).
+        
         Args:
             game_odds (dict): Dados de odds do jogo
             threshold (float): Limite mínimo de valor
@@ -76,37 +153,153 @@ class BettingAnalyzer:
             list: Lista de apostas com valor
         """
         value_bets = []
+        fair_probs = self.consensus_probabilities(game_odds)
         
         for bookie_name, markets in game_odds.get('bookmakers', {}).items():
             for market_key, outcomes in markets.items():
                 if market_key == 'h2h':  # Resultado final
-                    odds_values = list(outcomes.values())
-                    if len(odds_values) >= 3:  # Casa, Empate, Fora
-                        # Calcular probabilidades implícitas
-                        implied_probs = [self.calculate_implied_probability(odd) for odd in odds_values]
-                        normalized_probs = self.normalize_probabilities(implied_probs)
-                        
-                        # Buscar discrepâncias entre casas de apostas
-                        for outcome_name, odds_value in outcomes.items():
-                            # Calcular valor esperado simples
-                            fair_prob = 1.0 / len(odds_values)  # Probabilidade "justa" simplificada
-                            implied_prob = self.calculate_implied_probability(odds_value)
+                    # Buscar odds acima da probabilidade de consenso
+                    for outcome_name, odds_value in outcomes.items():
+                        fair_prob = fair_probs.get(outcome_name)
+                        if fair_prob is None:
+                            continue
+                        implied_prob = self.calculate_implied_probability(odds_value)
                             
-                            if fair_prob > implied_prob + threshold:
-                                value = (fair_prob * odds_value) - 1.0
-                                if value > 0:
-                                    confidence = "Alta" if value > 0.15 else "Média" if value > 0.08 else "Baixa"
-                                    value_bets.append({
-                                        'bookmaker': bookie_name,
-                                        'market': market_key,
-                                        'outcome': outcome_name,
-                                        'odds': odds_value,
-                                        'value': value,
-                                        'confidence': confidence
-                                    })
+                        if fair_prob > implied_prob + threshold:
+                            value = (fair_prob * odds_value) - 1.0
+                            if value > 0:
+                                confidence = confidence_label(value)
+                                value_bets.append({
+                                    'bookmaker': bookie_name,
+                                    'market': market_key,
+                                    'outcome': outcome_name,
+                                    'odds': odds_value,
+                                    'value': value,
+                                    'confidence': confidence
+                                })
+        
+        return value_bets
+    
+    def analyze_markets(self, threshold=0.05):
+        """
+        Calcula o valor esperado de todas as odds de todos os mercados.
+        
+        Requer uma OddsMatrix. Cada tipo de mercado (h2h, totals,
+        spreads) é despachado uma vez para o seu kernel em
+        market_kernels, com todas as linhas de todos os jogos juntas.
+        No h2h, o resultado é idêntico ao de find_value_bets.
+        
+        Args:
+            threshold (float): Limite mínimo de valor
+            
+        Returns:
+            dict: Arrays (jogos, casas, mercados, resultados) value e
+                is_value, e fair (jogos, mercados, resultados)
+        """
+        if threshold not in self._market_cache:
+            weights = bookmaker_weights(self.odds_data.bookmakers, self.weights)
+            self._market_cache[threshold] = run_market_kernels(self.odds_data, weights, self.devig_method, threshold)
+        return self._market_cache[threshold]
+    
+    def analyze_h2h(self):
+        """
+        Analisa margens e melhores odds do h2h de todos os jogos de uma vez.
+        
+        Requer uma OddsMatrix. Os cálculos reproduzem exatamente os de
+        analyze_market_trends, em operações NumPy sobre o array
+        (jogos, casas, resultados).
+        
+        Returns:
+            dict: Arrays prices, implied, margins, normalized, best_odds,
+                best_bookmaker, best_normalized, outcome_order e has_market
+        """
+        if self._h2h is not None:
+            return self._h2h
+            
+        prices = self.odds_data.market_prices('h2h')
+        quoted = ~np.isnan(prices)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Probabilidades implícitas (0 para odds não positivas, como no caminho escalar)
+            implied = np.where(quoted & (prices > 0), 1.0 / prices, 0.0)
+            n_outcomes = quoted.sum(axis=2)
+            has_market = n_outcomes > 0
+            total_implied = np.where(quoted, implied, 0.0).sum(axis=2)
+            margins = np.where(has_market, total_implied - 1.0, np.nan)
+            normalized = np.where(quoted & (total_implied > 0)[:, :, None], implied / total_implied[:, :, None], np.nan)
+            
+            # Melhores odds por resultado (empate: primeira casa)
+            filled = np.where(quoted, prices, -np.inf)
+            if prices.shape[1]:
+                best_bookmaker = filled.argmax(axis=1)
+                best_odds = np.take_along_axis(filled, best_bookmaker[:, None, :], axis=1)[:, 0, :]
+            else:
+                best_bookmaker = np.zeros(prices.shape[::2], dtype=int)
+                best_odds = np.full(prices.shape[::2], -np.inf)
+            best_quoted = np.isfinite(best_odds)
+            best_implied = np.where(best_quoted & (best_odds > 0), 1.0 / best_odds, 0.0)
+            
+            # Resultados na ordem em que aparecem nas casas, como no caminho escalar
+            first_bookmaker = np.where(quoted.any(axis=1), quoted.argmax(axis=1), prices.shape[1])
+            outcome_order = np.argsort(first_bookmaker * prices.shape[2] + np.arange(prices.shape[2]), axis=1, kind='stable')
+            best_total = np.take_along_axis(best_implied, outcome_order, axis=1).sum(axis=1)
+            best_normalized = np.where(best_quoted & (best_total > 0)[:, None], best_implied / best_total[:, None], np.nan)
+            
+        result = {
+            'prices': prices,
+            'implied': implied,
+            'margins': margins,
+            'normalized': normalized,
+            'best_odds': np.where(best_quoted, best_odds, np.nan),
+            'best_bookmaker': best_bookmaker,
+            'best_normalized': best_normalized,
+            'outcome_order': outcome_order,
+            'has_market': has_market
+        }
+        self._h2h = result
+        return result
+    
+    def find_all_value_bets(self, threshold=0.05):
+        """
+        Encontra apostas com valor em todos os jogos.
+        
+        Com uma OddsMatrix usa a análise vetorizada de todos os mercados
+        (h2h, totals e spreads); com um dicionário chama find_value_bets
+        jogo a jogo (só h2h). No h2h, o resultado é o mesmo.
+        
+        Args:
+            threshold (float): Limite mínimo de valor
+            
+        Returns:
+            dict: Lista de apostas com valor por jogo
+        """
+        if not self.vectorized:
+            return {game_key: self.find_value_bets(game_odds, threshold)
+                    for game_key, game_odds in self.odds_data.items()}
+                    
+        matrix = self.odds_data
+        markets = self.analyze_markets(threshold)
+        value_bets = {game_key: [] for game_key in matrix.game_keys}
         
+        for g, b, m, o in zip(*np.nonzero(markets['is_value'])):
+            value_bets[matrix.game_keys[g]].append(self._value_bet(markets, g, b, m, o))
+            
         return value_bets
     
+    def _value_bet(self, markets, g, b, m, o):
+        """Monta a aposta com valor da célula (jogo, casa, mercado, resultado)."""
+        matrix = self.odds_data
+        label = matrix.market_label(g, m)
+        value = float(markets['value'][g, b, m, o])
+        return {
+            'bookmaker': matrix.bookmakers[b],
+            'market': market_base(label),
+            'outcome': matrix.outcome_name(g, matrix.outcomes[o], label),
+            'odds': float(matrix.prices[g, b, m, o]),
+            'value': value,
+            'confidence': confidence_label(value)
+        }
+    
     def analyze_market_trends(self):
         """
         Analisa tendências de mercado para todos os jogos.
@@ -114,6 +307,9 @@ class BettingAnalyzer:
         Returns:
             dict: Análise de tendências por jogo
         """
+        if self.vectorized:
+            return self._vectorized_market_trends()
+            
         trends = {}
         
         for game_key, game_odds in self.odds_data.items():
@@ -152,43 +348,139 @@ class BettingAnalyzer:
         
         return trends
     
-    def generate_suggestions(self, max_suggestions=5):
+    def _vectorized_market_trends(self):
+        """
+        Versão vetorizada de analyze_market_trends (mesmo formato de saída).
+        
+        Returns:
+            dict: Análise de tendências por jogo
+        """
+        matrix = self.odds_data
+        h2h = self.analyze_h2h()
+        trends = {}
+        
+        for g, game_key in enumerate(matrix.game_keys):
+            game_trends = {
+                'margins': {},
+                'best_odds': {},
+                'normalized_probs': {}
+            }
+            
+            for b in np.nonzero(h2h['has_market'][g])[0]:
+                game_trends['margins'][matrix.bookmakers[b]] = float(h2h['margins'][g, b])
+                
+            outcomes = [o for o in h2h['outcome_order'][g] if not np.isnan(h2h['best_odds'][g, o])]
+            for o in outcomes:
+                outcome_name = matrix.outcome_name(g, matrix.outcomes[o], 'h2h')
+                game_trends['best_odds'][outcome_name] = {
+                    'odds': float(h2h['best_odds'][g, o]),
+                    'bookmaker': matrix.bookmakers[h2h['best_bookmaker'][g, o]]
+                }
+                
+            if game_trends['best_odds']:
+                game_trends['normalized_probs'] = {
+                    matrix.outcome_name(g, matrix.outcomes[o], 'h2h'): float(h2h['best_normalized'][g, o])
+                    for o in outcomes
+                }
+                game_trends['margin'] = min(game_trends['margins'].values()) if game_trends['margins'] else 0.0
+                
+            trends[game_key] = game_trends
+            
+        return trends
+    
+    def _commence_time(self, game_key):
+        """Retorna o horário de início de um jogo (ou None)."""
+        if self.vectorized:
+            return self.odds_data.game_info(game_key)['commence_time']
+        game_odds = self.odds_data.get(game_key) if self.odds_data else None
+        return game_odds.get('commence_time') if game_odds else None
+        
+    def _kickoff(self, game_key):
+        """Retorna o início de um jogo em segundos desde a época (com cache)."""
+        kickoff = self._kickoffs.get(game_key)
+        if kickoff is None:
+            kickoff = self._kickoffs[game_key] = kickoff_timestamp(self._commence_time(game_key))
+        return kickoff
+            
+    def _make_suggestion(self, game_key, bet):
+        """Monta uma sugestão a partir de uma aposta com valor."""
+        return {
+            'game': game_key,
+            'market': bet['market'],
+            'outcome': bet['outcome'],
+            'bookmaker': bet['bookmaker'],
+            'odds': bet['odds'],
+            'value': bet['value'],
+            'confidence': bet['confidence'],
+            'commence_time': self._commence_time(game_key),
+            'reason': f"Aposta com valor de {bet['value']:.2f}"
+        }
+        
+    def generate_suggestions(self, max_suggestions=5, value_bets=None):
         """
         Gera sugestões de apostas baseadas na análise.
         
+        Seleciona as max_suggestions melhores entre todas as apostas com
+        valor (heap de tamanho K, O(n log K)), ordenadas por valor, com
+        desempate por confiança e pelo jogo que começa mais cedo.
+        
         Args:
-            max_suggestions (int): Número máximo de sugestões
-            
+            max_suggestions (int): Número máximo de sugestões (K)
+            value_bets (dict): Apostas com valor por jogo já calculadas
+                (padrão: find_all_value_bets)
+                
         Returns:
             list: Lista de sugestões de apostas
         """
-        suggestions = []
-        
-        for game_key, game_odds in self.odds_data.items():
-            # Encontrar apostas com valor
-            value_bets = self.find_value_bets(game_odds)
+        if max_suggestions <= 0:
+            return []
+        if value_bets is None:
+            if self.vectorized:
+                return self._vectorized_top_suggestions(max_suggestions)
+            value_bets = self.find_all_value_bets()
             
-            # Adicionar as melhores apostas às sugestões
-            for bet in value_bets:
-                if len(suggestions) >= max_suggestions:
-                    break
-                    
-                suggestion = {
-                    'game': game_key,
-                    'market': bet['market'],
-                    'outcome': bet['outcome'],
-                    'bookmaker': bet['bookmaker'],
-                    'odds': bet['odds'],
-                    'value': bet['value'],
-                    'confidence': bet['confidence'],
-                    'reason': f"Aposta com valor de {bet['value']:.2f}"
-                }
-                suggestions.append(suggestion)
+        # Mesma chave de suggestion_rank, sem montar um dicionário por aposta
+        def rank(item):
+            game_key, bet = item
+            return (bet['value'], CONFIDENCE_RANK.get(bet['confidence'], -1), -self._kickoff(game_key))
+            
+        candidates = (
+            (game_key, bet)
+            for game_key, game_value_bets in value_bets.items()
+            for bet in game_value_bets
+        )
+        return [self._make_suggestion(game_key, bet)
+                for game_key, bet in heapq.nlargest(max_suggestions, candidates, key=rank)]
+    
+    def _vectorized_top_suggestions(self, max_suggestions, threshold=0.05):
+        """
+        Seleciona as melhores sugestões direto do array de valores.
+        
+        Uma seleção parcial (np.partition) encontra o K-ésimo maior
+        valor; só as apostas com valor igual ou acima dele (K mais os
+        empates) viram dicionários e passam pelo desempate completo.
         
-        # Ordenar por valor decrescente
-        suggestions.sort(key=lambda x: x['value'], reverse=True)
+        Args:
+            max_suggestions (int): Número máximo de sugestões (K)
+            threshold (float): Limite mínimo de valor
+            
+        Returns:
+            list: Lista de sugestões de apostas
+        """
+        matrix = self.odds_data
+        markets = self.analyze_markets(threshold)
+        candidates = np.flatnonzero(markets['is_value'])
+        values = markets['value'].ravel()[candidates]
         
-        return suggestions[:max_suggestions]
+        if len(candidates) > max_suggestions:
+            kth = np.partition(values, len(values) - max_suggestions)[len(values) - max_suggestions]
+            candidates = candidates[values >= kth]
+            
+        suggestions = [
+            self._make_suggestion(matrix.game_keys[g], self._value_bet(markets, g, b, m, o))
+            for g, b, m, o in zip(*np.unravel_index(candidates, markets['is_value'].shape))
+        ]
+        return heapq.nlargest(max_suggestions, suggestions, key=suggestion_rank)
     
     def format_suggestions_message(self, suggestions=None):
         """
@@ -207,11 +499,11 @@ class BettingAnalyzer:
             return "Não foram encontradas sugestões de apostas para hoje. 🤔"
         
         today = datetime.now().strftime("%d/%m/%Y")
-        message = f"🔮 *Sugestões de Apostas - {today}*\n\n"
+        parts = [f"🔮 *Sugestões de Apostas - {today}*\n\n"]
         
         for suggestion in suggestions:
             game = suggestion['game']
-            market = "Resultado Final" if suggestion['market'] == 'h2h' else suggestion['market']
+            market = MARKET_NAMES.get(suggestion['market'], suggestion['market'])
             outcome = suggestion['outcome']
             
             # Traduzir resultado se necessário
@@ -220,16 +512,18 @@ class BettingAnalyzer:
                     outcome = "Empate"
                 else:
                     outcome = f"Vitória {outcome}"
+            elif suggestion['market'] == 'totals':
+                outcome = outcome.replace("Over", "Mais de").replace("Under", "Menos de")
             
             odds = suggestion['odds']
             confidence_stars = "⭐⭐⭐" if suggestion['confidence'] == "Alta" else "⭐⭐" if suggestion['confidence'] == "Média" else "⭐"
             
-            message += f"⚽ *{game}*\n"
-            message += f"📊 Sugestão: {market} - {outcome}\n"
-            message += f"💰 Odd: {odds:.2f}\n"
-            message += f"🔍 Confiança: {confidence_stars}\n\n"
+            parts.append(f"⚽ *{game}*\n"
+                         f"📊 Sugestão: {market} - {outcome}\n"
+                         f"💰 Odd: {odds:.2f}\n"
+                         f"🔍 Confiança: {confidence_stars}\n\n")
         
-        message += "_Nota: Estas são apenas sugestões baseadas em análise estatística. Aposte com responsabilidade._"
+        parts.append("_Nota: Estas são apenas sugestões baseadas em análise estatística. Aposte com responsabilidade._")
         
-        return message
+        return "".join(parts)
 
@@ -10,10 +10,15 @@ import logging
 from datetime import datetime, time
 import asyncio
 import json
+import atexit
+import threading
+import requests
 from flask import Flask, request, jsonify
 import pytz
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
+from telegram.helpers import escape_markdown
 from telegram.ext import (
     ApplicationBuilder, CommandHandler, ContextTypes,
     CallbackQueryHandler
@@ -21,11 +26,25 @@ from telegram.ext import (
 
 from config import (
     TELEGRAM_TOKEN, BOT_USERNAME, ADMIN_USER_ID,
-    DEFAULT_SPORT, DAILY_NOTIFICATION_TIME,
-    APP_URL, PORT, DEBUG
+    SPORTS, DAILY_NOTIFICATION_TIME,
+    STEAM_WINDOW, STEAM_MIN_MOVE, STEAM_MIN_BOOKMAKERS, ALERT_DEFAULT_MIN_VALUE,
+    PAGE_SIZE, TELEGRAM_API_URL, APP_URL, PORT, DEBUG
 )
-from data_collector import DataCollector
+from data_collector import AsyncDataCollector
 from analyzer import BettingAnalyzer
+from snapshot import snapshot_store
+from state_backend import create_state_backend
+from refresh_scheduler import RefreshScheduler
+from update_dispatcher import UpdateDispatcher
+from subscriptions import SubscriptionStore
+from broadcast import BroadcastEngine
+from alerts import AlertPipeline
+from profiles import ProfileStore, DEFAULT_PROFILE, has_filters
+from render_cache import render_odds_card, render_games_page
+from catalog import ALL_LEAGUES, short_id
+from team_search import TeamSearchIndex
+from market_kernels import MARKET_NAMES
+from odds_history import OddsHistory, format_line_movement_message
 
 # Configurar logging
 logging.basicConfig(
@@ -37,37 +56,127 @@ logger = logging.getLogger(__name__)
 # Criar aplicação Flask
 app = Flask(__name__)
 
-# Variáveis globais para cache de dados
-games_data = None
-odds_data = None
-last_update = None
+# Aplicação do Telegram (os dados ficam em snapshot_store)
 telegram_app = None
 
-# Instância do coletor de dados
-data_collector = DataCollector()
+# Instância do coletor de dados (assíncrono, com pool de conexões)
+data_collector = AsyncDataCollector()
 
-async def update_data():
-    """Atualiza os dados de jogos e odds."""
-    global games_data, odds_data, last_update
+# Histórico de odds em disco, alimentado a cada snapshot com mudanças
+odds_history = OddsHistory()
+
+def record_odds_history(snapshot, changes):
+    """Grava no histórico as odds de um snapshot que mudou."""
+    if not changes.is_empty():
+        odds_history.record(snapshot.odds, ts=snapshot.created_at.timestamp())
+
+snapshot_store.subscribe(record_odds_history)
+
+# Estado compartilhado entre workers: eleição do líder e último snapshot
+# publicado (também usado para responder logo após um reinício)
+state_backend = create_state_backend()
+
+def stale_notice(snapshot):
+    """Aviso anexado às respostas enquanto o snapshot carregado do disco não é atualizado."""
+    if not snapshot.stale:
+        return ""
+    return f"\n\n⚠️ _Dados de {snapshot.created_at.strftime('%d/%m %H:%M')}; atualização em andamento._"
+
+# Chats inscritos nas sugestões diárias e envio em massa (criado com o bot)
+subscriptions = SubscriptionStore()
+broadcast_engine = None
+
+# Busca de times do /odds <busca>, atualizada a cada snapshot (e na
+# primeira busca após um snapshot carregado do disco ou do líder)
+team_index = TeamSearchIndex()
+
+def index_teams(snapshot, changes):
+    """Atualiza o índice de busca com os jogos que entraram ou saíram."""
+    team_index.sync(snapshot)
+
+snapshot_store.subscribe(index_teams)
+
+# Perfis dos usuários (filtros e número de dicas do /apostas)
+profiles = ProfileStore()
+
+# Alertas de apostas com valor novas ou melhores, a cada snapshot publicado
+# (só o líder publica, então só ele envia)
+alert_pipeline = AlertPipeline(subscriptions)
+
+def dispatch_alerts(snapshot, changes):
+    """Calcula os alertas de um snapshot e agenda o envio no loop do bot."""
+    messages = alert_pipeline.process(snapshot_store.previous, snapshot, changes)
+    if messages and broadcast_engine is not None and bot_loop is not None:
+        asyncio.run_coroutine_threadsafe(alert_pipeline.deliver(broadcast_engine, messages), bot_loop)
+
+snapshot_store.subscribe(dispatch_alerts)
+
+# Retomada de envios interrompidos por um reinício
+resume_task = None
+
+# Atualização das ligas em segundo plano, no loop de eventos do bot
+refresh_scheduler = RefreshScheduler(data_collector, snapshot_store, SPORTS, backend=state_backend)
+    
+# Loop de eventos do bot (thread dedicada, criado em start_bot): agendador e updates do Telegram
+bot_loop = None
+
+# Fila limitada de updates do webhook, processada no loop do bot (criada em start_bot)
+dispatcher = None
+
+# Processo em que o bot foi iniciado (cada worker do gunicorn inicia o seu)
+_started_pid = None
+_start_lock = threading.Lock()
+
+def format_age(seconds):
+    """Formata a idade dos dados (ex: há 3 min)."""
+    if seconds is None:
+        return "nunca atualizado"
+    if seconds < 60:
+        return f"há {seconds:.0f} s"
+    if seconds < 3600:
+        return f"há {seconds / 60:.0f} min"
+    return f"há {seconds / 3600:.1f} h"
+
+async def require_snapshot(update):
+    """
+    Retorna o snapshot atual sem nunca esperar por uma busca.
     
-    logger.info("Atualizando dados...")
+    Antes da primeira atualização, pede uma atualização em segundo
+    plano e avisa o usuário.
     
+    Returns:
+        DataSnapshot: Snapshot atual (None se ainda não há dados)
+    """
+    snapshot = snapshot_store.current
+    if snapshot is None:
+        refresh_scheduler.request_refresh()
+        await update.effective_message.reply_text(
+            "⏳ Os dados ainda estão sendo carregados.\n"
+            "Por favor, tente novamente em instantes."
+        )
+    return snapshot
+
+async def send_daily_suggestions():
+    """Envia as sugestões do dia a todos os inscritos no horário DAILY_NOTIFICATION_TIME."""
+    snapshot = snapshot_store.current
+    if snapshot is None or not snapshot.suggestions:
+        logger.info("Envio diário ignorado: não há sugestões.")
+        return
     try:
-        # Obter dados
-        games, odds = data_collector.get_todays_games_and_odds(DEFAULT_SPORT)
-        
-        if games and odds:
-            games_data = data_collector.format_games_data(games)
-            odds_data = data_collector.format_odds_data(odds)
-            last_update = datetime.now()
-            logger.info(f"Dados atualizados com sucesso. {len(games)} jogos e {len(odds)} jogos com odds.")
-            return True
-        else:
-            logger.warning("Não foi possível atualizar os dados: dados vazios.")
-            return False
+        # Um envio por dia: se o horário disparar de novo (ex: outro worker
+        # assumiu a liderança), o ID já concluído não envia nada
+        await broadcast_engine.broadcast(f"daily-{datetime.now().date().isoformat()}",
+                                         snapshot.suggestions_message, parse_mode='Markdown')
     except Exception as e:
-        logger.error(f"Erro ao atualizar dados: {e}")
-        return False
+        logger.error(f"Erro ao enviar sugestões diárias: {e}")
+
+async def resume_broadcasts():
+    """Conclui os envios em massa interrompidos por um reinício (só no worker líder)."""
+    try:
+        if await refresh_scheduler.elect():
+            await broadcast_engine.resume_pending()
+    except Exception as e:
+        logger.error(f"Erro ao retomar envios: {e}")
 
 # Comandos do bot
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -86,43 +195,196 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         "🤖 *Comandos disponíveis:*\n\n"
         "/start - Inicia o bot\n"
         "/apostas - Mostra sugestões de apostas para hoje\n"
+        "/apostas N - Mostra as N melhores sugestões (e guarda a escolha)\n"
+        "/perfil - Mostra e ajusta os filtros das suas sugestões (ligas, mercados, casas, odd e valor)\n"
         "/jogos - Lista os jogos do dia\n"
-        "/odds - Mostra as odds para um jogo específico\n"
+        "/odds - Mostra as odds para um jogo específico (ou /odds flamengo, /odds man utd)\n"
+        "/arbitragem - Mostra oportunidades de arbitragem entre casas\n"
+        "/movimentos - Mostra steam moves e as maiores variações de odds\n"
         "/status - Mostra o status atual do bot\n"
-        "/refresh - Atualiza manualmente os dados\n"
+        "/refresh - Pede a atualização dos dados\n"
+        f"/inscrever - Recebe as sugestões todos os dias às {DAILY_NOTIFICATION_TIME}\n"
+        "/cancelar - Para de receber as sugestões diárias\n"
+        "/alerta - Avisa na hora de apostas com valor (ex: /alerta 8% soccer_epl h2h)\n"
         "/ajuda - Mostra esta mensagem de ajuda\n\n"
-        "Enviarei automaticamente sugestões de apostas todos os dias pela manhã! ⚽🏀🎾"
+        "Use /inscrever para receber sugestões de apostas automaticamente todos os dias! ⚽🏀🎾"
     )
     await update.message.reply_text(help_text, parse_mode='Markdown')
 
-async def bets_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Envia sugestões de apostas quando o comando /apostas é emitido."""
-    await update.message.reply_text("Buscando sugestões de apostas para hoje... ⏳")
+async def subscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Inscreve o chat nas sugestões diárias quando o comando /inscrever é emitido."""
+    if await asyncio.to_thread(subscriptions.subscribe, update.effective_chat.id):
+        await update.message.reply_text(
+            f"✅ Inscrição feita! Você receberá as sugestões todos os dias às {DAILY_NOTIFICATION_TIME}.\n"
+            "Use /cancelar para parar de receber."
+        )
+    else:
+        await update.message.reply_text("Você já está inscrito nas sugestões diárias. Use /cancelar para sair.")
+
+async def unsubscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Cancela a inscrição do chat quando o comando /cancelar é emitido."""
+    if await asyncio.to_thread(subscriptions.unsubscribe, update.effective_chat.id):
+        await update.message.reply_text("Inscrição cancelada. Use /inscrever para voltar a receber as sugestões.")
+    else:
+        await update.message.reply_text("Você não está inscrito. Use /inscrever para receber as sugestões diárias.")
+
+async def alert_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Configura os alertas de valor quando o comando /alerta é emitido.
+    
+    "/alerta [valor] [ligas] [mercados]" cria ou substitui a regra do
+    chat: valor mínimo (ex: 8% ou 0.08), ligas pelo sport_key (ex:
+    soccer_epl) e mercados (h2h, totals, spreads); sem ligas ou mercados,
+    vale para todos. "/alerta off" remove a regra e "/alerta ?" mostra a atual.
+    """
+    chat_id = update.effective_chat.id
+    args = [arg.strip().lower() for arg in context.args or []]
     
-    # Verificar se há dados disponíveis
-    if games_data is None or odds_data is None:
-        success = await update_data()
-        if not success:
+    if args and args[0] in ("off", "parar"):
+        await asyncio.to_thread(subscriptions.remove_alert, chat_id)
+        await update.message.reply_text("🔕 Alertas desativados. Use /alerta para ativar de novo.")
+        return
+    if args and args[0] == "?":
+        rule = await asyncio.to_thread(subscriptions.get_alert, chat_id)
+        if rule is None:
+            await update.message.reply_text("Você não tem alertas. Use /alerta para ativar.")
+        else:
             await update.message.reply_text(
-                "❌ Não foi possível obter dados para gerar sugestões.\n"
-                "Por favor, tente novamente mais tarde."
+                f"🔔 Alerta ativo: valor a partir de {rule['min_value']:.0%}, "
+                f"ligas: {', '.join(rule['leagues']) or 'todas'}, "
+                f"mercados: {', '.join(rule['markets']) or 'todos'}."
+            )
+        return
+        
+    min_value, leagues, markets = ALERT_DEFAULT_MIN_VALUE, [], []
+    for arg in args:
+        try:
+            number = float(arg.rstrip('%').replace(',', '.'))
+            min_value = number / 100 if arg.endswith('%') or number >= 1 else number
+        except ValueError:
+            (markets if arg in MARKET_NAMES else leagues).append(arg)
+            
+    await asyncio.to_thread(subscriptions.set_alert, chat_id, min_value, leagues, markets)
+    await update.message.reply_text(
+        f"🔔 Alerta ativado! Você será avisado de apostas com valor a partir de {min_value:.0%}"
+        f"{' em ' + ', '.join(leagues) if leagues else ''}"
+        f"{' (' + ', '.join(markets) + ')' if markets else ''} assim que aparecerem.\n"
+        "Use /alerta off para desativar."
+    )
+
+# Campos do /perfil: nome no comando -> (campo do perfil, descrição)
+PROFILE_FIELDS = {
+    'ligas': ('leagues', "ligas (sport_key, ex: soccer_epl)"),
+    'mercados': ('markets', "mercados (h2h, totals, spreads)"),
+    'casas': ('bookmakers', "casas de apostas (ex: pinnacle)"),
+    'odd': ('min_odds', "odd mínima"),
+    'valor': ('min_value', "valor mínimo (ex: 5%)"),
+    'dicas': ('tips', "número de sugestões")
+}
+
+def format_profile(profile):
+    """Formata o perfil de um usuário."""
+    return (
+        "👤 Seu perfil\n\n"
+        f"🏆 Ligas: {', '.join(profile['leagues']) or 'todas'}\n"
+        f"📊 Mercados: {', '.join(profile['markets']) or 'todos'}\n"
+        f"🏦 Casas: {', '.join(profile['bookmakers']) or 'todas'}\n"
+        f"💰 Odd mínima: {profile['min_odds']:.2f}\n"
+        f"📈 Valor mínimo: {profile['min_value']:.0%}\n"
+        f"🔢 Sugestões: {profile['tips']}\n\n"
+        "Ajuste com /perfil <campo> <valores>, ex: /perfil ligas soccer_epl soccer_brazil\n"
+        f"Campos: {', '.join(PROFILE_FIELDS)}. /perfil limpar [campo] volta ao padrão."
+    )
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Mostra ou altera o perfil do usuário quando o comando /perfil é emitido."""
+    user_id = update.effective_user.id
+    args = [arg.strip().lower() for arg in context.args or []]
+    
+    try:
+        if not args:
+            profile = await asyncio.to_thread(profiles.get, user_id)
+        elif args[0] == 'limpar':
+            if len(args) > 1 and args[1] in PROFILE_FIELDS:
+                profile = await asyncio.to_thread(profiles.update, user_id, **{PROFILE_FIELDS[args[1]][0]: None})
+            else:
+                await asyncio.to_thread(profiles.reset, user_id)
+                profile = dict(DEFAULT_PROFILE)
+        elif args[0] in PROFILE_FIELDS:
+            field = PROFILE_FIELDS[args[0]][0]
+            values = args[1:]
+            if isinstance(DEFAULT_PROFILE[field], list):
+                value = [item for value in values for item in value.split(',') if item] or None
+            elif not values:
+                value = None
+            else:
+                number = float(values[0].rstrip('%').replace(',', '.'))
+                value = number / 100 if field == 'min_value' and (values[0].endswith('%') or number >= 1) else number
+            profile = await asyncio.to_thread(profiles.update, user_id, **{field: value})
+        else:
+            await update.message.reply_text(
+                "Campo desconhecido. Use um destes:\n" +
+                "\n".join(f"• {name} - {description}" for name, (_, description) in PROFILE_FIELDS.items())
             )
             return
+    except ValueError:
+        await update.message.reply_text("Valor inválido. Exemplo: /perfil odd 1.8 ou /perfil valor 5%")
+        return
+        
+    await update.message.reply_text(format_profile(profile))
+
+def format_profile_suggestions(suggestions):
+    """Formata as sugestões filtradas de um perfil ('' se nenhuma passou pelos filtros)."""
+    return BettingAnalyzer(None, None).format_suggestions_message(suggestions) if suggestions else ""
+
+async def bets_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Envia sugestões de apostas quando o comando /apostas é emitido.
+    
+    "/apostas N" define quantas sugestões o usuário quer ver (até
+    MAX_SUGGESTIONS_LIMIT); a escolha fica no perfil do usuário, junto
+    com os filtros do /perfil.
+    """
+    user_id = update.effective_user.id
+    if context.args and context.args[0].isdigit():
+        profile = await asyncio.to_thread(profiles.update, user_id, tips=int(context.args[0]))
+    else:
+        profile = await asyncio.to_thread(profiles.get, user_id)
+    
+    # Os dados vêm do snapshot atual; sem ele, só pedir a atualização
+    if await require_snapshot(update) is None:
+        return
     
-    # Gerar sugestões
+    # Sugestões já calculadas na última atualização
     try:
-        analyzer = BettingAnalyzer(games_data, odds_data)
-        suggestions = analyzer.generate_suggestions(max_suggestions=5)
+        snapshot = snapshot_store.current
         
-        if not suggestions:
+        if not snapshot.suggestions:
             await update.message.reply_text(
                 "Não foram encontradas sugestões de apostas para hoje.\n"
                 "Tente novamente mais tarde ou use /jogos para ver os jogos disponíveis."
             )
             return
         
-        message = analyzer.format_suggestions_message(suggestions)
-        await update.message.reply_text(message, parse_mode='Markdown')
+        if not has_filters(profile):
+            message = snapshot.suggestions_message_for(profile['tips'])
+        else:
+            # Filtros do perfil: busca nos índices das apostas já calculadas;
+            # perfis iguais reaproveitam a mensagem até a próxima versão
+            view = ("suggestions",) + tuple(
+                tuple(value) if isinstance(value, list) else value for value in profile.values()
+            )
+            message = snapshot_store.renders.get(snapshot.version, view, lambda: format_profile_suggestions(
+                snapshot.suggestion_index().query(profile)
+            ))
+            if not message:
+                await update.message.reply_text(
+                    "Nenhuma sugestão de hoje passa pelos filtros do seu perfil.\n"
+                    "Use /perfil para ver ou ajustar os filtros."
+                )
+                return
+            
+        await update.message.reply_text(message + stale_notice(snapshot), parse_mode='Markdown')
         
     except Exception as e:
         logger.error(f"Erro ao gerar sugestões: {e}")
@@ -131,46 +393,54 @@ async def bets_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             "Por favor, tente novamente mais tarde."
         )
 
+async def arbitrage_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Mostra as oportunidades de arbitragem quando o comando /arbitragem é emitido."""
+    # Os dados vêm do snapshot atual; sem ele, só pedir a atualização
+    if await require_snapshot(update) is None:
+        return
+            
+    # Varredura já feita na última atualização
+    try:
+        snapshot = snapshot_store.current
+        await update.message.reply_text(snapshot.arbitrage_message + stale_notice(snapshot), parse_mode='Markdown')
+    except Exception as e:
+        logger.error(f"Erro ao mostrar arbitragens: {e}")
+        await update.message.reply_text(
+            "❌ Ocorreu um erro ao mostrar as arbitragens.\n"
+            "Por favor, tente novamente mais tarde."
+        )
+
+async def movements_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Mostra os movimentos de linha quando o comando /movimentos é emitido."""
+    try:
+        # Com vários workers, o histórico é gravado pelo líder
+        odds_history.catch_up()
+        steam_moves = odds_history.steam_moves(STEAM_WINDOW, STEAM_MIN_MOVE, STEAM_MIN_BOOKMAKERS)
+        drifts = odds_history.biggest_drifts(limit=10)
+        await update.message.reply_text(format_line_movement_message(steam_moves, drifts), parse_mode='Markdown')
+    except Exception as e:
+        logger.error(f"Erro ao mostrar movimentos de linha: {e}")
+        await update.message.reply_text(
+            "❌ Ocorreu um erro ao mostrar os movimentos de linha.\n"
+            "Por favor, tente novamente mais tarde."
+        )
+
 async def games_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Lista os jogos do dia quando o comando /jogos é emitido."""
-    await update.message.reply_text("Buscando jogos para hoje... ⏳")
-    
-    # Verificar se há dados disponíveis
-    if games_data is None:
-        success = await update_data()
-        if not success:
-            await update.message.reply_text(
-                "❌ Não foi possível obter dados de jogos.\n"
-                "Por favor, tente novamente mais tarde."
-            )
-            return
+    # Os dados vêm do snapshot atual; sem ele, só pedir a atualização
+    if await require_snapshot(update) is None:
+        return
     
-    # Formatar mensagem com jogos
+    # Primeira página, montada a partir do catálogo do snapshot atual
     try:
-        if games_data.empty:
+        snapshot = snapshot_store.current
+        if not len(snapshot.catalog("games")):
             await update.message.reply_text("Não foram encontrados jogos para hoje.")
             return
         
-        today = datetime.now().strftime("%d/%m/%Y")
-        message = f"🗓️ *Jogos de Hoje - {today}*\n\n"
-        
-        # Agrupar jogos por liga
-        leagues = games_data['league'].unique()
-        
-        for league in leagues:
-            league_games = games_data[games_data['league'] == league]
-            message += f"⚽ *{league}*\n"
-            
-            for _, game in league_games.iterrows():
-                home = game['home_team']
-                away = game['away_team']
-                time = game['time'] if 'time' in game else "Horário não disponível"
-                
-                message += f"• {home} x {away} - {time}\n"
-            
-            message += "\n"
-        
-        await update.message.reply_text(message, parse_mode='Markdown')
+        text, reply_markup = games_page(snapshot, ALL_LEAGUES, 0)
+        await update.message.reply_text(text + stale_notice(snapshot), reply_markup=reply_markup,
+                                        parse_mode='Markdown')
         
     except Exception as e:
         logger.error(f"Erro ao listar jogos: {e}")
@@ -180,62 +450,122 @@ async def games_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         )
 
 async def odds_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Mostra as odds para um jogo específico quando o comando /odds é emitido."""
-    # Verificar se há dados disponíveis
-    if odds_data is None:
-        success = await update_data()
-        if not success:
-            await update.message.reply_text(
-                "❌ Não foi possível obter dados de odds.\n"
-                "Por favor, tente novamente mais tarde."
-            )
-            return
+    """
+    Mostra as odds para um jogo específico quando o comando /odds é emitido.
     
-    if not odds_data:
+    Sem argumentos, lista os jogos em páginas; "/odds <busca>" procura
+    pelo nome (ou apelido) de um time, tolerando erros de digitação, e
+    "/odds time x time" procura o confronto.
+    """
+    # Os dados vêm do snapshot atual; sem ele, só pedir a atualização
+    if await require_snapshot(update) is None:
+        return
+    
+    snapshot = snapshot_store.current
+    if not snapshot.odds:
         await update.message.reply_text(
             "❌ Não há dados de odds disponíveis no momento.\n"
             "Por favor, tente novamente mais tarde."
         )
         return
     
-    # Criar teclado inline com jogos disponíveis
-    keyboard = []
-    for game in list(odds_data.keys())[:10]:  # Limitar a 10 jogos
-        keyboard.append([InlineKeyboardButton(game, callback_data=f"odds_{game}")])
+    if context.args:
+        await search_odds(update, snapshot, " ".join(context.args))
+        return
+        
+    # Teclado inline paginado com os jogos disponíveis
+    text, reply_markup = odds_page(snapshot, ALL_LEAGUES, 0)
+    await update.message.reply_text(text, reply_markup=reply_markup)
+
+async def search_odds(update: Update, snapshot, query: str) -> None:
+    """Procura jogos pelo nome dos times e mostra as odds (ou as opções encontradas)."""
+    team_index.sync(snapshot)
+    games = team_index.search(query, limit=PAGE_SIZE)
+    if not games:
+        await update.message.reply_text(
+            f"🔎 Nenhum jogo encontrado para \"{query}\".\n"
+            "Use /odds sem argumentos para ver a lista de jogos."
+        )
+    elif len(games) == 1:
+        await show_odds(update, games[0])
+    else:
+        keyboard = [[InlineKeyboardButton(game, callback_data=f"o:{short_id(game)}")] for game in games]
+        await update.message.reply_text(f"🔎 Jogos encontrados para \"{query}\":",
+                                        reply_markup=InlineKeyboardMarkup(keyboard))
     
-    reply_markup = InlineKeyboardMarkup(keyboard)
+def page_keyboard(catalog, prefix, league_id, page, pages):
+    """
+    Monta as linhas de navegação de uma página: anterior/próxima e filtro de liga.
     
-    await update.message.reply_text(
-        "Selecione um jogo para ver as odds:",
-        reply_markup=reply_markup
-    )
+    O callback_data é "prefixo:liga:página" com o ID curto da liga,
+    sempre abaixo do limite de 64 bytes do Telegram.
+    
+    Args:
+        catalog (GameCatalog): Catálogo navegado
+        prefix (str): Prefixo do callback (op = /odds, jp = /jogos)
+        league_id (str): Liga filtrada (ALL_LEAGUES = todas)
+        page (int): Página atual
+        pages (int): Total de páginas
+        
+    Returns:
+        list: Linhas de botões
+    """
+    navigation = []
+    if page > 0:
+        navigation.append(InlineKeyboardButton("⬅️ Anterior", callback_data=f"{prefix}:{league_id}:{page - 1}"))
+    navigation.append(InlineKeyboardButton(f"{page + 1}/{pages}", callback_data="noop"))
+    if page < pages - 1:
+        navigation.append(InlineKeyboardButton("Próxima ➡️", callback_data=f"{prefix}:{league_id}:{page + 1}"))
+        
+    leagues = [(ALL_LEAGUES, "Todas")] + list(catalog.leagues.items())
+    buttons = [InlineKeyboardButton(("✅ " if lid == league_id else "") + name, callback_data=f"{prefix}:{lid}:0")
+               for lid, name in leagues]
+    return [navigation] + [buttons[i:i + 3] for i in range(0, len(buttons), 3)]
+
+def odds_page(snapshot, league_id, page):
+    """
+    Monta uma página da seleção de jogos do /odds (em cache por versão).
+    
+    Returns:
+        tuple: (texto, teclado inline)
+    """
+    catalog = snapshot.catalog("odds")
+    if league_id not in catalog.leagues:
+        # Liga que saiu dos dados atuais (botão de uma versão anterior)
+        league_id = ALL_LEAGUES
+    
+    def build():
+        entries, current, pages = catalog.page(league_id, page)
+        keyboard = [[InlineKeyboardButton(entry['key'], callback_data=f"o:{game_id}")] for game_id, entry in entries]
+        league = catalog.leagues.get(league_id, "todas as ligas")
+        text = f"Selecione um jogo para ver as odds ({catalog.count(league_id)} jogos, {league}):"
+        return text, InlineKeyboardMarkup(keyboard + page_keyboard(catalog, "op", league_id, current, pages))
+    return snapshot_store.renders.get(snapshot.version, ("odds_page", league_id, page), build)
+
+def games_page(snapshot, league_id, page):
+    """
+    Monta uma página do /jogos, por horário de início (em cache por versão).
+    
+    Returns:
+        tuple: (texto, teclado inline)
+    """
+    catalog = snapshot.catalog("games")
+    if league_id not in catalog.leagues:
+        league_id = ALL_LEAGUES
+    
+    def build():
+        entries, current, pages = catalog.page(league_id, page)
+        text = render_games_page([entry for _, entry in entries], current, pages, catalog.count(league_id))
+        return text, InlineKeyboardMarkup(page_keyboard(catalog, "jp", league_id, current, pages))
+    return snapshot_store.renders.get(snapshot.version, ("games_page", league_id, page), build)
 
 async def show_odds(update: Update, game: str) -> None:
     """Mostra as odds para um jogo específico."""
     try:
-        game_data = odds_data[game]
-        
-        # Formatar mensagem com odds
-        message = f"📊 *Odds para {game}*\n\n"
-        
-        for bookie_name, markets in game_data.get('bookmakers', {}).items():
-            message += f"*{bookie_name.upper()}*\n"
-            
-            # Resultado Final (h2h)
-            if 'h2h' in markets:
-                message += "🏆 *Resultado Final*\n"
-                for outcome, price in markets['h2h'].items():
-                    outcome_name = "Empate" if outcome == "Draw" else f"Vitória {outcome}"
-                    message += f"• {outcome_name}: {price:.2f}\n"
-                message += "\n"
-            
-            # Total de Gols (totals)
-            if 'totals' in markets:
-                message += "🎯 *Total de Gols*\n"
-                for outcome, price in markets['totals'].items():
-                    outcome_name = f"Over {outcome[1:]}" if outcome.startswith('O') else f"Under {outcome[1:]}"
-                    message += f"• {outcome_name}: {price:.2f}\n"
-                message += "\n"
+        # Card montado uma vez por versão dos dados (e reaproveitado se o jogo não mudou)
+        snapshot = snapshot_store.current
+        message = snapshot_store.renders.get(snapshot.version, ("odds", game),
+                                             lambda: render_odds_card(snapshot.odds, game))
         
         # Verificar se a mensagem é uma resposta a um callback
         if update.callback_query:
@@ -261,36 +591,52 @@ async def show_odds(update: Update, game: str) -> None:
             )
 
 async def refresh_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Atualiza manualmente o cache de dados."""
-    await update.message.reply_text("Atualizando dados de jogos e odds... ⏳")
+    """Pede a atualização dos dados em segundo plano (sem esperar por ela)."""
+    refresh_scheduler.request_refresh()
+    snapshot = snapshot_store.current
     
-    success = await update_data()
+    if snapshot is None:
+        await update.message.reply_text("🔄 Atualização solicitada. Os dados estarão disponíveis em instantes. ⏳")
+        return
     
-    if success:
-        await update.message.reply_text(
-            "✅ Dados atualizados com sucesso!\n\n"
-            f"Jogos encontrados: {len(games_data) if games_data is not None else 0}\n"
-            f"Jogos com odds: {len(odds_data) if odds_data is not None else 0}\n"
-            f"Última atualização: {last_update.strftime('%d/%m/%Y %H:%M:%S') if last_update else 'N/A'}"
-        )
-    else:
-        await update.message.reply_text(
-            "❌ Não foi possível atualizar os dados.\n"
-            "Por favor, tente novamente mais tarde."
-        )
+    await update.message.reply_text(
+        "🔄 Atualização solicitada; os comandos passam a usar os dados novos assim que ela terminar.\n\n"
+        f"Jogos encontrados: {len(snapshot.games)}\n"
+        f"Jogos com odds: {len(snapshot.odds)}\n"
+        f"Última atualização: {snapshot.created_at.strftime('%d/%m/%Y %H:%M:%S')} "
+        f"({format_age(refresh_scheduler.data_age())} a liga mais antiga)"
+    )
 
 async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Mostra o status atual do bot e do cache de dados."""
+    cache_stats = data_collector.cache.stats()
+    render_stats = snapshot_store.renders.stats()
+    quota = data_collector.scheduler.status()
+    snapshot = snapshot_store.current
     status_message = (
         "📊 *Status do Bot de Apostas*\n\n"
         f"🤖 Bot: @{BOT_USERNAME}\n"
         f"🕒 Horário atual: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n"
-        f"🔄 Última atualização de dados: {last_update.strftime('%d/%m/%Y %H:%M:%S') if last_update else 'Nunca'}\n\n"
-        f"📈 Jogos em cache: {len(games_data) if games_data is not None else 0}\n"
-        f"📊 Jogos com odds: {len(odds_data) if odds_data is not None else 0}\n"
-        f"⏰ Horário de notificações diárias: {DAILY_NOTIFICATION_TIME}\n\n"
-        f"Use /refresh para atualizar os dados manualmente."
+        f"🔄 Última atualização de dados: {snapshot.created_at.strftime('%d/%m/%Y %H:%M:%S') if snapshot else 'Nunca'}"
+        f"{f' (versão {snapshot.version})' if snapshot else ''}"
+        f"{' — dados do disco, atualizando' if snapshot and snapshot.stale else ''}\n"
+        f"👥 Worker {os.getpid()}: {'líder' if refresh_scheduler.leader else 'seguidor'} "
+        f"(estado {state_backend.name})\n\n"
+        f"📈 Jogos em cache: {len(snapshot.games) if snapshot else 0}\n"
+        f"📊 Jogos com odds: {len(snapshot.odds) if snapshot else 0}\n"
+        f"💾 Cache da API: {cache_stats['hits']} acertos / {cache_stats['misses']} falhas "
+        f"({cache_stats['revalidations']} revalidadas, {cache_stats['entries']} respostas)\n"
+        f"🖼️ Mensagens prontas: {render_stats['hits']} acertos / {render_stats['misses']} montadas "
+        f"({render_stats['entries']} no cache)\n"
+        f"🎟️ Cota da API: {quota['remaining'] if quota['remaining'] is not None else 'N/A'} créditos restantes\n"
+        f"⏰ Horário de notificações diárias: {DAILY_NOTIFICATION_TIME} "
+        f"({await asyncio.to_thread(subscriptions.count)} inscritos)\n\n"
+        "🗂️ *Ligas:*\n"
     )
+    for league in refresh_scheduler.status()[:15]:
+        status_message += (f"• {escape_markdown(league['league'])}: {league['games']} jogos, {format_age(league['age'])} "
+                           f"(a cada {league['interval'] / 60:.0f} min)\n")
+    status_message += "\nUse /refresh para atualizar os dados manualmente."
     
     await update.message.reply_text(status_message, parse_mode='Markdown')
 
@@ -300,28 +646,64 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     data = query.data
     
     # Processar diferentes tipos de callbacks
-    if data.startswith("odds_"):
-        game = data[5:]  # Remover prefixo "odds_"
+    snapshot = snapshot_store.current
+    if data == "noop":
+        await query.answer()
+    elif snapshot is None:
+        await query.answer("Os dados ainda estão sendo carregados.")
+    elif data.startswith("o:"):
+        entry = snapshot.catalog("odds").get(data[2:])
+        if entry is None:
+            await query.answer("Jogo não encontrado nos dados atuais. Use /odds de novo.")
+        else:
+            await show_odds(update, entry['key'])
+    elif data.startswith(("op:", "jp:")):
+        prefix, league_id, page = data.split(":")
+        builder = odds_page if prefix == "op" else games_page
+        text, reply_markup = builder(snapshot, league_id, int(page) if page.isdigit() else 0)
+        await query.answer()
+        try:
+            await query.edit_message_text(text, reply_markup=reply_markup,
+                                          parse_mode='Markdown' if prefix == "jp" else None)
+        except BadRequest as e:
+            # Mesmo conteúdo (ex: clique duplo no mesmo filtro)
+            if "not modified" not in str(e).lower():
+                raise
+    elif data.startswith("odds_"):
+        # Botões antigos, com o nome do jogo no callback
+        game = data[5:]
         await show_odds(update, game)
     else:
         await query.answer("Comando não reconhecido")
 
-def setup_telegram_app():
-    """Configura a aplicação do Telegram."""
-    global telegram_app
+def setup_telegram_app(base_url=TELEGRAM_API_URL):
+    """
+    Configura a aplicação do Telegram.
+    
+    Args:
+        base_url (str): URL base da Bot API (ex: a de um servidor falso em testes de carga)
+    """
+    global telegram_app, broadcast_engine
     
     # Criar o aplicativo e passar o token do bot
-    telegram_app = ApplicationBuilder().token(TELEGRAM_TOKEN).build()
+    telegram_app = ApplicationBuilder().token(TELEGRAM_TOKEN).base_url(base_url).build()
+    broadcast_engine = BroadcastEngine(telegram_app.bot, subscriptions)
 
     # Adicionar handlers de comando
     telegram_app.add_handler(CommandHandler("start", start_command))
     telegram_app.add_handler(CommandHandler("ajuda", help_command))
     telegram_app.add_handler(CommandHandler("help", help_command))
     telegram_app.add_handler(CommandHandler("apostas", bets_command))
+    telegram_app.add_handler(CommandHandler("perfil", profile_command))
     telegram_app.add_handler(CommandHandler("jogos", games_command))
     telegram_app.add_handler(CommandHandler("odds", odds_command))
+    telegram_app.add_handler(CommandHandler("arbitragem", arbitrage_command))
+    telegram_app.add_handler(CommandHandler("movimentos", movements_command))
     telegram_app.add_handler(CommandHandler("refresh", refresh_command))
     telegram_app.add_handler(CommandHandler("status", status_command))
+    telegram_app.add_handler(CommandHandler("inscrever", subscribe_command))
+    telegram_app.add_handler(CommandHandler("cancelar", unsubscribe_command))
+    telegram_app.add_handler(CommandHandler("alerta", alert_command))
     
     # Adicionar handler para botões inline
     telegram_app.add_handler(CallbackQueryHandler(button_callback))
@@ -331,7 +713,8 @@ def setup_telegram_app():
 # Rotas Flask
 @app.route('/')
 def index():
-"""Rota principal para verificar se o serviço está funcionando."""
+    """Rota principal para verificar se o serviço está funcionando."""
+    snapshot = snapshot_store.current
     return f"""
     <html>
     <head>
@@ -352,8 +735,8 @@ def index():
             <h2>✅ Status: Online</h2>
             <p><strong>Bot:</strong> @{BOT_USERNAME}</p>
             <p><strong>Timestamp:</strong> {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</p>
-            <p><strong>Jogos em cache:</strong> {len(games_data) if games_data is not None else 0}</p>
-            <p><strong>Odds em cache:</strong> {len(odds_data) if odds_data is not None else 0}</p>
+            <p><strong>Jogos em cache:</strong> {len(snapshot.games) if snapshot else 0}</p>
+            <p><strong>Odds em cache:</strong> {len(snapshot.odds) if snapshot else 0}</p>
         </div>
         
         <h3>🔧 Configuração do Webhook:</h3>
@@ -373,23 +756,21 @@ def index():
     </body>
     </html>
     """
-```
 
 @app.route('/webhook', methods=['POST'])
 def webhook():
     """Endpoint para receber updates do Telegram via webhook."""
     try:
         # Obter dados do request
-        json_data = request.get_json()
+        json_data = request.get_json(silent=True)
         
-        if not json_data:
+        if not isinstance(json_data, dict):
             return jsonify({"error": "No JSON data"}), 400
         
-        # Criar objeto Update
-        update = Update.de_json(json_data, telegram_app.bot)
-        
-        # Processar update de forma assíncrona
-        asyncio.create_task(telegram_app.process_update(update))
+        # Só enfileirar: os workers do loop do bot convertem e processam o update.
+        # Fila cheia: 503 para o Telegram reenviar mais tarde
+        if not dispatcher.submit(json_data):
+            return jsonify({"error": "Busy"}), 503, {"Retry-After": "1"}
         
         return jsonify({"status": "ok"})
     
@@ -453,7 +834,6 @@ def set_webhook():
         </body>
         </html>
                """
-```
 
 @app.route('/clear_webhook', methods=['GET', 'POST'])
 def clear_webhook():
@@ -495,7 +875,6 @@ def clear_webhook():
         </body>
         </html>
         """
-```
 
 @app.route('/health')
 def health():
@@ -505,12 +884,67 @@ def health():
         "timestamp": datetime.now().isoformat()
     })
 
-if __name__ == '__main__':
-    # Configurar aplicação do Telegram
-    setup_telegram_app()
+async def process_update_payload(payload):
+    """Converte o JSON recebido no webhook em Update e o entrega aos handlers do bot."""
+    await telegram_app.process_update(Update.de_json(payload, telegram_app.bot))
+
+async def start_background_tasks():
+    """Inicializa o bot, os workers do webhook, o agendador e a retomada de envios no loop do bot."""
+    global resume_task
+    
+    try:
+        await telegram_app.initialize()
+    except Exception as e:
+        logger.error(f"Erro ao inicializar o bot do Telegram: {e}")
+    await dispatcher.start()
+    refresh_scheduler.schedule_daily(DAILY_NOTIFICATION_TIME, send_daily_suggestions)
+    refresh_scheduler.start()
+    resume_task = asyncio.ensure_future(resume_broadcasts())
+
+def start_bot(base_url=TELEGRAM_API_URL):
+    """
+    Inicia o bot uma única vez por processo.
+
+    Configura a aplicação do Telegram, carrega o último snapshot gravado
+    e sobe o loop de eventos do bot em uma thread dedicada, com os
+    workers do webhook e o agendador de atualizações. Roda no __main__
+    e, sob o gunicorn, na primeira requisição de cada worker (threads
+    não sobrevivem ao fork).
     
-    # Atualizar dados iniciais
-    asyncio.run(update_data())
+    Args:
+        base_url (str): URL base da Bot API
+    """
+    global bot_loop, dispatcher, _started_pid
+    
+    with _start_lock:
+        if _started_pid == os.getpid():
+            return
+            
+        setup_telegram_app(base_url)
+    
+        # Responder de imediato com o último snapshot gravado; o agendador
+        # (no worker líder) atualiza todas as ligas logo na primeira verificação
+        restored = state_backend.load_latest()
+        if restored is not None and snapshot_store.current is None:
+            snapshot_store.restore(restored)
+            
+        bot_loop = asyncio.new_event_loop()
+        dispatcher = UpdateDispatcher(process_update_payload, bot_loop)
+        threading.Thread(target=bot_loop.run_forever, name="bot-loop", daemon=True).start()
+        asyncio.run_coroutine_threadsafe(start_background_tasks(), bot_loop).result()
+        _started_pid = os.getpid()
+        
+        # Ao encerrar o worker, outro assume a atualização sem esperar a concessão vencer
+        atexit.register(state_backend.release_leadership)
+
+@app.before_request
+def ensure_bot_started():
+    """Garante que o bot está rodando neste processo antes de atender a requisição."""
+    if _started_pid != os.getpid():
+        start_bot()
+
+if __name__ == '__main__':
+    start_bot()
     
     # Iniciar servidor Flask
     logger.info(f"Iniciando servidor na porta {PORT}")
@@ -0,0 +1,133 @@
+"""
+Módulo de Arbitragem entre Casas de Apostas
+-------------------------------------------
+Este módulo procura surebets: combinações das melhores odds de casas
+diferentes cuja soma das probabilidades implícitas fica abaixo de 1,
+garantindo retorno em qualquer resultado. A varredura cobre os
+mercados h2h, totals e spreads de todos os jogos de uma vez, sobre o
+array da OddsMatrix.
+"""
+
+import logging
+
+import numpy as np
+from telegram.helpers import escape_markdown
+
+from odds_matrix import market_base
+
+logger = logging.getLogger(__name__)
+
+# Mercados verificados na varredura
+ARBITRAGE_MARKETS = ("h2h", "totals", "spreads")
+
+# Valor total apostado nos exemplos de divisão
+DEFAULT_STAKE = 100.0
+
+def scan_arbitrage(matrix, min_profit=0.0, markets=ARBITRAGE_MARKETS):
+    """
+    Procura oportunidades de arbitragem em todos os jogos e mercados.
+    
+    Para cada jogo e mercado, os resultados considerados são os que
+    alguma casa cota; o mercado só entra se todos eles tiverem preço
+    e houver pelo menos dois resultados.
+    
+    Args:
+        matrix (OddsMatrix): Matriz de odds
+        min_profit (float): Retorno garantido mínimo (0.01 = 1%)
+        markets (tuple): Tipos de mercado verificados
+        
+    Returns:
+        list: Oportunidades (dicts com game, market, profit, total_implied
+            e legs), da maior para a menor margem
+    """
+    columns = [m for m, label in enumerate(matrix.markets) if market_base(label) in markets]
+    if not columns or not len(matrix) or not matrix.bookmakers:
+        return []
+        
+    prices = matrix.prices[:, :, columns, :]
+    quoted = ~np.isnan(prices)
+    
+    # Melhor odd de cada resultado entre as casas: (jogos, mercados, resultados)
+    filled = np.where(quoted, prices, -np.inf)
+    best_bookmaker = filled.argmax(axis=1)
+    best_odds = np.take_along_axis(filled, best_bookmaker[:, None], axis=1)[:, 0]
+    required = quoted.any(axis=1)
+    
+    with np.errstate(divide='ignore'):
+        implied = np.where(required & (best_odds > 0), 1.0 / best_odds, 0.0)
+    total_implied = implied.sum(axis=2)
+    n_outcomes = required.sum(axis=2)
+    
+    is_arbitrage = (n_outcomes >= 2) & (total_implied > 0) & (total_implied < 1.0 / (1.0 + min_profit))
+    
+    opportunities = []
+    for g, c in zip(*np.nonzero(is_arbitrage)):
+        total = float(total_implied[g, c])
+        market = matrix.market_label(g, columns[c])
+        legs = []
+        for o in np.nonzero(required[g, c])[0]:
+            legs.append({
+                'outcome': matrix.outcome_name(g, matrix.outcomes[o], market),
+                'bookmaker': matrix.bookmakers[best_bookmaker[g, c, o]],
+                'odds': float(best_odds[g, c, o]),
+                'stake_share': float(implied[g, c, o]) / total
+            })
+        opportunities.append({
+            'game': matrix.game_keys[g],
+            'market': market,
+            'commence_time': matrix.games[g]['commence_time'],
+            'total_implied': total,
+            'profit': 1.0 / total - 1.0,
+            'legs': legs
+        })
+        
+    opportunities.sort(key=lambda opportunity: opportunity['profit'], reverse=True)
+    return opportunities
+
+def split_stakes(opportunity, total_stake=DEFAULT_STAKE):
+    """
+    Divide um valor entre as apostas de uma arbitragem.
+    
+    Cada aposta recebe uma parte proporcional à sua probabilidade
+    implícita, de modo que o retorno é o mesmo em qualquer resultado.
+    
+    Args:
+        opportunity (dict): Oportunidade retornada por scan_arbitrage
+        total_stake (float): Valor total apostado
+        
+    Returns:
+        tuple: (lista de valores por aposta, retorno garantido)
+    """
+    stakes = [total_stake * leg['stake_share'] for leg in opportunity['legs']]
+    return stakes, total_stake * (1.0 + opportunity['profit'])
+
+def format_arbitrage_message(opportunities, total_stake=DEFAULT_STAKE, limit=10):
+    """
+    Formata as oportunidades de arbitragem em uma mensagem para o Telegram.
+    
+    Args:
+        opportunities (list): Oportunidades retornadas por scan_arbitrage
+        total_stake (float): Valor total usado no exemplo de divisão
+        limit (int): Número máximo de oportunidades exibidas
+        
+    Returns:
+        str: Mensagem formatada
+    """
+    if not opportunities:
+        return "Nenhuma oportunidade de arbitragem encontrada no momento. 🤔"
+        
+    message = f"♻️ *Oportunidades de Arbitragem* ({len(opportunities)})\n\n"
+    
+    for opportunity in opportunities[:limit]:
+        stakes, payout = split_stakes(opportunity, total_stake)
+        # Fora do negrito: no Markdown do Telegram, a barra só escapa fora de entidades
+        message += f"⚽ {escape_markdown(opportunity['game'])}\n"
+        message += (f"📊 Mercado: {escape_markdown(opportunity['market'])} — "
+                    f"retorno garantido de {opportunity['profit'] * 100:.2f}%\n")
+        for leg, stake in zip(opportunity['legs'], stakes):
+            message += (f"• {escape_markdown(leg['outcome'])} @ {leg['odds']:.2f} "
+                        f"({escape_markdown(leg['bookmaker'])}): {stake:.2f}\n")
+        message += f"💰 Retorno para {total_stake:.0f}: {payout:.2f}\n\n"
+        
+    message += "_Nota: As odds mudam rapidamente; confirme os preços antes de apostar._"
+    return message
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark da leitura de odds
+----------------------------
+Compara o caminho antigo (json.loads + dicionários aninhados) com a
+leitura incremental do odds_parser, em uma resposta sintética de
+500 jogos x 40 casas de apostas (mercados h2h e totals).
+
+Uso: python bench_odds_parser.py [jogos] [casas]
+"""
+
+import sys
+import json
+import time
+import random
+import tracemalloc
+
+from odds_parser import parse_odds_stream, build_formatted_odds
+
+def make_response(n_events=500, n_bookmakers=40, seed=42):
+    """Gera o corpo JSON de uma resposta de odds sintética."""
+    rng = random.Random(seed)
+    events = []
+    for i in range(n_events):
+        home, away = f"Time Casa {i}", f"Time Fora {i}"
+        bookmakers = []
+        for b in range(n_bookmakers):
+            bookmakers.append({
+                "key": f"casa_{b}",
+                "title": f"Casa {b}",
+                "last_update": "2024-01-01T12:00:00Z",
+                "markets": [
+                    {
+                        "key": "h2h",
+                        "last_update": "2024-01-01T12:00:00Z",
+                        "outcomes": [
+                            {"name": home, "price": round(rng.uniform(1.5, 4.0), 2)},
+                            {"name": away, "price": round(rng.uniform(1.5, 4.0), 2)},
+                            {"name": "Draw", "price": round(rng.uniform(2.8, 4.0), 2)}
+                        ]
+                    },
+                    {
+                        "key": "totals",
+                        "last_update": "2024-01-01T12:00:00Z",
+                        "outcomes": [
+                            {"name": "Over", "price": round(rng.uniform(1.6, 2.4), 2), "point": 2.5},
+                            {"name": "Under", "price": round(rng.uniform(1.6, 2.4), 2), "point": 2.5}
+                        ]
+                    }
+                ]
+            })
+        events.append({
+            "id": f"evento_{i}",
+            "sport_key": "soccer_epl",
+            "sport_title": "Premier League",
+            "commence_time": "2024-01-01T15:00:00Z",
+            "home_team": home,
+            "away_team": away,
+            "bookmakers": bookmakers
+        })
+    return json.dumps(events).encode("utf-8")
+
+def legacy_format_odds_data(odds_data):
+    """Implementação anterior de DataCollector.format_odds_data."""
+    formatted_odds = {}
+    for game in odds_data:
+        game_key = f"{game.get('home_team')} x {game.get('away_team')}"
+        formatted_odds[game_key] = {
+            'id': game.get('id'),
+            'commence_time': game.get('commence_time'),
+            'bookmakers': {}
+        }
+        for bookmaker in game.get('bookmakers', []):
+            bookie_name = bookmaker.get('key')
+            formatted_odds[game_key]['bookmakers'][bookie_name] = {}
+            for market in bookmaker.get('markets', []):
+                market_key = market.get('key')
+                formatted_odds[game_key]['bookmakers'][bookie_name][market_key] = {}
+                for outcome in market.get('outcomes', []):
+                    formatted_odds[game_key]['bookmakers'][bookie_name][market_key][outcome.get('name')] = outcome.get('price')
+    return formatted_odds
+
+def legacy_path(body):
+    return legacy_format_odds_data(json.loads(body))
+
+def streaming_path(body):
+    return build_formatted_odds(parse_odds_stream(body))
+
+def streaming_compact(body):
+    return parse_odds_stream(body)
+
+def measure(func, body, repeat=3):
+    """Retorna (melhor tempo em s, pico de memória em MiB, resultado)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(body)
+        best = min(best, time.perf_counter() - start)
+        del result
+        
+    tracemalloc.start()
+    result = func(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 2 ** 20, result
+
+def main():
+    n_events = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    n_bookmakers = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    body = make_response(n_events, n_bookmakers)
+    print(f"Resposta sintética: {n_events} jogos x {n_bookmakers} casas ({len(body) / 2 ** 20:.1f} MiB)")
+    
+    legacy_time, legacy_peak, legacy = measure(legacy_path, body)
+    stream_time, stream_peak, streamed = measure(streaming_path, body)
+    compact_time, compact_peak, _ = measure(streaming_compact, body)
+    
+    if legacy != streamed:
+        print("ERRO: os dois caminhos produziram resultados diferentes")
+        return 1
+        
+    print(f"{'caminho':<36}{'tempo (ms)':>12}{'pico (MiB)':>12}")
+    print(f"{'json.loads + format_odds_data':<36}{legacy_time * 1000:>12.1f}{legacy_peak:>12.1f}")
+    print(f"{'streaming + build_formatted_odds':<36}{stream_time * 1000:>12.1f}{stream_peak:>12.1f}")
+    print(f"{'streaming (GameOdds compacto)':<36}{compact_time * 1000:>12.1f}{compact_peak:>12.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
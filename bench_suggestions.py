@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark da seleção de sugestões
+---------------------------------
+Compara a seleção top-K de BettingAnalyzer.generate_suggestions (heap
+de tamanho K sobre as apostas com valor, e partição sobre o array de
+valores no caminho vetorizado) com a ordenação completa, para vários
+números de apostas (n) e de sugestões (K).
+
+O custo da seleção por heap deve crescer com n log K, e não com n log n.
+
+Uso: python bench_suggestions.py [casas]
+"""
+
+import sys
+import math
+import time
+import random
+
+from analyzer import BettingAnalyzer, suggestion_rank
+from odds_matrix import OddsMatrix
+
+def make_games(n_events, n_bookmakers=20, seed=42):
+    """Gera jogos com odds h2h sintéticas (muitas apostas com valor)."""
+    rng = random.Random(seed)
+    games = []
+    for i in range(n_events):
+        home, away = f"Time Casa {i}", f"Time Fora {i}"
+        games.append({
+            "id": f"evento_{i}",
+            "home_team": home,
+            "away_team": away,
+            "commence_time": f"2024-01-{1 + i % 28:02d}T{i % 24:02d}:00:00Z",
+            "bookmakers": [{
+                "key": f"casa_{b}",
+                "markets": [{"key": "h2h", "outcomes": [
+                    {"name": name, "price": round(rng.uniform(1.2, 8.0), 2)}
+                    for name in (home, "Draw", away)
+                ]}]
+            } for b in range(n_bookmakers)]
+        })
+    return games
+
+def best_time(func, repeat=5):
+    """Retorna o melhor tempo (s) de func."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    n_bookmakers = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"{'jogos':>7}{'apostas (n)':>13}{'K':>6}{'heap (ms)':>11}{'vetor (ms)':>12}"
+          f"{'sort (ms)':>11}{'ns / (n log K)':>16}")
+          
+    for n_events in (250, 1000, 4000):
+        analyzer = BettingAnalyzer(None, OddsMatrix.from_games(make_games(n_events, n_bookmakers)))
+        value_bets = analyzer.find_all_value_bets()
+        n = sum(len(bets) for bets in value_bets.values())
+        
+        def full_sort():
+            candidates = [analyzer._make_suggestion(key, bet) for key, bets in value_bets.items() for bet in bets]
+            return sorted(candidates, key=suggestion_rank, reverse=True)[:k]
+            
+        for k in (5, 50, 500):
+            heap_time = best_time(lambda: analyzer.generate_suggestions(k, value_bets=value_bets))
+            vector_time = best_time(lambda: analyzer.generate_suggestions(k))
+            sort_time = best_time(full_sort)
+            
+            if analyzer.generate_suggestions(k) != full_sort():
+                print("ERRO: seleção top-K difere da ordenação completa")
+                return 1
+                
+            per_unit = heap_time * 1e9 / (n * math.log2(max(k, 2)))
+            print(f"{n_events:>7}{n:>13}{k:>6}{heap_time * 1000:>11.1f}{vector_time * 1000:>12.2f}"
+                  f"{sort_time * 1000:>11.1f}{per_unit:>16.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
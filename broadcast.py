@@ -0,0 +1,240 @@
+"""
+Módulo de Envio em Massa
+------------------------
+Este módulo envia uma mesma mensagem (ex: as sugestões do dia, já
+formatadas no snapshot) a todos os chats inscritos, respeitando os
+limites do Telegram:
+
+- limite global (~30 mensagens/s por bot) e por chat (~1 mensagem/s),
+  com token buckets;
+- respostas 429: todos os envios pausam pelo retry_after informado e o
+  chat é tentado de novo;
+- chats que bloquearam o bot (403) têm a inscrição cancelada.
+
+Os chats são percorridos em lotes, em ordem de ID, e o progresso é
+gravado no SubscriptionStore ao fim de cada lote: se o processo cair no
+meio do envio, resume_pending continua do último lote concluído (no
+máximo um lote é reenviado).
+"""
+
+import time
+import asyncio
+import logging
+from datetime import timedelta
+
+from telegram.error import RetryAfter, Forbidden, BadRequest, TelegramError
+
+from config import BROADCAST_RATE, BROADCAST_PER_CHAT_RATE, BROADCAST_CONCURRENCY, BROADCAST_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Tentativas por chat (429 e erros de rede) antes de desistir
+MAX_ATTEMPTS = 5
+
+class TokenBucket:
+    """Balde de fichas: até capacity envios de uma vez, rate envios por segundo em média."""
+    
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        """
+        Inicializa o balde cheio.
+        
+        Args:
+            rate (float): Fichas repostas por segundo
+            capacity (float): Máximo de fichas acumuladas (padrão: rate, ao menos 1)
+            clock (callable): Relógio monotônico em segundos
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self.paused_until = 0.0
+    
+    def reserve(self):
+        """
+        Tenta pegar uma ficha.
+        
+        Returns:
+            float: 0 se pegou; senão, segundos até valer a pena tentar de novo
+        """
+        now = self.clock()
+        if now < self.paused_until:
+            return self.paused_until - now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+    
+    async def acquire(self):
+        """Espera até pegar uma ficha."""
+        while True:
+            wait = self.reserve()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+    
+    def pause(self, seconds):
+        """Suspende o balde por alguns segundos (ex: retry_after de um 429) e o esvazia."""
+        self.paused_until = max(self.paused_until, self.clock() + seconds)
+        self.tokens = 0.0
+        self.updated = self.paused_until
+
+class BroadcastEngine:
+    """Envia mensagens a todos os inscritos com limites de taxa e progresso retomável."""
+    
+    def __init__(self, bot, store, rate=BROADCAST_RATE, per_chat_rate=BROADCAST_PER_CHAT_RATE,
+                 concurrency=BROADCAST_CONCURRENCY, batch_size=BROADCAST_BATCH_SIZE):
+        """
+        Inicializa o motor de envio.
+        
+        Args:
+            bot (telegram.Bot): Bot usado nos envios
+            store (SubscriptionStore): Inscritos e progresso dos envios
+            rate (float): Mensagens por segundo no total
+            per_chat_rate (float): Mensagens por segundo para um mesmo chat
+            concurrency (int): Envios em andamento ao mesmo tempo
+            batch_size (int): Chats por lote (o progresso é gravado a cada lote)
+        """
+        self.bot = bot
+        self.store = store
+        self.per_chat_rate = per_chat_rate
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.bucket = TokenBucket(rate)
+        self._chat_buckets = {}
+        self._running = {}
+    
+    async def broadcast(self, broadcast_id, text, parse_mode=None):
+        """
+        Envia a mensagem a todos os inscritos.
+        
+        O ID torna o envio idempotente: repetir um ID já concluído não
+        envia nada, e repetir um interrompido continua de onde parou
+        (com a mensagem gravada no início). Chamadas simultâneas com o
+        mesmo ID esperam o mesmo envio.
+        
+        Args:
+            broadcast_id (str): ID do envio (ex: daily-2024-01-01)
+            text (str): Mensagem
+            parse_mode (str): Formatação da mensagem
+            
+        Returns:
+            dict: Envio com sent, failed e finished_at
+        """
+        task = self._running.get(broadcast_id)
+        if task is None:
+            task = asyncio.ensure_future(self._run(broadcast_id, text, parse_mode))
+            self._running[broadcast_id] = task
+            task.add_done_callback(lambda done: self._running.pop(broadcast_id, None))
+        return await asyncio.shield(task)
+    
+    async def deliver(self, messages, parse_mode=None):
+        """
+        Envia mensagens diferentes a chats diferentes (ex: alertas), com os
+        mesmos limites de taxa dos envios em massa e sem progresso gravado.
+        
+        Args:
+            messages (dict): Mensagem por chat
+            parse_mode (str): Formatação das mensagens
+            
+        Returns:
+            dict: Resultado por chat (sent, blocked ou failed)
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def send(chat_id, text):
+            async with semaphore:
+                return await self._send(chat_id, text, parse_mode)
+                
+        outcomes = await asyncio.gather(*(send(chat_id, text) for chat_id, text in messages.items()))
+        return dict(zip(messages, outcomes))
+    
+    async def stop(self):
+        """Interrompe os envios em andamento (o progresso gravado fica para resume_pending)."""
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def resume_pending(self):
+        """
+        Conclui os envios interrompidos (ex: por uma queda no meio do envio).
+        
+        Returns:
+            list: Envios concluídos
+        """
+        results = []
+        for broadcast_id in await asyncio.to_thread(self.store.pending_broadcasts):
+            logger.info(f"Retomando envio {broadcast_id}...")
+            results.append(await self.broadcast(broadcast_id, None))
+        return results
+    
+    async def _run(self, broadcast_id, text, parse_mode):
+        """Percorre os inscritos em lotes a partir do progresso gravado."""
+        state = await asyncio.to_thread(self.store.start_broadcast, broadcast_id, text or "", parse_mode)
+        if state['finished_at'] is not None:
+            return state
+            
+        text, parse_mode, cursor = state['text'], state['parse_mode'], state['cursor']
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def send(chat_id):
+            async with semaphore:
+                return await self._send(chat_id, text, parse_mode)
+                
+        while True:
+            chat_ids = await asyncio.to_thread(self.store.chat_ids, cursor, self.batch_size)
+            if not chat_ids:
+                break
+                
+            outcomes = await asyncio.gather(*(send(chat_id) for chat_id in chat_ids))
+            self._chat_buckets.clear()
+            
+            blocked = [chat_id for chat_id, outcome in zip(chat_ids, outcomes) if outcome == "blocked"]
+            sent = outcomes.count("sent")
+            cursor = chat_ids[-1]
+            await asyncio.to_thread(self.store.save_progress, broadcast_id, cursor, sent,
+                                    len(outcomes) - sent, blocked)
+                                    
+        await asyncio.to_thread(self.store.finish_broadcast, broadcast_id)
+        state = await asyncio.to_thread(self.store.get_broadcast, broadcast_id)
+        logger.info(f"Envio {broadcast_id} concluído: {state['sent']} entregues, {state['failed']} falhas "
+                    f"em {time.monotonic() - started:.1f}s.")
+        return state
+    
+    async def _send(self, chat_id, text, parse_mode):
+        """
+        Envia a mensagem a um chat, com as esperas e novas tentativas.
+        
+        Returns:
+            str: sent, blocked (chat bloqueou o bot ou não existe) ou failed
+        """
+        chat_bucket = self._chat_buckets.get(chat_id)
+        if chat_bucket is None:
+            chat_bucket = self._chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, 1)
+            
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            await chat_bucket.acquire()
+            await self.bucket.acquire()
+            try:
+                await self.bot.send_message(chat_id, text, parse_mode=parse_mode)
+                return "sent"
+            except RetryAfter as e:
+                # Limite do Telegram: todos os envios esperam o tempo informado
+                delay = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else e.retry_after
+                logger.warning(f"Limite de envio atingido; pausando {delay}s.")
+                self.bucket.pause(delay)
+            except Forbidden:
+                return "blocked"
+            except BadRequest as e:
+                if "chat not found" in str(e).lower():
+                    return "blocked"
+                logger.error(f"Mensagem recusada para o chat {chat_id}: {e}")
+                return "failed"
+            except TelegramError as e:
+                logger.warning(f"Erro ao enviar para o chat {chat_id} (tentativa {attempt}): {e}")
+                await asyncio.sleep(min(2 ** attempt, 30))
+        return "failed"
@@ -0,0 +1,110 @@
+"""
+Módulo de Catálogo de Jogos
+---------------------------
+Este módulo organiza os jogos de um snapshot para a navegação por
+páginas do /odds e do /jogos: cada jogo e cada liga recebem um ID curto
+e estável (hash do nome, igual em todas as versões e workers, cabe no
+callback_data de 64 bytes do Telegram), e os jogos ficam ordenados por
+horário de início, no total e por liga. Uma página é uma fatia de uma
+lista já ordenada: O(tamanho da página), qualquer que seja o número de
+jogos.
+"""
+
+import hashlib
+
+from analyzer import kickoff_timestamp
+from config import PAGE_SIZE
+
+# Filtro "todas as ligas" no callback_data
+ALL_LEAGUES = "*"
+
+def short_id(name, length=10):
+    """
+    ID curto e estável de um jogo ou liga.
+    
+    Args:
+        name (str): Chave do jogo ("casa x fora") ou nome da liga
+        length (int): Número de caracteres hexadecimais
+        
+    Returns:
+        str: ID (ex: 3fa4c1d09b)
+    """
+    return hashlib.blake2b(str(name).encode("utf-8"), digest_size=8).hexdigest()[:length]
+
+class GameCatalog:
+    """Jogos ordenados por início, com índice por liga e por ID curto."""
+    
+    def __init__(self, entries):
+        """
+        Monta o catálogo.
+        
+        Args:
+            entries (iterable): Jogos como dicts com key, league e
+                commence_time (os demais campos são mantidos)
+        """
+        self.entries = sorted(
+            entries, key=lambda entry: (kickoff_timestamp(entry.get('commence_time')), entry['key'])
+        )
+        self.ids = [short_id(entry['key']) for entry in self.entries]
+        self._by_id = {}
+        self._by_league = {}
+        # Ligas por ID curto, na ordem do primeiro jogo de cada uma
+        self.leagues = {}
+        for position, (game_id, entry) in enumerate(zip(self.ids, self.entries)):
+            self._by_id[game_id] = position
+            league_id = short_id(entry['league'])
+            self.leagues.setdefault(league_id, entry['league'])
+            self._by_league.setdefault(league_id, []).append(position)
+    
+    @classmethod
+    def from_odds(cls, odds_data):
+        """Catálogo dos jogos com odds (metadados da matriz)."""
+        return cls(odds_data.games if odds_data is not None else [])
+    
+    @classmethod
+    def from_games(cls, games_data):
+        """Catálogo dos jogos do dia (DataFrame do coletor)."""
+        if games_data is None or games_data.empty:
+            return cls([])
+        columns = [column for column in ('league', 'home_team', 'away_team', 'commence_time', 'time')
+                   if column in games_data.columns]
+        return cls(
+            dict(zip(columns, row), key=f"{row[1]} x {row[2]}")
+            for row in zip(*(games_data[column] for column in columns))
+        )
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def get(self, game_id):
+        """Jogo com um ID curto (None se não está neste snapshot)."""
+        position = self._by_id.get(game_id)
+        return self.entries[position] if position is not None else None
+    
+    def count(self, league_id=ALL_LEAGUES):
+        """Número de jogos de uma liga (ou de todas)."""
+        if league_id == ALL_LEAGUES:
+            return len(self.entries)
+        return len(self._by_league.get(league_id, ()))
+    
+    def page(self, league_id=ALL_LEAGUES, page=0, size=PAGE_SIZE):
+        """
+        Retorna uma página de jogos, em ordem de início.
+        
+        Args:
+            league_id (str): ID curto da liga (ALL_LEAGUES = todas)
+            page (int): Número da página (a partir de 0; ajustado ao intervalo válido)
+            size (int): Jogos por página
+            
+        Returns:
+            tuple: (lista de (ID curto, jogo), página efetiva, total de páginas)
+        """
+        total = self.count(league_id)
+        pages = max(1, -(-total // size))
+        page = min(max(page, 0), pages - 1)
+        start = page * size
+        if league_id == ALL_LEAGUES:
+            positions = range(start, min(start + size, total))
+        else:
+            positions = self._by_league.get(league_id, [])[start:start + size]
+        return [(self.ids[position], self.entries[position]) for position in positions], page, pages
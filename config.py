@@ -33,13 +33,83 @@ APP_URL = os.getenv("APP_URL", "")
 # Porta para o servidor web
 PORT = int(os.getenv("PORT", "8080"))
 
+# Configurações do cliente HTTP da API de odds
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))  # Timeout das requisições (segundos)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))  # Conexões simultâneas no pool
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))  # Conexões keep-alive ociosas
+
+# Configurações do cache de respostas da API (TTL em segundos)
+CACHE_TTL_SPORTS = int(os.getenv("CACHE_TTL_SPORTS", "21600"))  # Lista de esportes: 6 horas
+CACHE_TTL_EVENTS = int(os.getenv("CACHE_TTL_EVENTS", "600"))  # Jogos: 10 minutos
+CACHE_TTL_ODDS = int(os.getenv("CACHE_TTL_ODDS", "60"))  # Odds: 60 segundos
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "512"))  # Respostas mantidas (LRU)
+
+# Configurações da cota da API de odds
+QUOTA_RESERVE = int(os.getenv("QUOTA_RESERVE", "25"))  # Créditos que nunca são gastos automaticamente
+QUOTA_MIN_INTERVAL = int(os.getenv("QUOTA_MIN_INTERVAL", "60"))  # Intervalo mínimo entre atualizações de uma liga (segundos)
+QUOTA_MAX_INTERVAL = int(os.getenv("QUOTA_MAX_INTERVAL", "21600"))  # Intervalo máximo com a cota no fim (segundos)
+
 # Configurações de apostas
 DEFAULT_SPORT = os.getenv("DEFAULT_SPORT", "soccer")  # Esporte padrão para buscar jogos
+SPORTS = [s.strip() for s in os.getenv("SPORTS", DEFAULT_SPORT).split(",") if s.strip()]  # Ligas acompanhadas ("all" = catálogo completo)
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "8"))  # Ligas buscadas em paralelo
 ODDS_REGIONS = os.getenv("ODDS_REGIONS", "eu")  # Região para formato de odds (eu, uk, us)
 MIN_VALUE_THRESHOLD = float(os.getenv("MIN_VALUE_THRESHOLD", "1.5"))  # Valor mínimo de odd para considerar uma aposta
+DEVIG_METHOD = os.getenv("DEVIG_METHOD", "shin")  # Remoção da margem das casas: multiplicative, shin ou power
+SHARP_BOOKMAKERS = os.getenv("SHARP_BOOKMAKERS", "pinnacle:3,betfair_ex_eu:2,betfair_ex_uk:2,matchbook:2")  # Peso das casas no consenso (casa:peso)
+SHARP_BOOKMAKER_WEIGHTS = {
+    name.strip(): float(weight)
+    for name, _, weight in (item.partition(":") for item in SHARP_BOOKMAKERS.split(",") if item.strip())
+    if weight.strip()
+}  # Demais casas têm peso 1
+MAX_SUGGESTIONS = int(os.getenv("MAX_SUGGESTIONS", "5"))  # Sugestões exibidas por padrão no /apostas
+MAX_SUGGESTIONS_LIMIT = int(os.getenv("MAX_SUGGESTIONS_LIMIT", "20"))  # Máximo de sugestões que um usuário pode pedir
+
+# Configurações da atualização em segundo plano (segundos)
+REFRESH_MIN_INTERVAL = int(os.getenv("REFRESH_MIN_INTERVAL", "60"))  # Ligas com jogos começando ou em andamento
+REFRESH_MAX_INTERVAL = int(os.getenv("REFRESH_MAX_INTERVAL", "3600"))  # Ligas sem jogos próximos
+REFRESH_TICK = int(os.getenv("REFRESH_TICK", "15"))  # Intervalo entre verificações de ligas vencidas
+
+# Configurações do webhook
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org/bot")  # URL base da Bot API (o token vem em seguida)
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "8"))  # Updates processados ao mesmo tempo
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))  # Updates aceitos e ainda não processados (acima disso, 503)
+
+# Snapshot gravado a cada atualização e carregado na inicialização
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "data/snapshot.bin")
+
+# Estado compartilhado entre workers (gunicorn -w N)
+STATE_BACKEND = os.getenv("STATE_BACKEND", "local")  # local (um processo) ou sqlite (vários processos na mesma máquina)
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", "data/state.db")  # Banco do backend sqlite (líder e versão publicada)
+LEADER_LEASE_TTL = int(os.getenv("LEADER_LEASE_TTL", "60"))  # Validade da concessão do líder (segundos; maior que REFRESH_TICK)
+
+# Configurações do histórico de odds
+ODDS_HISTORY_DIR = os.getenv("ODDS_HISTORY_DIR", "data/odds_history")  # Diretório do histórico de preços (só acréscimo)
+STEAM_WINDOW = int(os.getenv("STEAM_WINDOW", "900"))  # Janela de um steam move (segundos)
+STEAM_MIN_MOVE = float(os.getenv("STEAM_MIN_MOVE", "0.05"))  # Variação mínima por casa em um steam move (0.05 = 5%)
+STEAM_MIN_BOOKMAKERS = int(os.getenv("STEAM_MIN_BOOKMAKERS", "3"))  # Casas movendo juntas em um steam move
 
 # Configurações de notificações
 DAILY_NOTIFICATION_TIME = os.getenv("DAILY_NOTIFICATION_TIME", "09:00")  # Horário para envio automático de sugestões (formato 24h)
+SUBSCRIPTIONS_DB_PATH = os.getenv("SUBSCRIPTIONS_DB_PATH", "data/subscriptions.db")  # Chats inscritos e progresso dos envios
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))  # Mensagens por segundo no envio em massa (limite do Telegram: ~30)
+BROADCAST_PER_CHAT_RATE = float(os.getenv("BROADCAST_PER_CHAT_RATE", "1"))  # Mensagens por segundo para um mesmo chat
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "16"))  # Envios em andamento ao mesmo tempo
+BROADCAST_BATCH_SIZE = int(os.getenv("BROADCAST_BATCH_SIZE", "100"))  # Chats por lote (progresso gravado a cada lote)
+
+# Cache de mensagens formatadas (cards de odds, blocos de ligas, sugestões)
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "4096"))  # Mensagens mantidas no cache
+
+# Navegação por páginas do /odds e do /jogos
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", "8"))  # Jogos por página
+
+# Perfis dos usuários (filtros do /apostas)
+PROFILES_DB_PATH = os.getenv("PROFILES_DB_PATH", "data/profiles.db")
+
+# Configurações dos alertas de apostas com valor
+ALERT_DEFAULT_MIN_VALUE = float(os.getenv("ALERT_DEFAULT_MIN_VALUE", "0.10"))  # Valor mínimo de um alerta sem valor informado
+ALERT_MIN_IMPROVEMENT = float(os.getenv("ALERT_MIN_IMPROVEMENT", "0.02"))  # Aumento de valor que alerta de novo uma aposta já existente
+ALERT_MAX_PER_MESSAGE = int(os.getenv("ALERT_MAX_PER_MESSAGE", "5"))  # Apostas listadas em um alerta
 
 # Configuração para usar dados simulados (True) ou dados reais (False)
 USE_MOCK_DATA = os.getenv("USE_MOCK_DATA", "True").lower() == "true"
@@ -0,0 +1,161 @@
+"""
+Módulo de Probabilidade de Consenso
+-----------------------------------
+Este módulo estima a probabilidade "justa" de cada resultado a partir
+das odds de várias casas: remove a margem de cada casa (método
+multiplicativo, de Shin ou da potência) e faz uma média ponderada
+entre as casas, com peso maior para as casas "sharp".
+
+Todas as funções trabalham em lote sobre arrays (jogos, casas,
+resultados), com NaN para odds ausentes.
+"""
+
+import logging
+
+import numpy as np
+
+from config import DEVIG_METHOD, SHARP_BOOKMAKER_WEIGHTS
+
+logger = logging.getLogger(__name__)
+
+# Métodos de remoção de margem disponíveis
+DEVIG_METHODS = ("multiplicative", "shin", "power")
+
+# Iterações dos métodos numéricos (convergem bem antes disso)
+POWER_ITERATIONS = 30
+SHIN_ITERATIONS = 60
+SHIN_MAX_Z = 0.5
+
+def _row_sum(values):
+    """
+    Soma o último eixo ignorando NaN, em ordem sequencial e independente
+    da ordem dos resultados.
+    
+    As parcelas são ordenadas antes de somar e a soma é acumulada uma a
+    uma (cumsum), então o resultado é idêntico para o mesmo conjunto de
+    valores, com ou sem colunas vazias.
+    """
+    ordered = np.sort(np.where(np.isnan(values), 0.0, values), axis=-1)
+    return np.cumsum(ordered, axis=-1)[..., -1] if ordered.shape[-1] else np.zeros(ordered.shape[:-1])
+
+def _normalize(probabilities):
+    """Divide cada linha pela sua soma (linhas sem soma positiva ficam NaN)."""
+    total = _row_sum(probabilities)[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total > 0, probabilities / total, np.nan)
+
+def _devig_power(implied):
+    """Método da potência: p = q ** k, com k tal que a soma seja 1."""
+    quoted = ~np.isnan(implied)
+    q = np.where(quoted, implied, 1.0)
+    log_q = np.log(q)
+    k = np.ones(implied.shape[:-1] + (1,))
+    
+    # Newton em f(k) = soma(q ** k) - 1, que é convexa e decrescente
+    for _ in range(POWER_ITERATIONS):
+        powered = np.where(quoted, q ** k, np.nan)
+        f = _row_sum(powered)[..., None] - 1.0
+        slope = _row_sum(np.where(quoted, powered * log_q, np.nan))[..., None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = np.where(slope < 0, f / slope, 0.0)
+        k = np.maximum(k - step, 1e-6)
+        
+    return _normalize(np.where(quoted, q ** k, np.nan))
+
+def _devig_shin(implied):
+    """
+    Método de Shin: supõe uma fração z de apostadores com informação
+    privilegiada e resolve z por bisseção para que as probabilidades
+    somem 1.
+    """
+    booksum = _row_sum(implied)[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = implied ** 2 / booksum
+    
+    def shin_probabilities(z):
+        return (np.sqrt(z ** 2 + 4.0 * (1.0 - z) * ratio) - z) / (2.0 * (1.0 - z))
+        
+    low = np.zeros_like(booksum)
+    high = np.full_like(booksum, SHIN_MAX_Z)
+    for _ in range(SHIN_ITERATIONS):
+        z = (low + high) / 2.0
+        too_high = _row_sum(shin_probabilities(z))[..., None] > 1.0
+        low = np.where(too_high, z, low)
+        high = np.where(too_high, high, z)
+        
+    return _normalize(shin_probabilities((low + high) / 2.0))
+
+def devig(implied, method=DEVIG_METHOD):
+    """
+    Remove a margem das probabilidades implícitas de cada casa.
+    
+    Args:
+        implied (np.ndarray): Probabilidades implícitas (..., resultados),
+            NaN para resultados sem odd
+        method (str): multiplicative, shin ou power
+        
+    Returns:
+        np.ndarray: Probabilidades sem margem (cada linha soma 1)
+        
+    Raises:
+        ValueError: Se o método não existe
+    """
+    if method == "multiplicative":
+        return _normalize(implied)
+    if method == "shin":
+        return _devig_shin(implied)
+    if method == "power":
+        return _devig_power(implied)
+    raise ValueError(f"Método de remoção de margem desconhecido: {method}")
+
+def bookmaker_weights(bookmakers, weights=None):
+    """
+    Monta o vetor de pesos das casas de apostas.
+    
+    Args:
+        bookmakers (list): Casas de apostas
+        weights (dict): Peso por casa (padrão: SHARP_BOOKMAKER_WEIGHTS; demais casas têm peso 1)
+        
+    Returns:
+        np.ndarray: Peso de cada casa
+    """
+    weights = SHARP_BOOKMAKER_WEIGHTS if weights is None else weights
+    return np.array([float(weights.get(bookie, 1.0)) for bookie in bookmakers])
+
+def consensus_probabilities(prices, weights, method=DEVIG_METHOD):
+    """
+    Calcula a probabilidade de consenso de cada resultado de cada jogo.
+    
+    Só entram na média as casas com o livro completo (todas as odds
+    que alguma casa cota para o jogo) e mercados com pelo menos dois
+    resultados.
+    
+    Args:
+        prices (np.ndarray): Odds (jogos, casas, resultados), NaN se ausente
+        weights (np.ndarray): Peso de cada casa
+        method (str): Método de remoção de margem
+        
+    Returns:
+        np.ndarray: Probabilidades (jogos, resultados), NaN sem consenso
+    """
+    quoted = ~np.isnan(prices) & (np.nan_to_num(prices) > 0)
+    required = quoted.any(axis=1)
+    complete = (quoted == required[:, None, :]).all(axis=2) & (required.sum(axis=1) >= 2)[:, None]
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        implied = np.where(complete[:, :, None] & quoted, 1.0 / prices, np.nan)
+    fair = devig(implied, method)
+    
+    # Média ponderada entre as casas, acumulada na ordem das casas
+    book_weights = np.where(complete, weights[None, :], 0.0)
+    weighted = np.where(complete[:, :, None], book_weights[:, :, None] * fair, 0.0)
+    if prices.shape[1]:
+        numerator = np.cumsum(weighted, axis=1)[:, -1]
+        denominator = np.cumsum(book_weights, axis=1)[:, -1]
+    else:
+        numerator = np.zeros(prices.shape[::2])
+        denominator = np.zeros(prices.shape[0])
+        
+    with np.errstate(divide='ignore', invalid='ignore'):
+        consensus = np.where((denominator > 0)[:, None] & required, numerator / denominator[:, None], np.nan)
+    return _normalize(consensus)
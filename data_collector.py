@@ -5,22 +5,139 @@ Este módulo é responsável por coletar dados de jogos e odds
 de APIs externas ou usar dados simulados.
 """
 
+import json
+import asyncio
 import requests
+import httpx
 import logging
 from datetime import datetime
 import pandas as pd
-from config import ODDS_API_KEY, USE_MOCK_DATA
+from config import (
+    ODDS_API_KEY, USE_MOCK_DATA, HTTP_TIMEOUT,
+    HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, MAX_CONCURRENT_REQUESTS
+)
 from mock_data import MOCK_GAMES, MOCK_ODDS
+from response_cache import ResponseCache
+from quota_scheduler import QuotaScheduler
+from single_flight import SingleFlight
+from odds_parser import GameOdds, OddsStreamParser, compact_event, build_formatted_odds
 
 logger = logging.getLogger(__name__)
 
+# Tamanho dos trechos lidos das respostas em streaming
+STREAM_CHUNK_SIZE = 65536
+
 class DataCollector:
     """Classe para coleta de dados de jogos e odds."""
     
-    def __init__(self):
-        """Inicializa o coletor de dados."""
-        self.api_key = ODDS_API_KEY
-        self.base_url = "https://api.the-odds-api.com/v4"
+    def __init__(self, api_key=None, base_url=None, use_mock=None, timeout=HTTP_TIMEOUT, cache=None,
+                 scheduler=None):
+        """
+        Inicializa o coletor de dados.
+        
+        Args:
+            api_key (str): Chave da API (padrão: ODDS_API_KEY)
+            base_url (str): URL base da API (padrão: TheOddsAPI v4)
+            use_mock (bool): Usar dados simulados (padrão: USE_MOCK_DATA)
+            timeout (float): Timeout das requisições em segundos
+            cache (ResponseCache): Cache de respostas (padrão: novo cache)
+            scheduler (QuotaScheduler): Agendador da cota da API (padrão: novo agendador)
+        """
+        self.api_key = ODDS_API_KEY if api_key is None else api_key
+        self.base_url = (base_url or "https://api.the-odds-api.com/v4").rstrip('/')
+        self.use_mock = USE_MOCK_DATA if use_mock is None else use_mock
+        self.timeout = timeout
+        self.cache = cache if cache is not None else ResponseCache()
+        self.scheduler = scheduler if scheduler is not None else QuotaScheduler()
+        self.session = requests.Session()
+    
+    def _get_json(self, path, params, stream_parser=None, quota_sport=None, conditional=True):
+        """
+        Executa um GET na API reutilizando a sessão HTTP.
+        
+        Respostas ainda válidas vêm do cache; expiradas são revalidadas
+        com ETag/If-Modified-Since.
+        
+        Args:
+            path (str): Caminho do endpoint (ex: /sports)
+            params (dict): Parâmetros da requisição
+            stream_parser (type): Leitor incremental do corpo (ex: OddsStreamParser)
+            quota_sport (str): Liga cuja busca é registrada no agendador da cota
+                quando a resposta vem da rede (cache e 304 não gastam créditos)
+            conditional (bool): Enviar os cabeçalhos de revalidação
+            
+        Returns:
+            list: Resposta decodificada
+        """
+        key = self.cache.make_key(path, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+            
+        with self.session.get(
+            f"{self.base_url}{path}", params=params, timeout=self.timeout,
+            headers=self.cache.conditional_headers(key) if conditional else {}, stream=stream_parser is not None
+        ) as response:
+            self.scheduler.update_from_headers(response.headers)
+            if response.status_code == 304:
+                payload = self.cache.revalidate(key)
+                if payload is None:
+                    # A entrada saiu do cache durante a requisição: buscar o corpo de novo
+                    return self._get_json(path, params, stream_parser, quota_sport, conditional=False)
+                return payload
+            
+            response.raise_for_status()
+            if stream_parser is None:
+                payload = response.json()
+            else:
+                parser = stream_parser()
+                for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    parser.feed(chunk)
+                payload = parser.close()
+                
+        if quota_sport is not None:
+            self.scheduler.record_fetch(quota_sport)
+        return self.cache.store(key, payload, response.headers)
+    
+    def _odds_request(self, sport, markets, regions):
+        """
+        Monta o endpoint e os parâmetros da requisição de odds.
+        
+        Args:
+            sport (str): Chave do esporte
+            markets (str): Mercados de apostas
+            regions (str): Regiões das odds
+            
+        Returns:
+            tuple: (caminho, parâmetros)
+        """
+        params = {
+            "apiKey": self.api_key,
+            "regions": regions,
+            "markets": markets,
+            "dateFormat": "iso"
+        }
+        return f"/sports/{sport}/odds", params
+    
+    def _throttled_odds(self, sport, path, params):
+        """
+        Retorna as odds em cache quando a cota não libera a liga agora.
+        
+        Args:
+            sport (str): Chave do esporte
+            path (str): Caminho da requisição de odds
+            params (dict): Parâmetros da requisição de odds
+            
+        Returns:
+            list: Odds em cache (mesmo expiradas) ou None se a liga está liberada
+        """
+        if self.scheduler.is_due(sport):
+            return None
+            
+        stale = self.cache.get_stale(self.cache.make_key(path, params))
+        if stale is not None:
+            logger.info(f"Cota da API: reutilizando odds em cache para {sport}")
+        return stale
         
     def get_sports(self):
         """
@@ -29,7 +146,7 @@ class DataCollector:
         Returns:
             list: Lista de esportes disponíveis
         """
-        if USE_MOCK_DATA:
+        if self.use_mock:
             return [
                 {"key": "soccer_epl", "title": "Premier League"},
                 {"key": "soccer_laliga", "title": "La Liga"},
@@ -38,13 +155,8 @@ class DataCollector:
             ]
         
         try:
-            url = f"{self.base_url}/sports"
             params = {"apiKey": self.api_key}
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            return response.json()
+            return self._get_json("/sports", params)
         except Exception as e:
             logger.error(f"Erro ao obter esportes: {e}")
             return []
@@ -59,21 +171,18 @@ class DataCollector:
         Returns:
             list: Lista de jogos
         """
-        if USE_MOCK_DATA:
+        if self.use_mock:
             logger.info("Usando dados simulados para jogos")
             return MOCK_GAMES
         
         try:
-            url = f"{self.base_url}/sports/{sport}/events"
             params = {
                 "apiKey": self.api_key,
                 "dateFormat": "iso"
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            games = response.json()
+            games = self._get_json(f"/sports/{sport}/events", params)
+            self.scheduler.observe_games(sport, games)
             logger.info(f"Obtidos {len(games)} jogos para {sport}")
             return games
         except Exception as e:
@@ -90,25 +199,18 @@ class DataCollector:
             regions (str): Regiões das odds (eu, uk, us)
             
         Returns:
-            list: Lista de jogos com odds
+            list: Lista de GameOdds (jogos com odds)
         """
-        if USE_MOCK_DATA:
+        if self.use_mock:
             logger.info("Usando dados simulados para odds")
-            return MOCK_ODDS
+            return [compact_event(event) for event in MOCK_ODDS]
         
         try:
-            url = f"{self.base_url}/sports/{sport}/odds"
-            params = {
-                "apiKey": self.api_key,
-                "regions": regions,
-                "markets": markets,
-                "dateFormat": "iso"
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
+            path, params = self._odds_request(sport, markets, regions)
             
-            odds = response.json()
+            odds = self._throttled_odds(sport, path, params)
+            if odds is None:
+                odds = self._get_json(path, params, stream_parser=OddsStreamParser, quota_sport=sport)
             logger.info(f"Obtidas odds para {len(odds)} jogos de {sport}")
             return odds
         except Exception as e:
@@ -133,8 +235,48 @@ class DataCollector:
         # Obter odds
         odds = self.get_odds(sport)
         
+        return self.filter_todays(games, odds)
+    
+    def merge_results(self, results):
+        """
+        Junta os resultados de várias ligas em uma única lista de jogos e odds.
+        
+        Jogos repetidos (mesmo id) são mantidos apenas uma vez.
+        
+        Args:
+            results (list): Lista de tuplas (jogos, odds) por liga
+            
+        Returns:
+            tuple: (jogos, odds)
+        """
+        games, odds = [], []
+        seen_games, seen_odds = set(), set()
+        
+        for league_games, league_odds in results:
+            for game in league_games:
+                if game.get('id') not in seen_games:
+                    seen_games.add(game.get('id'))
+                    games.append(game)
+            for odd in league_odds:
+                if odd.id not in seen_odds:
+                    seen_odds.add(odd.id)
+                    odds.append(odd)
+                    
+        return games, odds
+    
+    def filter_todays(self, games, odds):
+        """
+        Filtra jogos e odds com início na data de hoje.
+        
+        Args:
+            games (list): Lista de jogos
+            odds (list): Lista de jogos com odds
+            
+        Returns:
+            tuple: (jogos, odds)
+        """
         # Filtrar jogos de hoje (simplificado para dados simulados)
-        if not USE_MOCK_DATA:
+        if not self.use_mock:
             today = datetime.now().date()
             filtered_games = []
             filtered_odds = []
@@ -145,7 +287,7 @@ class DataCollector:
                     filtered_games.append(game)
             
             for odd in odds:
-                odd_date = datetime.fromisoformat(odd['commence_time'].replace('Z', '+00:00')).date()
+                odd_date = datetime.fromisoformat(odd.commence_time.replace('Z', '+00:00')).date()
                 if odd_date == today:
                     filtered_odds.append(odd)
             
@@ -193,41 +335,306 @@ class DataCollector:
         Formata dados de odds em dicionário estruturado.
         
         Args:
-            odds_data (list): Lista de odds
+            odds_data (list): Lista de GameOdds ou de jogos no formato da API
             
         Returns:
             dict: Dicionário com odds formatadas
         """
-        formatted_odds = {}
+        return build_formatted_odds(
+            game if isinstance(game, GameOdds) else compact_event(game)
+            for game in odds_data
+        )
+
+class AsyncDataCollector(DataCollector):
+    """
+    Coletor de dados assíncrono.
+    
+    Mesma interface do DataCollector, mas as requisições são corrotinas
+    executadas sobre um cliente httpx com pool de conexões keep-alive,
+    para não bloquear o event loop do bot.
+    """
+    
+    def __init__(self, api_key=None, base_url=None, use_mock=None, timeout=HTTP_TIMEOUT, cache=None,
+                 scheduler=None, max_connections=HTTP_MAX_CONNECTIONS, max_keepalive=HTTP_MAX_KEEPALIVE):
+        """
+        Inicializa o coletor assíncrono.
         
-        for game in odds_data:
-            try:
-                game_id = game.get('id')
-                game_key = f"{game.get('home_team')} x {game.get('away_team')}"
+        Args:
+            api_key (str): Chave da API (padrão: ODDS_API_KEY)
+            base_url (str): URL base da API (padrão: TheOddsAPI v4)
+            use_mock (bool): Usar dados simulados (padrão: USE_MOCK_DATA)
+            timeout (float): Timeout das requisições em segundos
+            cache (ResponseCache): Cache de respostas (padrão: novo cache)
+            scheduler (QuotaScheduler): Agendador da cota da API (padrão: novo agendador)
+            max_connections (int): Máximo de conexões simultâneas no pool
+            max_keepalive (int): Máximo de conexões ociosas mantidas abertas
+        """
+        super().__init__(api_key=api_key, base_url=base_url, use_mock=use_mock, timeout=timeout, cache=cache,
+                         scheduler=scheduler)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive
+        )
+        self._client = None
+        self._client_loop = None
+        self.failed_sports = []
+        # Requisições iguais em andamento são feitas uma única vez
+        self.flights = SingleFlight()
+    
+    def _get_client(self):
+        """
+        Retorna o cliente HTTP do event loop atual, criando-o se necessário.
+        
+        Returns:
+            httpx.AsyncClient: Cliente com pool de conexões
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            # Conexões do pool ficam presas ao loop em que foram abertas
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+            self._client_loop = loop
+        return self._client
+    
+    async def _get_json(self, path, params, stream_parser=None, quota_sport=None):
+        """
+        Executa um GET assíncrono na API reutilizando o pool de conexões.
+        
+        Respostas ainda válidas vêm do cache; expiradas são revalidadas
+        com ETag/If-Modified-Since. Chamadas simultâneas para a mesma
+        requisição esperam por uma única busca.
+        
+        Args:
+            path (str): Caminho do endpoint (ex: /sports)
+            params (dict): Parâmetros da requisição
+            stream_parser (type): Leitor incremental do corpo (ex: OddsStreamParser)
+            quota_sport (str): Liga cuja busca é registrada no agendador da cota
+                quando a resposta vem da rede (cache e 304 não gastam créditos)
+            
+        Returns:
+            list: Resposta decodificada
+        """
+        key = self.cache.make_key(path, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+            
+        return await self.flights.do(key, self._fetch_json, key, path, params, stream_parser, quota_sport)
+    
+    async def _fetch_json(self, key, path, params, stream_parser, quota_sport=None, conditional=True):
+        """Busca a requisição na API (sem consultar o cache) e guarda a resposta."""
+        client = self._get_client()
+        async with client.stream(
+            "GET", f"{self.base_url}{path}", params=params,
+            headers=self.cache.conditional_headers(key) if conditional else {}
+        ) as response:
+            self.scheduler.update_from_headers(response.headers)
+            if response.status_code == 304:
+                payload = self.cache.revalidate(key)
+                if payload is None:
+                    # A entrada saiu do cache durante a requisição: buscar o corpo de novo
+                    return await self._fetch_json(key, path, params, stream_parser, quota_sport, conditional=False)
+                return payload
+            
+            response.raise_for_status()
+            if stream_parser is None:
+                payload = json.loads(await response.aread())
+            else:
+                parser = stream_parser()
+                async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                    parser.feed(chunk)
+                payload = parser.close()
                 
-                formatted_odds[game_key] = {
-                    'id': game_id,
-                    'commence_time': game.get('commence_time'),
-                    'bookmakers': {}
-                }
+        if quota_sport is not None:
+            self.scheduler.record_fetch(quota_sport)
+        return self.cache.store(key, payload, response.headers)
+    
+    async def aclose(self):
+        """Fecha o cliente HTTP e libera as conexões do pool."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
+    
+    async def get_sports(self):
+        """
+        Obtém lista de esportes disponíveis.
+        
+        Returns:
+            list: Lista de esportes disponíveis
+        """
+        if self.use_mock:
+            return super().get_sports()
+            
+        try:
+            params = {"apiKey": self.api_key}
+            return await self._get_json("/sports", params)
+        except Exception as e:
+            logger.error(f"Erro ao obter esportes: {e}")
+            return []
+    
+    async def get_games(self, sport="soccer"):
+        """
+        Obtém jogos para um esporte específico.
+        
+        Args:
+            sport (str): Chave do esporte
+            
+        Returns:
+            list: Lista de jogos
+        """
+        try:
+            return await self._fetch_games(sport)
+        except Exception as e:
+            logger.error(f"Erro ao obter jogos para {sport}: {e}")
+            return []
+    
+    async def _fetch_games(self, sport):
+        """Busca os jogos de um esporte (erros chegam a quem chamou)."""
+        if self.use_mock:
+            return super().get_games(sport)
+            
+        params = {
+            "apiKey": self.api_key,
+            "dateFormat": "iso"
+        }
+        
+        games = await self._get_json(f"/sports/{sport}/events", params)
+        self.scheduler.observe_games(sport, games)
+        logger.info(f"Obtidos {len(games)} jogos para {sport}")
+        return games
+    
+    async def get_odds(self, sport="soccer", markets="h2h,totals", regions="eu"):
+        """
+        Obtém odds para um esporte específico.
+        
+        Args:
+            sport (str): Chave do esporte
+            markets (str): Mercados de apostas (h2h, totals, spreads)
+            regions (str): Regiões das odds (eu, uk, us)
+            
+        Returns:
+            list: Lista de GameOdds (jogos com odds)
+        """
+        try:
+            return await self._fetch_odds(sport, markets, regions)
+        except Exception as e:
+            logger.error(f"Erro ao obter odds para {sport}: {e}")
+            return []
+    
+    async def _fetch_odds(self, sport, markets="h2h,totals", regions="eu"):
+        """Busca as odds de um esporte (erros chegam a quem chamou)."""
+        if self.use_mock:
+            return super().get_odds(sport, markets, regions)
+            
+        path, params = self._odds_request(sport, markets, regions)
+        
+        odds = self._throttled_odds(sport, path, params)
+        if odds is None:
+            odds = await self._get_json(path, params, stream_parser=OddsStreamParser, quota_sport=sport)
+        logger.info(f"Obtidas odds para {len(odds)} jogos de {sport}")
+        return odds
+    
+    async def get_todays_games_and_odds(self, sport="soccer"):
+        """
+        Obtém jogos e odds para hoje, buscando ambos em paralelo.
+        
+        Args:
+            sport (str): Chave do esporte
+            
+        Returns:
+            tuple: (jogos, odds)
+        """
+        logger.info(f"Coletando dados para {sport}...")
+        
+        games, odds = await asyncio.gather(
+            self.get_games(sport),
+            self.get_odds(sport)
+        )
+        
+        return self.filter_todays(games, odds)
+    
+    async def _collect_todays(self, sport):
+        """Jogos e odds de hoje de uma liga; a falha de qualquer busca chega a quem chamou."""
+        logger.info(f"Coletando dados para {sport}...")
+        
+        games, odds = await asyncio.gather(
+            self._fetch_games(sport),
+            self._fetch_odds(sport)
+        )
+        
+        return self.filter_todays(games, odds)
+
+    async def resolve_sports(self, sports):
+        """
+        Resolve a lista de ligas a buscar.
+        
+        Args:
+            sports (list): Chaves de esportes; "all" expande para o catálogo de get_sports
+            
+        Returns:
+            list: Chaves de esportes sem repetição
+        """
+        if "all" in sports:
+            catalogue = await self.get_sports()
+            sports = [
+                sport['key'] for sport in catalogue
+                if sport.get('active', True) and not sport.get('has_outrights', False)
+            ]
+        return list(dict.fromkeys(sports))
+    
+    async def get_games_and_odds_by_sport(self, sports, max_concurrency=MAX_CONCURRENT_REQUESTS):
+        """
+        Obtém jogos e odds de hoje para várias ligas em paralelo, separados por liga.
+        
+        A falha de uma liga não interrompe as demais; as ligas que
+        falharam ficam em self.failed_sports e fora do resultado.
+        
+        Args:
+            sports (list): Chaves de esportes ("all" = catálogo completo)
+            max_concurrency (int): Máximo de ligas buscadas ao mesmo tempo
+            
+        Returns:
+            dict: Tupla (jogos, odds) por liga
+        """
+        # Ligas com jogos mais próximos entram primeiro no semáforo
+        sports = self.scheduler.prioritize(await self.resolve_sports(sports))
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def collect(sport):
+            async with semaphore:
+                return await self._collect_todays(sport)
                 
-                for bookmaker in game.get('bookmakers', []):
-                    bookie_name = bookmaker.get('key')
-                    formatted_odds[game_key]['bookmakers'][bookie_name] = {}
-                    
-                    for market in bookmaker.get('markets', []):
-                        market_key = market.get('key')
-                        formatted_odds[game_key]['bookmakers'][bookie_name][market_key] = {}
-                        
-                        for outcome in market.get('outcomes', []):
-                            outcome_name = outcome.get('name')
-                            price = outcome.get('price')
-                            formatted_odds[game_key]['bookmakers'][bookie_name][market_key][outcome_name] = price
-            except Exception as e:
-                logger.error(f"Erro ao formatar odds do jogo {game.get('id', 'unknown')}: {e}")
+        results = await asyncio.gather(*(collect(sport) for sport in sports), return_exceptions=True)
+        
+        collected = {}
+        self.failed_sports = []
+        for sport, result in zip(sports, results):
+            if isinstance(result, Exception):
+                logger.error(f"Erro ao coletar dados para {sport}: {result}")
+                self.failed_sports.append(sport)
                 continue
+            collected[sport] = result
+            
+        return collected
+    
+    async def get_games_and_odds_for_sports(self, sports, max_concurrency=MAX_CONCURRENT_REQUESTS):
+        """
+        Obtém jogos e odds de hoje para várias ligas em paralelo.
         
-        return formatted_odds
+        A falha de uma liga não interrompe as demais; os resultados
+        são unidos em uma única lista de jogos e odds.
+        
+        Args:
+            sports (list): Chaves de esportes ("all" = catálogo completo)
+            max_concurrency (int): Máximo de ligas buscadas ao mesmo tempo
+            
+        Returns:
+            tuple: (jogos, odds)
+        """
+        collected = await self.get_games_and_odds_by_sport(sports, max_concurrency)
+        games, odds = self.merge_results(collected.values())
+        logger.info(f"Coletadas {len(collected)} ligas: {len(games)} jogos e {len(odds)} jogos com odds")
+        return games, odds
 
 # Instância global do coletor de dados
 data_collector = DataCollector()
@@ -243,4 +650,3 @@ def get_todays_games_and_odds(sport="soccer"):
         tuple: (jogos, odds)
     """
     return data_collector.get_todays_games_and_odds(sport)
-
@@ -0,0 +1,192 @@
+"""
+Servidor Falso da API de Odds
+-----------------------------
+Este módulo contém um servidor HTTP local que imita os endpoints
+da TheOddsAPI usados pelo bot, para testes sem acesso à internet.
+"""
+
+import json
+import hashlib
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from mock_data import MOCK_GAMES, MOCK_ODDS
+
+DEFAULT_SPORTS = [
+    {"key": "soccer_epl", "title": "Premier League"},
+    {"key": "soccer_laliga", "title": "La Liga"},
+    {"key": "soccer_serie_a", "title": "Serie A"},
+    {"key": "soccer_bundesliga", "title": "Bundesliga"}
+]
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+class FakeOddsAPIServer:
+    """
+    Servidor HTTP local que responde como a TheOddsAPI v4.
+    
+    Pode ser usado como context manager:
+        
+        with FakeOddsAPIServer() as server:
+            collector = AsyncDataCollector(base_url=server.url, use_mock=False)
+    """
+    
+    def __init__(self, games=None, odds=None, sports=None, delay=0.0, fail_sports=(),
+                 quota=None, host="127.0.0.1", port=0):
+        """
+        Inicializa o servidor falso.
+        
+        Args:
+            games (list): Jogos servidos em /sports/{sport}/events
+            odds (list): Jogos com odds servidos em /sports/{sport}/odds
+            sports (list): Esportes servidos em /sports
+            delay (float): Atraso artificial por requisição (segundos)
+            fail_sports (iterable): Ligas que respondem com erro 500
+            quota (int): Créditos mensais; se definido, envia os cabeçalhos x-requests-*
+            host (str): Endereço de escuta
+            port (int): Porta de escuta (0 = porta livre)
+        """
+        self.games = MOCK_GAMES if games is None else games
+        self.odds = MOCK_ODDS if odds is None else odds
+        self.sports = DEFAULT_SPORTS if sports is None else sports
+        self.delay = delay
+        self.fail_sports = set(fail_sports)
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        self.not_modified_count = 0
+        self.quota = quota
+        self.quota_used = 0
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._make_handler())
+        self._thread = None
+    
+    @property
+    def url(self):
+        """URL base equivalente a https://api.the-odds-api.com/v4."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v4"
+    
+    @property
+    def request_count(self):
+        """Número de requisições recebidas."""
+        with self._lock:
+            return len(self.requests)
+    
+    def start(self):
+        """Inicia o servidor em uma thread em segundo plano."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Para o servidor e libera a porta."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+    
+    def _filter_sport(self, items, sport):
+        """Filtra itens pela chave do esporte ou pelo grupo (ex: soccer)."""
+        return [
+            item for item in items
+            if item.get('sport_key') == sport or str(item.get('sport_key', '')).startswith(f"{sport}_")
+        ]
+    
+    def _quota_headers(self, cost):
+        """Monta os cabeçalhos de cota da TheOddsAPI."""
+        if self.quota is None:
+            return {}
+        return {
+            "x-requests-remaining": str(self.quota - self.quota_used),
+            "x-requests-used": str(self.quota_used),
+            "x-requests-last": str(cost)
+        }
+    
+    def handle(self, path, query, headers):
+        """
+        Resolve uma requisição GET.
+        
+        Args:
+            path (str): Caminho da URL
+            query (dict): Parâmetros da query string
+            headers (dict): Cabeçalhos da requisição
+            
+        Returns:
+            tuple: (status, corpo, cabeçalhos extras)
+        """
+        parts = [p for p in path.split('/') if p]
+        
+        if parts[:1] != ['v4'] or not query.get('apiKey'):
+            return 401, {"message": "API key inválida"}, {}
+            
+        if parts == ['v4', 'sports']:
+            return 200, self.sports, {}
+            
+        if len(parts) == 4 and parts[1] == 'sports' and parts[3] in ('events', 'odds'):
+            sport = parts[2]
+            if sport in self.fail_sports:
+                return 500, {"message": "Erro interno"}, {}
+            if parts[3] == 'events':
+                return 200, self._filter_sport(self.games, sport), self._quota_headers(0)
+                
+            # Odds custam um crédito por mercado por região
+            cost = len(query.get('markets', 'h2h').split(',')) * len(query.get('regions', 'eu').split(','))
+            if self.quota is not None and self.quota_used + cost > self.quota:
+                return 429, {"message": "Cota esgotada"}, self._quota_headers(0)
+            with self._lock:
+                self.quota_used += cost
+            return 200, self._filter_sport(self.odds, sport), self._quota_headers(cost)
+            
+        return 404, {"message": "Não encontrado"}, {}
+    
+    def _make_handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                with server._lock:
+                    server.requests.append(parsed.path)
+                    
+                if server.delay:
+                    time.sleep(server.delay)
+                    
+                status, body, extra_headers = server.handle(parsed.path, query, dict(self.headers))
+                payload = json.dumps(body).encode('utf-8') if body is not None else b""
+                
+                if status == 200:
+                    # Revalidação condicional, como um CDN na frente da API
+                    etag = '"' + hashlib.md5(payload).hexdigest() + '"'
+                    extra_headers = dict(extra_headers, ETag=etag, **{"Last-Modified": server.last_modified})
+                    if (self.headers.get("If-None-Match") == etag
+                            or self.headers.get("If-Modified-Since") == server.last_modified):
+                        with server._lock:
+                            server.not_modified_count += 1
+                        status, payload = 304, b""
+                        
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in extra_headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+            
+            def log_message(self, format, *args):
+                pass
+                
+        return Handler
@@ -0,0 +1,193 @@
+"""
+Servidor Falso da API de Bots do Telegram
+-----------------------------------------
+Este módulo contém um servidor HTTP local que imita os métodos da
+Bot API usados pelo bot (getMe, sendMessage, answerCallbackQuery...),
+para testes de carga e de envio sem acesso à internet. Pode simular
+limites de envio respondendo 429 com retry_after.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+class FakeTelegramAPI:
+    """
+    Servidor HTTP local que responde como a Bot API do Telegram.
+    
+    Pode ser usado como context manager:
+        
+        with FakeTelegramAPI() as api:
+            bot = Bot(token, base_url=api.bot_url)
+    """
+    
+    def __init__(self, delay=0.0, retry_after=None, fail_chats=(), host="127.0.0.1", port=0):
+        """
+        Inicializa o servidor falso.
+        
+        Args:
+            delay (float): Atraso artificial por requisição (segundos)
+            retry_after (int): Se definido, os pedidos marcados com fail_next
+                respondem 429 com este retry_after
+            fail_chats (iterable): Chats que respondem 403 (bot bloqueado)
+            host (str): Endereço de escuta
+            port (int): Porta de escuta (0 = porta livre)
+        """
+        self.delay = delay
+        self.retry_after = retry_after
+        self.fail_chats = set(fail_chats)
+        self.sent = []
+        self.calls = []
+        self.rate_limited = 0
+        self._fail_next = 0
+        self._message_id = 0
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._make_handler())
+        self._thread = None
+    
+    @property
+    def bot_url(self):
+        """URL base equivalente a https://api.telegram.org/bot (o token vem em seguida)."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+    
+    @property
+    def sent_count(self):
+        """Número de mensagens entregues."""
+        with self._lock:
+            return len(self.sent)
+    
+    def fail_next(self, count, retry_after=1):
+        """
+        Faz as próximas requisições de envio responderem 429.
+        
+        Args:
+            count (int): Número de requisições recusadas
+            retry_after (int): Segundos informados em retry_after
+        """
+        with self._lock:
+            self._fail_next = count
+            self.retry_after = retry_after
+    
+    def start(self):
+        """Inicia o servidor em uma thread em segundo plano."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Para o servidor e libera a porta."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+    
+    def handle(self, method, params):
+        """
+        Resolve uma chamada da Bot API.
+        
+        Args:
+            method (str): Método (ex: sendMessage)
+            params (dict): Parâmetros da chamada
+            
+        Returns:
+            tuple: (status, corpo)
+        """
+        with self._lock:
+            self.calls.append(method)
+            
+        if method == "getMe":
+            return 200, {"ok": True, "result": {
+                "id": 1, "is_bot": True, "first_name": "Bot de Apostas", "username": "bot_de_apostas"
+            }}
+            
+        if method in ("sendMessage", "editMessageText"):
+            if "chat_id" not in params:
+                # Como a API real (ex: corpo cortado por um envio cancelado no meio)
+                return 400, {"ok": False, "error_code": 400, "description": "Bad Request: chat_id is empty"}
+            chat_id = int(params["chat_id"])
+            with self._lock:
+                if self._fail_next > 0:
+                    self._fail_next -= 1
+                    self.rate_limited += 1
+                    return 429, {"ok": False, "error_code": 429,
+                                 "description": f"Too Many Requests: retry after {self.retry_after}",
+                                 "parameters": {"retry_after": self.retry_after}}
+                if chat_id in self.fail_chats:
+                    return 403, {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"}
+                self._message_id += 1
+                message_id = self._message_id
+                self.sent.append((chat_id, params.get("text", "")))
+            return 200, {"ok": True, "result": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": params.get("text", "")
+            }}
+            
+        # Demais métodos (answerCallbackQuery, setWebhook...) só confirmam
+        return 200, {"ok": True, "result": True}
+    
+    def _make_handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Cabeçalho e corpo saem em escritas separadas: sem TCP_NODELAY
+            # o cliente esperaria o ACK atrasado (~40 ms) a cada resposta
+            disable_nagle_algorithm = True
+            
+            def _params(self):
+                parsed = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                content_type = self.headers.get("Content-Type", "")
+                if body and "json" in content_type:
+                    params.update(json.loads(body))
+                elif body and "multipart/form-data" in content_type:
+                    # Campos simples de um formulário multipart
+                    boundary = content_type.split("boundary=", 1)[1].encode()
+                    for part in body.split(b"--" + boundary):
+                        header, _, value = part.partition(b"\r\n\r\n")
+                        if b'name="' in header:
+                            name = header.split(b'name="', 1)[1].split(b'"', 1)[0].decode()
+                            params[name] = value.rsplit(b"\r\n", 1)[0].decode("utf-8")
+                elif body:
+                    params.update({k: v[0] for k, v in parse_qs(body.decode("utf-8")).items()})
+                return parsed.path, params
+            
+            def _dispatch(self):
+                path, params = self._params()
+                method = path.rsplit("/", 1)[-1]
+                
+                if server.delay:
+                    time.sleep(server.delay)
+                    
+                status, body = server.handle(method, params)
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                
+            do_GET = _dispatch
+            do_POST = _dispatch
+            
+            def log_message(self, format, *args):
+                pass
+                
+        return Handler
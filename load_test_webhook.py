@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Teste de carga do webhook
+-------------------------
+Sobe o app Flask em um servidor WSGI com threads, com o bot apontando
+para um servidor falso da Bot API (FakeTelegramAPI), dispara milhares
+de updates contra /webhook e mede:
+
+- o tempo da rota /webhook (deve ficar abaixo de 1 ms) e a latência
+  vista pelo cliente;
+- a vazão de updates aceitos e os recusados pela fila cheia (503);
+- o tempo até os workers processarem tudo e as respostas chegarem à API.
+
+Uso: python load_test_webhook.py [updates] [conexões] [tamanho da fila]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import threading
+import http.client
+from concurrent.futures import ProcessPoolExecutor
+
+# Histórico e snapshot do teste fora do diretório de dados do bot
+_data_dir = tempfile.mkdtemp(prefix="webhook_load_")
+os.environ.setdefault("ODDS_HISTORY_DIR", os.path.join(_data_dir, "history"))
+os.environ.setdefault("SNAPSHOT_PATH", os.path.join(_data_dir, "snapshot.bin"))
+if len(sys.argv) > 3:
+    os.environ["WEBHOOK_QUEUE_SIZE"] = sys.argv[3]
+
+from werkzeug.serving import make_server, WSGIRequestHandler
+
+import app as bot_app
+from fake_telegram_api import FakeTelegramAPI
+
+# Comandos enviados (todos respondem com uma única mensagem)
+COMMANDS = ("/start", "/ajuda", "/apostas", "/status")
+
+class _KeepAliveHandler(WSGIRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    
+    def log_request(self, code="-", size="-"):
+        pass
+
+def make_update(update_id):
+    """Monta o JSON de um update com um comando."""
+    text = COMMANDS[update_id % len(COMMANDS)]
+    chat_id = 1000 + update_id % 500
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Teste"},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(text)}]
+        }
+    }
+
+def send_updates(port, ids):
+    """
+    Envia uma fatia dos updates por uma conexão keep-alive.
+    
+    Roda em outro processo, para o cliente não disputar o GIL com o servidor.
+    
+    Returns:
+        tuple: (latências em segundos, contagem por status HTTP)
+    """
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    latencies, statuses = [], {}
+    for update_id in ids:
+        body = json.dumps(make_update(update_id)).encode("utf-8")
+        start = time.perf_counter()
+        conn.request("POST", "/webhook", body, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+    conn.close()
+    return latencies, statuses
+
+def percentile(values, fraction):
+    """Percentil de uma lista de valores."""
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else 0.0
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    connections = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    
+    # Um log por requisição (httpx, werkzeug) pesaria mais que o próprio webhook
+    logging.getLogger().setLevel(logging.WARNING)
+    
+    # Tempo da rota /webhook, medido dentro do servidor
+    route_times = []
+    webhook_view = bot_app.app.view_functions['webhook']
+    def timed_webhook():
+        start = time.perf_counter()
+        try:
+            return webhook_view()
+        finally:
+            route_times.append(time.perf_counter() - start)
+    bot_app.app.view_functions['webhook'] = timed_webhook
+    
+    with FakeTelegramAPI() as api:
+        bot_app.start_bot(base_url=api.bot_url)
+        server = make_server("127.0.0.1", 0, bot_app.app, threaded=True, request_handler=_KeepAliveHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+        
+        # Aquecimento: primeira requisição inicializa o que faltar
+        send_updates(port, [0])
+        route_times.clear()
+        
+        with ProcessPoolExecutor(connections) as pool:
+            # Subir os processos antes de medir
+            list(pool.map(time.sleep, [0.1] * connections))
+            start = time.perf_counter()
+            results = list(pool.map(send_updates, [port] * connections,
+                                    [range(1 + i, total + 1, connections) for i in range(connections)]))
+        sent_time = time.perf_counter() - start
+        
+        latencies = [latency for result in results for latency in result[0]]
+        statuses = {}
+        for _, result_statuses in results:
+            for status, count in result_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+                
+        # Esperar os workers processarem tudo
+        deadline = time.time() + 120
+        while bot_app.dispatcher.stats()['pending'] and time.time() < deadline:
+            time.sleep(0.05)
+        drained_time = time.perf_counter() - start
+        stats = bot_app.dispatcher.stats()
+        server.shutdown()
+        
+        print(f"updates enviados:        {total} por {connections} conexões")
+        print(f"respostas:               {dict(sorted(statuses.items()))}")
+        print(f"vazão no webhook:        {total / sent_time:,.0f} updates/s")
+        print(f"rota /webhook:           p50 {percentile(route_times, 0.5) * 1e3:.3f} ms, "
+              f"p99 {percentile(route_times, 0.99) * 1e3:.3f} ms")
+        print(f"latência no cliente:     p50 {percentile(latencies, 0.5) * 1e3:.3f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1e3:.3f} ms")
+        print(f"processados:             {stats['processed']} ({stats['failed']} com erro, "
+              f"{stats['rejected']} recusados pela fila) em {drained_time:.2f}s")
+        print(f"mensagens na API falsa:  {api.sent_count}")
+        
+        unexpected = {status: count for status, count in statuses.items() if status not in (200, 503)}
+        return 1 if unexpected or stats['failed'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
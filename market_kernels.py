@@ -0,0 +1,137 @@
+"""
+Módulo de Kernels de Análise por Mercado
+----------------------------------------
+Este módulo registra um kernel vetorizado para cada tipo de mercado
+(h2h, totals por linha, spreads por handicap). O BettingAnalyzer
+despacha cada tipo uma única vez por atualização, com todas as linhas
+de todos os jogos empilhadas em um só array.
+
+Para acrescentar um mercado, basta registrar uma função com
+@register_market_kernel("tipo").
+"""
+
+import logging
+
+import numpy as np
+
+from consensus import consensus_probabilities
+
+logger = logging.getLogger(__name__)
+
+# Kernels registrados por tipo de mercado
+MARKET_KERNELS = {}
+
+# Nomes exibidos dos mercados
+MARKET_NAMES = {
+    "h2h": "Resultado Final",
+    "totals": "Total de Gols",
+    "spreads": "Handicap"
+}
+
+def register_market_kernel(base):
+    """
+    Registra o kernel de análise de um tipo de mercado.
+    
+    O kernel recebe (prices, outcomes, weights, method, threshold), com
+    prices no formato (linhas, casas, resultados) — uma linha por jogo e
+    linha do mercado — e retorna um dict de arrays no mesmo formato com
+    implied, fair, value e is_value.
+    
+    Args:
+        base (str): Tipo do mercado (h2h, totals, spreads)
+        
+    Returns:
+        callable: Decorador
+    """
+    def decorator(kernel):
+        MARKET_KERNELS[base] = kernel
+        return kernel
+    return decorator
+
+def value_kernel(prices, weights, method, threshold):
+    """
+    Calcula o valor esperado de cada odd contra o consenso entre as casas.
+    
+    Args:
+        prices (np.ndarray): Odds (linhas, casas, resultados), NaN se ausente
+        weights (np.ndarray): Peso de cada casa
+        method (str): Método de remoção de margem
+        threshold (float): Limite mínimo de valor
+        
+    Returns:
+        dict: Arrays implied, fair (linhas, resultados), value e is_value
+    """
+    quoted = ~np.isnan(prices)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        implied = np.where(quoted & (prices > 0), 1.0 / prices, 0.0)
+        fair = consensus_probabilities(prices, weights, method)
+        fair_prob = fair[:, None, :]
+        value = fair_prob * prices - 1.0
+        is_value = quoted & ~np.isnan(fair_prob) & (fair_prob > implied + threshold) & (value > 0)
+    return {
+        'implied': implied,
+        'fair': fair,
+        'value': value,
+        'is_value': is_value
+    }
+
+def _only_roles(prices, outcomes, roles):
+    """Mantém apenas as colunas de resultado com os papéis dados (demais viram NaN)."""
+    keep = np.array([outcome in roles for outcome in outcomes], dtype=bool)
+    return np.where(keep, prices, np.nan)
+
+@register_market_kernel("h2h")
+def h2h_kernel(prices, outcomes, weights, method, threshold):
+    """Resultado final: casa, empate e fora (ou só casa e fora)."""
+    return value_kernel(prices, weights, method, threshold)
+
+@register_market_kernel("totals")
+def totals_kernel(prices, outcomes, weights, method, threshold):
+    """Total de gols: mais/menos em cada linha, analisadas separadamente."""
+    return value_kernel(_only_roles(prices, outcomes, ("over", "under")), weights, method, threshold)
+
+@register_market_kernel("spreads")
+def spreads_kernel(prices, outcomes, weights, method, threshold):
+    """Handicap: mandante e visitante em cada linha (do ponto de vista do mandante)."""
+    return value_kernel(_only_roles(prices, outcomes, ("home", "away")), weights, method, threshold)
+
+def run_market_kernels(matrix, weights, method, threshold):
+    """
+    Executa o kernel de cada tipo de mercado sobre toda a matriz.
+    
+    Args:
+        matrix (OddsMatrix): Matriz de odds
+        weights (np.ndarray): Peso de cada casa
+        method (str): Método de remoção de margem
+        threshold (float): Limite mínimo de valor
+        
+    Returns:
+        dict: Arrays (jogos, casas, mercados, resultados) value e
+            is_value, e fair (jogos, mercados, resultados), cobrindo
+            todos os mercados com kernel registrado
+    """
+    n_games, n_bookmakers, n_markets, n_outcomes = matrix.prices.shape
+    value = np.full(matrix.prices.shape, np.nan)
+    is_value = np.zeros(matrix.prices.shape, dtype=bool)
+    fair = np.full((n_games, n_markets, n_outcomes), np.nan)
+    
+    for base, kernel in MARKET_KERNELS.items():
+        columns = [m for m, _ in matrix.market_indices(base)]
+        if not columns:
+            continue
+            
+        # Todas as linhas do mercado empilhadas: (jogos x linhas, casas, resultados)
+        block = matrix.prices[:, :, columns, :].transpose(0, 2, 1, 3)
+        stacked = block.reshape(n_games * len(columns), n_bookmakers, n_outcomes)
+        result = kernel(stacked, matrix.outcomes, weights, method, threshold)
+        
+        shape = (n_games, len(columns), n_bookmakers, n_outcomes)
+        value[:, :, columns, :] = result['value'].reshape(shape).transpose(0, 2, 1, 3)
+        is_value[:, :, columns, :] = result['is_value'].reshape(shape).transpose(0, 2, 1, 3)
+        fair[:, columns, :] = result['fair'].reshape(n_games, len(columns), n_outcomes)
+        
+    return {
+        'value': value,
+        'is_value': is_value,
+        'fair': fair
+    }
@@ -0,0 +1,113 @@
+"""
+Módulo de Diferenças entre Atualizações de Odds
+-----------------------------------------------
+Este módulo compara duas matrizes de odds e identifica, por jogo,
+quais pares (casa de apostas, mercado) mudaram. O conjunto de
+mudanças permite reanalisar apenas os jogos afetados.
+"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class ChangeSet:
+    """Mudanças de odds entre duas atualizações."""
+    
+    __slots__ = ("version", "added", "removed", "changed")
+    
+    def __init__(self, version=None, added=(), removed=(), changed=None):
+        """
+        Inicializa o conjunto de mudanças.
+        
+        Args:
+            version (int): Versão do snapshot que contém as mudanças
+            added (tuple): Jogos novos
+            removed (tuple): Jogos que saíram
+            changed (dict): Pares (casa, mercado) alterados por jogo existente
+        """
+        self.version = version
+        self.added = tuple(added)
+        self.removed = tuple(removed)
+        self.changed = changed or {}
+    
+    @property
+    def affected(self):
+        """Jogos que precisam ser reanalisados (novos ou alterados)."""
+        return self.added + tuple(self.changed)
+    
+    def is_empty(self):
+        """Indica se não houve nenhuma mudança."""
+        return not (self.added or self.removed or self.changed)
+    
+    def summary(self):
+        """
+        Resume as mudanças.
+        
+        Returns:
+            dict: Número de jogos novos, removidos, alterados e de cotações (casa, mercado) alteradas
+        """
+        return {
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "changed": len(self.changed),
+            "quotes": sum(len(pairs) for pairs in self.changed.values())
+        }
+
+def _union(first, second):
+    """Une duas listas mantendo a ordem (primeiro os itens de first)."""
+    known = set(first)
+    return list(first) + [item for item in second if item not in known]
+
+def _market_label(matrix, game_key, market):
+    """Rótulo (com a linha do jogo) de uma coluna de mercado."""
+    return matrix.market_label(matrix.game_index(game_key), matrix.markets.index(market))
+
+def diff_odds(old, new, version=None):
+    """
+    Compara duas matrizes de odds no nível jogo / casa / mercado.
+    
+    Args:
+        old (OddsMatrix): Matriz anterior (None na primeira atualização)
+        new (OddsMatrix): Matriz nova
+        version (int): Versão do snapshot que contém as mudanças
+        
+    Returns:
+        ChangeSet: Mudanças entre as matrizes
+    """
+    if old is None:
+        return ChangeSet(version, added=new.game_keys)
+        
+    added = [key for key in new.game_keys if key not in old]
+    removed = [key for key in old.game_keys if key not in new]
+    common = [key for key in new.game_keys if key in old]
+    
+    # Eixos unidos, para detectar casas ou mercados que sumiram
+    bookmakers = _union(new.bookmakers, old.bookmakers)
+    markets = _union(new.markets, old.markets)
+    outcomes = _union(new.outcomes, old.outcomes)
+    
+    before = old.align(common, bookmakers, markets, outcomes)
+    after = new.align(common, bookmakers, markets, outcomes)
+    lines_before = old.align_lines(common, markets)
+    lines_after = new.align_lines(common, markets)
+    
+    # Preço diferente, ou presente de um lado só (NaN == NaN conta como igual)
+    different = (before != after) & ~(np.isnan(before) & np.isnan(after))
+    changed_cells = different.any(axis=3)
+    
+    # Linha diferente na mesma coluna: toda cotação dela mudou
+    moved = (lines_before != lines_after) & ~(np.isnan(lines_before) & np.isnan(lines_after))
+    quoted = ~np.isnan(before).all(axis=3) | ~np.isnan(after).all(axis=3)
+    changed_cells |= moved[:, None, :] & quoted
+    
+    changed = {}
+    for g, b, m in zip(*np.nonzero(changed_cells)):
+        # Rótulo com a linha da atualização nova (ou da anterior, se a cotação saiu)
+        source = new if not np.isnan(after[g, b, m]).all() else old
+        changed.setdefault(common[g], []).append((bookmakers[b], _market_label(source, common[g], markets[m])))
+        
+    changes = ChangeSet(version, added, removed, {key: tuple(pairs) for key, pairs in changed.items()})
+    logger.debug(f"Diferenças de odds: {changes.summary()}")
+    return changes
@@ -0,0 +1,476 @@
+"""
+Módulo de Histórico de Odds
+---------------------------
+Este módulo guarda, em disco e apenas por acréscimo, a evolução de
+cada preço (evento, casa, mercado, resultado) ao longo das atualizações,
+e responde consultas de movimento de linha: abertura x atual, steam
+moves (várias casas movendo o mesmo preço ao mesmo tempo) e maiores
+variações.
+
+Formato em disco (diretório ODDS_HISTORY_DIR):
+    series.jsonl  uma linha JSON por série: [evento, casa, mercado, papel, nome, jogo]
+                  (evento = id do jogo na API; jogo = "casa x fora", só para exibição;
+                  linhas antigas, sem o jogo, usam a chave "casa x fora" como evento)
+    records.bin   registros de 12 bytes (ts uint32, série uint32, delta int32),
+                  em ordem de tempo; delta é a variação do preço em
+                  milésimos desde o registro anterior da mesma série
+                  (preço 0 = odd retirada). Só mudanças são gravadas.
+
+As consultas leem records.bin por np.memmap, em blocos, sem carregar o
+histórico inteiro na memória.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+
+import numpy as np
+from telegram.helpers import escape_markdown
+
+from config import ODDS_HISTORY_DIR
+
+logger = logging.getLogger(__name__)
+
+# Registro em disco: instante, série e variação do preço (milésimos)
+RECORD_DTYPE = np.dtype([("ts", "<u4"), ("series", "<u4"), ("delta", "<i4")])
+
+# Escala dos preços gravados (odds com até 3 casas decimais)
+PRICE_SCALE = 1000
+
+# Registros lidos por bloco nas consultas
+CHUNK_RECORDS = 1 << 20
+
+# Bits de cada eixo na chave numérica de uma série (evento, casa, mercado, resultado)
+KEY_SHIFTS = (36, 24, 8, 0)
+
+class OddsHistory:
+    """Série temporal de odds em disco, com consultas de movimento de linha."""
+    
+    def __init__(self, path=ODDS_HISTORY_DIR, clock=time.time):
+        """
+        Abre (ou cria) o histórico.
+        
+        Args:
+            path (str): Diretório do histórico
+            clock (callable): Relógio em segundos desde a época (substituível em testes)
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.clock = clock
+        self._records_path = os.path.join(path, "records.bin")
+        self._series_path = os.path.join(path, "series.jsonl")
+        
+        # Metadados das séries (pequenos; o histórico fica em disco)
+        self.series = []
+        self._axis_codes = ({}, {}, {}, {})
+        self._packed_keys = []
+        self._lookup = None
+        self._event_series = {}
+        self._group_index = {}
+        self._series_group = np.zeros(0, dtype=np.int64)
+        self._current = np.zeros(0, dtype=np.int64)
+        self._opening = np.zeros(0, dtype=np.int64)
+        self._opened_at = np.zeros(0, dtype=np.int64)
+        self._last_ts = 0
+        
+        # Quanto dos arquivos já foi lido (bytes de series.jsonl, registros de records.bin)
+        self._series_read = 0
+        self._applied = 0
+        # Gravado pela thread que publica os snapshots e consultado pelo loop do bot
+        self._lock = threading.Lock()
+    
+        self.catch_up()
+        logger.info(f"Histórico de odds: {len(self.series)} séries, {len(self)} registros.")
+    
+    def catch_up(self):
+        """
+        Lê as séries e os registros acrescentados aos arquivos desde a última leitura.
+        
+        Na abertura, reconstrói preços atuais e de abertura em uma passada;
+        depois, aplica o que outro processo (o líder, com vários workers)
+        gravou, para as consultas e as próximas gravações partirem dos
+        mesmos preços.
+        
+        Returns:
+            int: Número de registros novos aplicados
+        """
+        with self._lock:
+            return self._catch_up()
+    
+    def _catch_up(self):
+        """Lê o que foi acrescentado aos arquivos (com o lock já obtido)."""
+        if os.path.exists(self._series_path):
+            with open(self._series_path, "rb") as f:
+                f.seek(self._series_read)
+                data = f.read()
+            # Só linhas completas (uma gravação pode estar em andamento)
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].decode("utf-8").splitlines():
+                if line.strip():
+                    entry = tuple(json.loads(line))
+                    self._register_series(entry if len(entry) == 6 else entry + (entry[0],))
+            self._series_read += end
+        self._grow()
+        
+        records = self._records()[self._applied:]
+        for offset in range(0, len(records), CHUNK_RECORDS):
+            chunk = records[offset:offset + CHUNK_RECORDS]
+            self._apply(chunk)
+            self._last_ts = int(chunk["ts"][-1])
+        self._applied += len(records)
+        return len(records)
+    
+    def _register_series(self, entry):
+        """Acrescenta uma série às tabelas em memória e retorna o seu id."""
+        event_id, bookmaker, market, outcome = entry[:4]
+        series_id = len(self.series)
+        self.series.append(entry)
+        self._packed_keys.append(sum(self._axis_code(axis, name) << shift for axis, (name, shift)
+                                     in enumerate(zip(entry[:4], KEY_SHIFTS))))
+        self._lookup = None
+        self._event_series.setdefault(event_id, []).append(series_id)
+        self._group_index.setdefault((event_id, market, outcome), len(self._group_index))
+        return series_id
+    
+    def _axis_code(self, axis, name):
+        """Código numérico de um nome em um eixo (evento, casa, mercado, resultado)."""
+        codes = self._axis_codes[axis]
+        return codes.setdefault(name, len(codes))
+    
+    @staticmethod
+    def _event_ids(matrix):
+        """Id de cada jogo da matriz na API (a chave "casa x fora" se não houver)."""
+        return [game.get('id') or game['key'] for game in matrix.games]
+    
+    def _series_ids(self, matrix, event_ids, g_idx, b_idx, m_idx, o_idx):
+        """
+        Resolve o id da série de cada célula da matriz, criando as séries novas.
+        
+        As células são casadas pela chave numérica das séries (busca binária
+        vetorizada); só as séries novas passam por Python.
+        
+        Returns:
+            tuple: (ids das séries, entradas das séries novas)
+        """
+        packed = np.zeros(len(g_idx), dtype=np.int64)
+        for axis, names, idx in ((0, event_ids, g_idx), (1, matrix.bookmakers, b_idx), (3, matrix.outcomes, o_idx)):
+            codes = np.array([self._axis_code(axis, name) for name in names], dtype=np.int64)
+            packed |= codes[idx] << KEY_SHIFTS[axis]
+            
+        # O rótulo do mercado depende do jogo (cada jogo tem as suas linhas)
+        cells = np.asarray(g_idx, dtype=np.int64) * len(matrix.markets) + m_idx
+        pairs, pair_idx = np.unique(cells, return_inverse=True)
+        codes = np.array([self._axis_code(2, matrix.market_label(*divmod(int(pair), len(matrix.markets))))
+                          for pair in pairs], dtype=np.int64)
+        packed |= codes[pair_idx.reshape(-1)] << KEY_SHIFTS[2]
+            
+        if self._lookup is None:
+            keys = np.array(self._packed_keys, dtype=np.int64)
+            order = np.argsort(keys)
+            self._lookup = (keys[order], order)
+        sorted_keys, order = self._lookup
+        
+        position = np.minimum(np.searchsorted(sorted_keys, packed), max(len(sorted_keys) - 1, 0))
+        found = (sorted_keys[position] == packed) if len(sorted_keys) else np.zeros(len(packed), dtype=bool)
+        ids = np.where(found, order[position] if len(order) else 0, -1)
+        
+        new_series = []
+        for i in np.flatnonzero(~found):
+            g, b, m, o = g_idx[i], b_idx[i], m_idx[i], o_idx[i]
+            market = matrix.market_label(g, m)
+            entry = (event_ids[g], matrix.bookmakers[b], market, matrix.outcomes[o],
+                     matrix.outcome_name(g, matrix.outcomes[o], market), matrix.game_keys[g])
+            ids[i] = self._register_series(entry)
+            new_series.append(entry)
+        return ids, new_series
+    
+    def _grow(self):
+        """Ajusta os arrays por série ao número de séries."""
+        extra = len(self.series) - len(self._current)
+        if extra > 0:
+            self._current = np.concatenate([self._current, np.zeros(extra, dtype=np.int64)])
+            self._opening = np.concatenate([self._opening, np.zeros(extra, dtype=np.int64)])
+            self._opened_at = np.concatenate([self._opened_at, np.full(extra, -1, dtype=np.int64)])
+            groups = [self._group_index[(s[0], s[2], s[3])] for s in self.series[-extra:]]
+            self._series_group = np.concatenate([self._series_group, np.array(groups, dtype=np.int64)])
+    
+    def _apply(self, records):
+        """Aplica registros (em ordem) aos preços atuais e de abertura."""
+        series = records["series"].astype(np.int64)
+        self._current += np.bincount(series, weights=records["delta"], minlength=len(self._current)).astype(np.int64)
+        first_series, first_rows = np.unique(series, return_index=True)
+        new = self._opened_at[first_series] < 0
+        self._opening[first_series[new]] = records["delta"][first_rows[new]]
+        self._opened_at[first_series[new]] = records["ts"][first_rows[new]]
+    
+    def __len__(self):
+        """Número de registros gravados."""
+        if not os.path.exists(self._records_path):
+            return 0
+        return os.path.getsize(self._records_path) // RECORD_DTYPE.itemsize
+    
+    def _records(self):
+        """Registros em disco via memmap (somente leitura)."""
+        count = len(self)
+        if not count:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.memmap(self._records_path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+    
+    def _chunks(self, since=None):
+        """
+        Percorre os registros em blocos.
+        
+        Args:
+            since (float): Começar no primeiro registro com ts >= since
+            
+        Yields:
+            np.ndarray: Bloco de registros
+        """
+        records = self._records()
+        start = 0 if since is None else int(np.searchsorted(records["ts"], since, side="left"))
+        for offset in range(start, len(records), CHUNK_RECORDS):
+            yield records[offset:offset + CHUNK_RECORDS]
+    
+    def record(self, matrix, ts=None):
+        """
+        Grava as odds de uma atualização (só os preços que mudaram).
+        
+        Odds que sumiram de um jogo ainda presente na matriz são gravadas
+        como retiradas (preço 0).
+        
+        Args:
+            matrix (OddsMatrix): Matriz de odds da atualização
+            ts (float): Instante da atualização (padrão: agora)
+            
+        Returns:
+            int: Número de registros gravados
+        """
+        with self._lock:
+            self._catch_up()
+            ts = max(int(self.clock() if ts is None else ts), self._last_ts)
+            g_idx, b_idx, m_idx, o_idx = np.nonzero(~np.isnan(matrix.prices))
+            prices = np.rint(matrix.prices[g_idx, b_idx, m_idx, o_idx] * PRICE_SCALE).astype(np.int64)
+            
+            event_ids = self._event_ids(matrix)
+            ids, new_series = self._series_ids(matrix, event_ids, g_idx, b_idx, m_idx, o_idx)
+            self._grow()
+            
+            # Odds retiradas: séries dos jogos presentes que não vieram nesta atualização
+            present = [s for event_id in event_ids for s in self._event_series.get(event_id, ())]
+            present = np.array(present, dtype=np.int64)
+            quoted = np.zeros(len(self.series), dtype=bool)
+            quoted[ids] = True
+            withdrawn = present[~quoted[present] & (self._current[present] > 0)]
+            
+            ids = np.concatenate([ids, withdrawn])
+            prices = np.concatenate([prices, np.zeros(len(withdrawn), dtype=np.int64)])
+            deltas = prices - self._current[ids]
+            changed = deltas != 0
+            
+            records = np.zeros(int(changed.sum()), dtype=RECORD_DTYPE)
+            records["ts"] = ts
+            records["series"] = ids[changed]
+            records["delta"] = deltas[changed]
+            
+            if new_series:
+                data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in new_series).encode("utf-8")
+                with open(self._series_path, "ab") as f:
+                    f.write(data)
+                self._series_read += len(data)
+            if len(records):
+                with open(self._records_path, "ab") as f:
+                    records.tofile(f)
+                self._apply(records)
+                self._applied += len(records)
+                self._last_ts = ts
+                
+            logger.debug(f"Histórico de odds: {len(records)} registros gravados ({len(new_series)} séries novas).")
+            return len(records)
+    
+    def _describe(self, series_id, **values):
+        """Monta o dicionário de uma série com os valores dados."""
+        event_id, bookmaker, market, outcome, name, game_key = self.series[series_id]
+        return dict({
+            'event_id': event_id,
+            'game': game_key,
+            'bookmaker': bookmaker,
+            'market': market,
+            'outcome': name
+        }, **values)
+    
+    def _price_at(self, since):
+        """Preço de cada série no instante since (milésimos)."""
+        later = np.zeros(len(self._current), dtype=np.int64)
+        for chunk in self._chunks(since):
+            later += np.bincount(chunk["series"].astype(np.int64), weights=chunk["delta"],
+                                 minlength=len(later)).astype(np.int64)
+        return self._current - later
+    
+    def price_history(self, event_id, bookmaker=None, market=None):
+        """
+        Retorna a evolução dos preços de um jogo.
+        
+        Args:
+            event_id (str): Id do jogo na API
+            bookmaker (str): Filtrar por casa de apostas
+            market (str): Filtrar por rótulo de mercado (ex: h2h, totals 2.5)
+            
+        Returns:
+            list: Séries (dicts com event_id, game, bookmaker, market, outcome e
+                points = lista de (ts, odd); odd 0 = retirada)
+        """
+        with self._lock:
+            ids = [s for s in self._event_series.get(event_id, ())
+                   if (bookmaker is None or self.series[s][1] == bookmaker)
+                   and (market is None or self.series[s][2] == market)]
+            if not ids:
+                return []
+                
+            wanted = np.array(ids, dtype=np.uint32)
+            selected = [chunk[np.isin(chunk["series"], wanted)] for chunk in self._chunks()]
+            rows = np.concatenate(selected) if selected else np.zeros(0, dtype=RECORD_DTYPE)
+            
+            history = []
+            for series_id in ids:
+                series_rows = rows[rows["series"] == series_id]
+                prices = np.cumsum(series_rows["delta"].astype(np.int64)) / PRICE_SCALE
+                history.append(self._describe(series_id, points=list(zip(series_rows["ts"].tolist(), prices.tolist()))))
+            return history
+    
+    def opening_vs_current(self, event_id=None):
+        """
+        Compara o preço de abertura com o atual.
+        
+        Args:
+            event_id (str): Limitar a um jogo, pelo id na API (padrão: todos)
+            
+        Returns:
+            list: Dicts com event_id, game, bookmaker, market, outcome, opening,
+                current, change (variação relativa) e opened_at
+        """
+        with self._lock:
+            ids = self._event_series.get(event_id, []) if event_id else range(len(self.series))
+            result = []
+            for series_id in ids:
+                opening, current = self._opening[series_id], self._current[series_id]
+                if opening <= 0:
+                    continue
+                result.append(self._describe(
+                    series_id,
+                    opening=opening / PRICE_SCALE,
+                    current=current / PRICE_SCALE,
+                    change=(current - opening) / opening if current > 0 else None,
+                    opened_at=int(self._opened_at[series_id])
+                ))
+            return result
+    
+    def biggest_drifts(self, limit=10, since=None):
+        """
+        Lista as maiores variações de preço.
+        
+        Args:
+            limit (int): Número máximo de séries
+            since (float): Medir a partir deste instante (padrão: abertura)
+            
+        Returns:
+            list: Dicts com event_id, game, bookmaker, market, outcome, start,
+                current e change, da maior para a menor variação absoluta
+        """
+        with self._lock:
+            start = self._opening if since is None else self._price_at(since)
+            valid = np.flatnonzero((start > 0) & (self._current > 0) & (start != self._current))
+            if not len(valid) or limit <= 0:
+                return []
+                
+            change = (self._current[valid] - start[valid]) / start[valid]
+            if len(valid) > limit:
+                top = np.argpartition(-np.abs(change), limit - 1)[:limit]
+                valid, change = valid[top], change[top]
+            order = np.argsort(-np.abs(change), kind="stable")
+            
+            return [self._describe(
+                int(valid[i]),
+                start=start[valid[i]] / PRICE_SCALE,
+                current=self._current[valid[i]] / PRICE_SCALE,
+                change=float(change[i])
+            ) for i in order]
+    
+    def steam_moves(self, window=900, min_move=0.05, min_bookmakers=3, now=None):
+        """
+        Detecta steam moves: várias casas movendo o mesmo preço na mesma
+        direção dentro de uma janela curta.
+        
+        Args:
+            window (float): Janela em segundos
+            min_move (float): Variação relativa mínima por casa (0.05 = 5%)
+            min_bookmakers (int): Número mínimo de casas movendo juntas
+            now (float): Fim da janela (padrão: agora)
+            
+        Returns:
+            list: Dicts com event_id, game, market, outcome, direction (shortening
+                ou drifting), bookmakers e average_change
+        """
+        with self._lock:
+            now = self.clock() if now is None else now
+            start = self._price_at(now - window)
+            valid = (start > 0) & (self._current > 0)
+            change = np.zeros(len(start))
+            change[valid] = (self._current[valid] - start[valid]) / start[valid]
+            
+            moves = []
+            n_groups = len(self._group_index)
+            for direction, moved in (("shortening", valid & (change <= -min_move)),
+                                     ("drifting", valid & (change >= min_move))):
+                counts = np.bincount(self._series_group[moved], minlength=n_groups)
+                for group in np.flatnonzero(counts >= min_bookmakers):
+                    members = np.flatnonzero(moved & (self._series_group == group))
+                    first = self.series[members[0]]
+                    moves.append({
+                        'event_id': first[0],
+                        'game': first[5],
+                        'market': first[2],
+                        'outcome': first[4],
+                        'direction': direction,
+                        'bookmakers': [self.series[s][1] for s in members],
+                        'average_change': float(change[members].mean())
+                    })
+                    
+            moves.sort(key=lambda move: len(move['bookmakers']), reverse=True)
+            return moves
+
+def format_line_movement_message(steam_moves, drifts, limit=10):
+    """
+    Formata steam moves e maiores variações em uma mensagem para o Telegram.
+    
+    Args:
+        steam_moves (list): Resultado de OddsHistory.steam_moves
+        drifts (list): Resultado de OddsHistory.biggest_drifts
+        limit (int): Número máximo de itens por seção
+        
+    Returns:
+        str: Mensagem formatada
+    """
+    if not steam_moves and not drifts:
+        return "Nenhum movimento de linha registrado até agora. 🤔"
+        
+    message = "📉 *Movimento de Linhas*\n\n"
+    
+    if steam_moves:
+        message += "🚂 *Steam moves*\n"
+        for move in steam_moves[:limit]:
+            arrow = "⬇️" if move['direction'] == "shortening" else "⬆️"
+            message += (f"{arrow} {escape_markdown(move['game'])} — {escape_markdown(move['market'])}: "
+                        f"{escape_markdown(move['outcome'])} "
+                        f"({move['average_change'] * 100:+.1f}% em {len(move['bookmakers'])} casas)\n")
+        message += "\n"
+        
+    if drifts:
+        message += "📊 *Maiores variações desde a abertura*\n"
+        for drift in drifts[:limit]:
+            message += (f"• {escape_markdown(drift['game'])} — {escape_markdown(drift['market'])}: "
+                        f"{escape_markdown(drift['outcome'])} ({escape_markdown(drift['bookmaker'])}) "
+                        f"{drift['start']:.2f} → {drift['current']:.2f} ({drift['change'] * 100:+.1f}%)\n")
+                        
+    return message
@@ -0,0 +1,467 @@
+"""
+Módulo da Matriz de Odds
+------------------------
+Este módulo armazena as odds em um array NumPy indexado por
+jogo x casa de apostas x mercado x resultado, com tabelas de
+strings internadas para as chaves.
+"""
+
+import re
+import logging
+from array import array
+from collections.abc import Mapping
+
+import numpy as np
+
+from odds_parser import GameOdds, compact_event
+
+logger = logging.getLogger(__name__)
+
+# Papéis fixos dos resultados; outros nomes são acrescentados à tabela
+OUTCOME_ROLES = ("home", "draw", "away", "over", "under")
+
+_TOTALS_NAME = re.compile(r"^(Over|Under)(?:\s+([-+]?\d+(?:\.\d+)?))?$", re.IGNORECASE)
+
+def format_line(point):
+    """Formata a linha de um mercado (2.5, -1.5, 0)."""
+    return f"{point:g}"
+
+def market_base(market):
+    """Retorna o tipo do mercado a partir do rótulo (ex: totals 2.5 -> totals)."""
+    return market.split(" ", 1)[0]
+
+def market_line(market):
+    """Retorna a linha do mercado a partir do rótulo (ex: totals 2.5 -> 2.5)."""
+    parts = market.split(" ", 1)
+    return float(parts[1]) if len(parts) > 1 else None
+
+class _Table:
+    """Tabela de strings internadas (valor <-> índice)."""
+    
+    __slots__ = ("values", "index")
+    
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.index = {value: i for i, value in enumerate(self.values)}
+    
+    def intern(self, value):
+        i = self.index.get(value)
+        if i is None:
+            i = self.index[value] = len(self.values)
+            self.values.append(value)
+        return i
+    
+    def __len__(self):
+        return len(self.values)
+
+class OddsMatrix(Mapping):
+    """
+    Odds de todos os jogos em um array (jogo, casa, mercado, resultado).
+    
+    Preços ausentes são NaN. Mercados com linha (totals, spreads) têm
+    colunas por jogo ("totals #1", "totals #2", ...): a i-ésima linha
+    de cada jogo, em ordem crescente, ocupa a i-ésima coluna do tipo, e
+    lines guarda qual linha cada jogo tem em cada coluna. Assim cada
+    coluna tem no máximo três resultados (home, draw, away, over, under)
+    e o eixo de mercados cresce com o maior número de linhas de um
+    mesmo jogo, não com a união das linhas de todas as ligas.
+    
+    Também funciona como o dicionário retornado por format_odds_data
+    (chave "casa x fora"), para o código que ainda usa dicionários.
+    """
+    
+    def __init__(self, prices, games, bookmakers, markets, outcomes, lines=None):
+        """
+        Inicializa a matriz.
+        
+        Args:
+            prices (np.ndarray): Array (jogos, casas, mercados, resultados) de odds
+            games (list): Metadados por jogo (dicts com id, key, home_team, ...)
+            bookmakers (list): Tabela de casas de apostas
+            markets (list): Tabela de colunas de mercados
+            outcomes (list): Tabela de papéis de resultados
+            lines (np.ndarray): Array (jogos, mercados) com a linha de cada
+                jogo em cada coluna (NaN sem linha); se None, a linha vem
+                do rótulo da coluna ("totals 2.5"), igual em todos os jogos
+        """
+        self.prices = prices
+        self.games = games
+        self.bookmakers = list(bookmakers)
+        self.markets = list(markets)
+        self.outcomes = list(outcomes)
+        if lines is None:
+            lines = np.tile(np.array([_label_line(market) for market in self.markets], dtype=float), (len(games), 1))
+        self.lines = lines
+        self.game_keys = [game['key'] for game in games]
+        self._game_index = {key: i for i, key in enumerate(self.game_keys)}
+        self._bookmaker_index = {name: i for i, name in enumerate(self.bookmakers)}
+        self._market_index = {name: i for i, name in enumerate(self.markets)}
+        self._outcome_index = {name: i for i, name in enumerate(self.outcomes)}
+    
+    @classmethod
+    def from_games(cls, games):
+        """
+        Monta a matriz a partir dos jogos com odds.
+        
+        Args:
+            games (list): Lista de GameOdds ou de jogos no formato da API
+            
+        Returns:
+            OddsMatrix: Matriz de odds
+        """
+        bookmakers, kinds, outcomes = _Table(), _Table(), _Table(OUTCOME_ROLES)
+        metadata = []
+        seen = {}
+        # Coordenadas e preços em arrays tipados (sem uma tupla por cotação)
+        g_idx, b_idx, k_idx, o_idx = array('l'), array('l'), array('l'), array('l')
+        quote_lines, values = array('d'), array('d')
+        
+        for game in games:
+            if not isinstance(game, GameOdds):
+                game = compact_event(game)
+                
+            key = f"{game.home_team} x {game.away_team}"
+            g = seen.get(key)
+            if g is None:
+                g = seen[key] = len(metadata)
+                metadata.append({
+                    'key': key,
+                    'id': game.id,
+                    'sport_key': game.sport_key,
+                    'league': game.sport_title,
+                    'home_team': game.home_team,
+                    'away_team': game.away_team,
+                    'commence_time': game.commence_time
+                })
+                
+            for bookie_name, market_key, outcome_name, point, price in game.quotes:
+                if price is None:
+                    continue
+                role, line = _outcome_role(market_key, outcome_name, point, game.home_team, game.away_team)
+                g_idx.append(g)
+                b_idx.append(bookmakers.intern(bookie_name))
+                k_idx.append(kinds.intern(market_key))
+                o_idx.append(outcomes.intern(role))
+                quote_lines.append(np.nan if line is None else line)
+                values.append(price)
+                
+        markets, m_idx, lines = _line_slots(_view(g_idx), _view(k_idx), _view(quote_lines), kinds.values, len(metadata))
+        prices = np.full((len(metadata), len(bookmakers), len(markets), len(outcomes)), np.nan)
+        if values:
+            prices[_view(g_idx), _view(b_idx), m_idx, _view(o_idx)] = _view(values)
+            
+        return cls(prices, metadata, bookmakers.values, markets, outcomes.values, lines)
+        
+    # Interface de dicionário (compatível com format_odds_data)
+    
+    def __getitem__(self, game_key):
+        g = self._game_index[game_key]
+        game = self.games[g]
+        bookmakers = {}
+        for bookie_name, market, outcome_name, price in self.iter_game_odds(game_key):
+            markets = bookmakers.setdefault(bookie_name, {})
+            markets.setdefault(market_base(market), {})[outcome_name] = price
+        return {
+            'id': game['id'],
+            'commence_time': game['commence_time'],
+            'bookmakers': bookmakers
+        }
+    
+    def __iter__(self):
+        return iter(self.game_keys)
+    
+    def __len__(self):
+        return len(self.game_keys)
+    
+    def __contains__(self, game_key):
+        return game_key in self._game_index
+        
+    # Acessores
+    
+    @property
+    def nbytes(self):
+        """Memória ocupada pelo array de odds (bytes)."""
+        return self.prices.nbytes
+    
+    @property
+    def density(self):
+        """Fração das células do array de odds que têm preço."""
+        return float(np.count_nonzero(~np.isnan(self.prices))) / self.prices.size if self.prices.size else 0.0
+    
+    def game_index(self, game_key):
+        """Retorna o índice de um jogo (ou None)."""
+        return self._game_index.get(game_key)
+    
+    def game_info(self, game_key):
+        """
+        Retorna os metadados de um jogo.
+        
+        Args:
+            game_key (str): Chave "casa x fora"
+            
+        Returns:
+            dict: id, league, sport_key, home_team, away_team, commence_time
+        """
+        return self.games[self._game_index[game_key]]
+    
+    def market_indices(self, base):
+        """
+        Lista as colunas de mercados de um tipo.
+        
+        Args:
+            base (str): Tipo do mercado (h2h, totals, spreads)
+            
+        Returns:
+            list: Tuplas (índice, nome) das colunas desse tipo
+        """
+        return [(m, name) for m, name in enumerate(self.markets) if market_base(name) == base]
+    
+    def market_label(self, g, m):
+        """
+        Retorna o rótulo do mercado de um jogo em uma coluna.
+        
+        Args:
+            g (int): Índice do jogo
+            m (int): Índice da coluna de mercado
+            
+        Returns:
+            str: Rótulo com a linha do jogo (ex: h2h, totals 2.5)
+        """
+        base = market_base(self.markets[m])
+        line = self.lines[g, m]
+        return base if np.isnan(line) else f"{base} {format_line(line)}"
+    
+    def market_column(self, g, market):
+        """
+        Procura a coluna em que um jogo tem um mercado.
+        
+        Args:
+            g (int): Índice do jogo
+            market (str): Rótulo do mercado (ex: h2h, totals 2.5)
+            
+        Returns:
+            int: Índice da coluna (None se o jogo não tem o mercado)
+        """
+        for m, _ in self.market_indices(market_base(market)):
+            if self.market_label(g, m) == market and not np.isnan(self.prices[g, :, m]).all():
+                return m
+        return None
+    
+    def market_prices(self, market):
+        """
+        Retorna as odds de um mercado para todos os jogos e casas.
+        
+        Args:
+            market (str): Coluna (ex: h2h, totals #1) ou rótulo com linha (ex: totals 2.5)
+            
+        Returns:
+            np.ndarray: Array (jogos, casas, resultados) de odds (visão do
+                array de odds quando market é uma coluna)
+        """
+        m = self._market_index.get(market)
+        if m is not None:
+            return self.prices[:, :, m, :]
+            
+        # Rótulo com linha: cada jogo tem a linha em uma coluna própria
+        prices = np.full((len(self.games), len(self.bookmakers), len(self.outcomes)), np.nan)
+        for g in range(len(self.games)):
+            m = self.market_column(g, market)
+            if m is not None:
+                prices[g] = self.prices[g, :, m, :]
+        return prices
+    
+    def take(self, game_keys):
+        """
+        Cria uma matriz só com alguns jogos (mesmas casas, mercados e resultados).
+        
+        Args:
+            game_keys (list): Chaves "casa x fora" dos jogos
+            
+        Returns:
+            OddsMatrix: Matriz com os jogos pedidos, na ordem dada
+        """
+        rows = [self._game_index[key] for key in game_keys]
+        return OddsMatrix(
+            self.prices[rows],
+            [self.games[g] for g in rows],
+            self.bookmakers, self.markets, self.outcomes,
+            self.lines[rows]
+        )
+    
+    def align(self, game_keys, bookmakers, markets, outcomes):
+        """
+        Reindexa as odds sobre outros eixos (jogos, casas, mercados, resultados).
+        
+        Entradas que não existem nesta matriz ficam NaN.
+        
+        Args:
+            game_keys (list): Jogos (todos presentes nesta matriz)
+            bookmakers (list): Casas de apostas
+            markets (list): Colunas de mercados
+            outcomes (list): Papéis de resultados
+            
+        Returns:
+            np.ndarray: Array (jogos, casas, mercados, resultados)
+        """
+        aligned = np.full((len(game_keys), len(bookmakers), len(markets), len(outcomes)), np.nan)
+        rows = [self._game_index[key] for key in game_keys]
+        axes = []
+        for names, index in ((bookmakers, self._bookmaker_index),
+                             (markets, self._market_index),
+                             (outcomes, self._outcome_index)):
+            pairs = [(dst, index[name]) for dst, name in enumerate(names) if name in index]
+            axes.append(([dst for dst, _ in pairs], [src for _, src in pairs]))
+            
+        (b_dst, b_src), (m_dst, m_src), (o_dst, o_src) = axes
+        if rows and b_dst and m_dst and o_dst:
+            aligned[np.ix_(range(len(rows)), b_dst, m_dst, o_dst)] = self.prices[np.ix_(rows, b_src, m_src, o_src)]
+        return aligned
+    
+    def align_lines(self, game_keys, markets):
+        """
+        Reindexa as linhas sobre outros eixos (jogos, mercados).
+        
+        Args:
+            game_keys (list): Jogos (todos presentes nesta matriz)
+            markets (list): Colunas de mercados
+            
+        Returns:
+            np.ndarray: Array (jogos, mercados) de linhas (NaN sem linha)
+        """
+        aligned = np.full((len(game_keys), len(markets)), np.nan)
+        rows = [self._game_index[key] for key in game_keys]
+        pairs = [(dst, self._market_index[name]) for dst, name in enumerate(markets) if name in self._market_index]
+        if rows and pairs:
+            aligned[np.ix_(range(len(rows)), [dst for dst, _ in pairs])] = self.lines[np.ix_(rows, [src for _, src in pairs])]
+        return aligned
+    
+    def outcome_name(self, g, outcome, market):
+        """
+        Traduz um papel de resultado para o nome exibido.
+        
+        Args:
+            g (int): Índice do jogo
+            outcome (str): Papel (home, draw, away, over, under)
+            market (str): Rótulo do mercado
+            
+        Returns:
+            str: Nome do resultado (time, Draw, Over 2.5, ...)
+        """
+        game = self.games[g]
+        line = market_line(market)
+        if outcome == "draw":
+            return "Draw"
+        if outcome in ("over", "under"):
+            name = "Over" if outcome == "over" else "Under"
+            return name if line is None else f"{name} {format_line(line)}"
+        if outcome in ("home", "away"):
+            team = game['home_team'] if outcome == "home" else game['away_team']
+            if line is None:
+                return team
+            # Linhas de handicap são guardadas do ponto de vista do mandante
+            point = line if outcome == "home" else -line
+            return f"{team} {point:+g}"
+        return outcome
+    
+    def iter_game_odds(self, game_key):
+        """
+        Percorre as odds disponíveis de um jogo.
+        
+        Args:
+            game_key (str): Chave "casa x fora"
+            
+        Yields:
+            tuple: (casa, rótulo do mercado, nome do resultado, odd)
+        """
+        g = self._game_index[game_key]
+        block = self.prices[g]
+        for b, m, o in zip(*np.nonzero(~np.isnan(block))):
+            market = self.market_label(g, m)
+            yield (
+                self.bookmakers[b],
+                market,
+                self.outcome_name(g, self.outcomes[o], market),
+                float(block[b, m, o])
+            )
+
+def _view(buffer):
+    """Visão NumPy (sem cópia) de um array tipado da stdlib."""
+    return np.frombuffer(buffer, dtype=np.dtype(buffer.typecode))
+
+def _label_line(market):
+    """Linha embutida no rótulo de uma coluna (NaN se não houver)."""
+    try:
+        line = market_line(market)
+    except ValueError:
+        return np.nan
+    return np.nan if line is None else line
+
+def _line_slots(g_idx, k_idx, lines, kinds, n_games):
+    """
+    Distribui as linhas de cada jogo pelas colunas do seu tipo de mercado.
+    
+    A i-ésima linha de um jogo (em ordem crescente, sem linha primeiro)
+    vai para a i-ésima coluna do tipo; cada tipo tem tantas colunas
+    quanto o jogo com mais linhas dele.
+    
+    Args:
+        g_idx (np.ndarray): Jogo de cada cotação
+        k_idx (np.ndarray): Tipo de mercado de cada cotação
+        lines (np.ndarray): Linha de cada cotação (NaN sem linha)
+        kinds (list): Tabela de tipos de mercado
+        n_games (int): Número de jogos
+        
+    Returns:
+        tuple: (nomes das colunas, coluna de cada cotação, array (jogos, colunas) de linhas)
+    """
+    if not len(g_idx):
+        return [], np.zeros(0, dtype=np.int64), np.full((n_games, 0), np.nan)
+        
+    # Linhas distintas por (jogo, tipo), já ordenadas; -inf põe "sem linha" primeiro
+    keys = np.column_stack([g_idx, k_idx, np.where(np.isnan(lines), -np.inf, lines)])
+    distinct, inverse = np.unique(keys, axis=0, return_inverse=True)
+    d_game, d_kind, d_line = distinct[:, 0].astype(np.int64), distinct[:, 1].astype(np.int64), distinct[:, 2]
+    
+    # Posição de cada linha dentro do seu (jogo, tipo)
+    positions = np.arange(len(distinct))
+    starts = np.r_[True, (distinct[1:, :2] != distinct[:-1, :2]).any(axis=1)]
+    rank = positions - np.maximum.accumulate(np.where(starts, positions, 0))
+    
+    widths = np.zeros(len(kinds), dtype=np.int64)
+    np.maximum.at(widths, d_kind, rank + 1)
+    has_line = np.zeros(len(kinds), dtype=bool)
+    has_line[d_kind[np.isfinite(d_line)]] = True
+    offsets = np.r_[0, np.cumsum(widths)[:-1]]
+    
+    markets = []
+    for k, kind in enumerate(kinds):
+        markets.extend([f"{kind} #{i + 1}" for i in range(widths[k])] if has_line[k] else [kind])
+        
+    columns = offsets[d_kind] + rank
+    slot_lines = np.full((n_games, len(markets)), np.nan)
+    slot_lines[d_game, columns] = np.where(np.isfinite(d_line), d_line, np.nan)
+    return markets, columns[inverse.reshape(-1)], slot_lines
+
+def _outcome_role(market_key, outcome_name, point, home_team, away_team):
+    """
+    Identifica o papel e a linha de um resultado.
+    
+    Returns:
+        tuple: (papel, linha) — linha é None para mercados sem linha
+    """
+    if market_key == "totals":
+        match = _TOTALS_NAME.match(outcome_name)
+        if match:
+            line = point if point is not None else (float(match.group(2)) if match.group(2) else None)
+            return match.group(1).lower(), line
+            
+    if outcome_name == home_team:
+        return "home", point
+    if outcome_name == away_team:
+        # Linha de handicap do ponto de vista do mandante
+        return "away", -point if point is not None else None
+    if outcome_name == "Draw":
+        return "draw", point
+        
+    name = outcome_name if point is None else f"{outcome_name} {format_line(point)}"
+    return name, None
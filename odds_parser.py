@@ -0,0 +1,208 @@
+"""
+Módulo de Leitura Incremental de Odds
+-------------------------------------
+Este módulo converte a resposta JSON de odds da API, à medida que
+os bytes chegam, em uma estrutura compacta por jogo (GameOdds),
+sem manter a árvore JSON completa em memória.
+"""
+
+import sys
+import json
+import codecs
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# Cotação compacta de um jogo: (casa, mercado, resultado, linha, odd)
+GameOdds = namedtuple(
+    "GameOdds",
+    ["id", "sport_key", "sport_title", "home_team", "away_team", "commence_time", "quotes"]
+)
+
+_intern = sys.intern
+_WHITESPACE = " \t\n\r"
+
+def compact_event(event):
+    """
+    Converte um jogo da API em GameOdds em uma única passada.
+    
+    Nomes de casas, mercados e resultados são internados, de modo que
+    as repetições entre jogos compartilham a mesma string.
+    
+    Args:
+        event (dict): Jogo com odds no formato da API
+        
+    Returns:
+        GameOdds: Jogo com as cotações em tuplas planas
+    """
+    quotes = []
+    append = quotes.append
+    
+    for bookmaker in event.get('bookmakers', ()):
+        bookie_name = _intern(bookmaker.get('key') or '')
+        for market in bookmaker.get('markets', ()):
+            market_key = _intern(market.get('key') or '')
+            for outcome in market.get('outcomes', ()):
+                append((
+                    bookie_name,
+                    market_key,
+                    _intern(outcome.get('name') or ''),
+                    outcome.get('point'),
+                    outcome.get('price')
+                ))
+                
+    return GameOdds(
+        event.get('id'),
+        event.get('sport_key'),
+        event.get('sport_title'),
+        event.get('home_team'),
+        event.get('away_team'),
+        event.get('commence_time'),
+        tuple(quotes)
+    )
+
+class OddsStreamParser:
+    """
+    Leitor incremental de uma lista JSON de jogos com odds.
+    
+    Cada jogo é decodificado assim que seus bytes chegam e convertido
+    imediatamente em GameOdds; o JSON bruto do jogo é descartado.
+    """
+    
+    def __init__(self):
+        """Inicializa o leitor."""
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._started = False
+        self._finished = False
+        self.games = []
+    
+    def feed(self, chunk):
+        """
+        Processa um novo trecho da resposta.
+        
+        Args:
+            chunk (bytes | str): Trecho da resposta
+            
+        Returns:
+            int: Número de jogos lidos até agora
+        """
+        text = self._utf8.decode(chunk) if isinstance(chunk, (bytes, bytearray)) else chunk
+        self._buffer += text
+        self._drain()
+        return len(self.games)
+    
+    def _drain(self):
+        """Decodifica todos os jogos completos presentes no buffer."""
+        buffer = self._buffer
+        size = len(buffer)
+        pos = 0
+        
+        while not self._finished:
+            while pos < size and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= size:
+                break
+                
+            char = buffer[pos]
+            if not self._started:
+                if char != '[':
+                    raise ValueError("Resposta de odds não é uma lista JSON")
+                self._started = True
+                pos += 1
+            elif char == ',':
+                pos += 1
+            elif char == ']':
+                self._finished = True
+                pos += 1
+            else:
+                try:
+                    event, pos = self._decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # Jogo ainda incompleto: aguardar o próximo trecho
+                    break
+                self.games.append(compact_event(event))
+                
+        self._buffer = buffer[pos:]
+    
+    def close(self):
+        """
+        Finaliza a leitura.
+        
+        Returns:
+            list: Lista de GameOdds
+            
+        Raises:
+            ValueError: Se a resposta terminou antes do fim da lista
+        """
+        self._buffer += self._utf8.decode(b"", final=True)
+        self._drain()
+        if not self._finished or self._buffer.strip():
+            raise ValueError("Resposta de odds incompleta ou inválida")
+        return self.games
+
+def parse_odds_stream(source, chunk_size=65536):
+    """
+    Lê uma resposta de odds completa de forma incremental.
+    
+    Args:
+        source (bytes | str | file | iterable): Corpo da resposta, arquivo
+            aberto ou iterável de trechos
+        chunk_size (int): Tamanho dos trechos lidos de bytes/str/arquivos
+        
+    Returns:
+        list: Lista de GameOdds
+    """
+    parser = OddsStreamParser()
+    
+    if isinstance(source, (bytes, bytearray, str)):
+        for start in range(0, len(source), chunk_size):
+            parser.feed(source[start:start + chunk_size])
+    elif hasattr(source, 'read'):
+        for chunk in iter(lambda: source.read(chunk_size), source.read(0)):
+            parser.feed(chunk)
+    else:
+        for chunk in source:
+            parser.feed(chunk)
+            
+    return parser.close()
+
+def build_formatted_odds(games):
+    """
+    Monta o dicionário de odds por jogo ("casa x fora") a partir de GameOdds.
+    
+    Args:
+        games (iterable): Lista de GameOdds
+        
+    Returns:
+        dict: Dicionário com odds formatadas
+    """
+    formatted_odds = {}
+    
+    for game in games:
+        try:
+            bookmakers = {}
+            formatted_odds[f"{game.home_team} x {game.away_team}"] = {
+                'id': game.id,
+                'commence_time': game.commence_time,
+                'bookmakers': bookmakers
+            }
+            
+            # As cotações chegam agrupadas por casa e mercado
+            last_bookie = last_market = None
+            outcomes = None
+            for bookie_name, market_key, outcome_name, _, price in game.quotes:
+                if bookie_name != last_bookie:
+                    markets = bookmakers[bookie_name] = {}
+                    last_bookie, last_market = bookie_name, None
+                if market_key != last_market:
+                    outcomes = markets[market_key] = {}
+                    last_market = market_key
+                outcomes[outcome_name] = price
+        except Exception as e:
+            logger.error(f"Erro ao formatar odds do jogo {game.id or 'unknown'}: {e}")
+            continue
+            
+    return formatted_odds
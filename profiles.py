@@ -0,0 +1,197 @@
+"""
+Módulo de Perfis
+----------------
+Este módulo guarda as preferências de cada usuário (ligas, mercados,
+casas, odd mínima, valor mínimo e número de dicas) em um banco SQLite e
+monta, uma vez por snapshot, índices invertidos sobre as apostas com
+valor já calculadas.
+
+O /apostas de um usuário com filtros não roda a análise de novo: ele
+percorre, em ordem de ranking, só a lista do filtro mais seletivo e
+para ao juntar as dicas pedidas (ou ao passar do valor mínimo).
+"""
+
+import os
+import json
+import time
+import heapq
+import sqlite3
+import logging
+from contextlib import closing
+
+from analyzer import BettingAnalyzer
+from config import PROFILES_DB_PATH, MAX_SUGGESTIONS, MAX_SUGGESTIONS_LIMIT
+
+logger = logging.getLogger(__name__)
+
+# Perfil de quem nunca mudou nada: as mesmas sugestões para todos
+DEFAULT_PROFILE = {
+    'leagues': [],
+    'markets': [],
+    'bookmakers': [],
+    'min_odds': 1.0,
+    'min_value': 0.0,
+    'tips': MAX_SUGGESTIONS
+}
+
+def has_filters(profile):
+    """Indica se o perfil filtra as sugestões (além do número de dicas)."""
+    return any(profile[field] != DEFAULT_PROFILE[field] for field in DEFAULT_PROFILE if field != 'tips')
+
+class ProfileStore:
+    """Perfis dos usuários (SQLite, compartilhado entre os workers)."""
+    
+    def __init__(self, db_path=PROFILES_DB_PATH, clock=time.time):
+        """
+        Abre (ou cria) o banco de perfis.
+        
+        Args:
+            db_path (str): Arquivo do banco SQLite
+            clock (callable): Relógio em segundos desde a época (substituível em testes)
+        """
+        self.db_path = db_path
+        self.clock = clock
+        
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS profiles ("
+                         "user_id INTEGER PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)")
+    
+    def _connect(self):
+        """Abre uma conexão em modo autocommit (uma por operação)."""
+        return sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+    
+    def get(self, user_id):
+        """
+        Retorna o perfil de um usuário (o padrão se ele não tem um).
+        
+        Args:
+            user_id (int): ID do usuário
+            
+        Returns:
+            dict: Perfil com todos os campos de DEFAULT_PROFILE
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT data FROM profiles WHERE user_id = ?", (user_id,)).fetchone()
+        profile = dict(DEFAULT_PROFILE)
+        if row is not None:
+            profile.update((field, value) for field, value in json.loads(row[0]).items() if field in profile)
+        return profile
+    
+    def update(self, user_id, **fields):
+        """
+        Altera campos do perfil de um usuário.
+        
+        Args:
+            user_id (int): ID do usuário
+            **fields: Campos de DEFAULT_PROFILE (None volta ao padrão)
+            
+        Returns:
+            dict: Perfil atualizado
+            
+        Raises:
+            ValueError: Se um campo não existe
+        """
+        unknown = set(fields) - set(DEFAULT_PROFILE)
+        if unknown:
+            raise ValueError(f"Campos de perfil desconhecidos: {', '.join(sorted(unknown))}")
+            
+        profile = self.get(user_id)
+        for field, value in fields.items():
+            if value is None:
+                value = DEFAULT_PROFILE[field]
+            elif isinstance(DEFAULT_PROFILE[field], list):
+                value = sorted(set(value))
+            elif field == 'tips':
+                value = min(max(int(value), 1), MAX_SUGGESTIONS_LIMIT)
+            profile[field] = value
+            
+        with closing(self._connect()) as conn:
+            conn.execute("INSERT OR REPLACE INTO profiles (user_id, data, updated_at) VALUES (?, ?, ?)",
+                         (user_id, json.dumps(profile), self.clock()))
+        return profile
+    
+    def reset(self, user_id):
+        """Apaga o perfil de um usuário (volta ao padrão)."""
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM profiles WHERE user_id = ?", (user_id,))
+
+class SuggestionIndex:
+    """Apostas com valor de um snapshot, em ordem de ranking, com índices por liga, mercado e casa."""
+    
+    def __init__(self, snapshot):
+        """
+        Monta o índice.
+        
+        Args:
+            snapshot (DataSnapshot): Snapshot com as apostas com valor
+        """
+        total = sum(len(bets) for bets in snapshot.value_bets.values())
+        # Mesma ordem do /apostas padrão (suggestion_rank)
+        self.suggestions = BettingAnalyzer(snapshot.games, snapshot.odds).generate_suggestions(
+            total, value_bets=snapshot.value_bets
+        )
+        self.leagues = []
+        # Listas invertidas: posições (já em ordem de ranking) por liga, mercado e casa
+        self._postings = {'leagues': {}, 'markets': {}, 'bookmakers': {}}
+        by_league, by_market, by_bookmaker = (self._postings[field] for field in ('leagues', 'markets', 'bookmakers'))
+        
+        league_of = {}
+        for position, suggestion in enumerate(self.suggestions):
+            game = suggestion['game']
+            league = league_of.get(game)
+            if league is None:
+                info = snapshot.odds.game_info(game)
+                league = league_of[game] = info.get('sport_key') or info.get('league')
+            self.leagues.append(league)
+            by_league.setdefault(league, []).append(position)
+            by_market.setdefault(suggestion['market'], []).append(position)
+            by_bookmaker.setdefault(suggestion['bookmaker'], []).append(position)
+    
+    def __len__(self):
+        return len(self.suggestions)
+    
+    def query(self, profile, limit=None):
+        """
+        Seleciona as melhores sugestões que passam pelos filtros de um perfil.
+        
+        A busca percorre, em ordem de ranking, as posições do filtro
+        com menos apostas (ou todas, se não há filtro de liga, mercado
+        ou casa), confere os demais filtros em O(1) e para ao juntar
+        limit sugestões ou ao chegar a um valor abaixo do mínimo.
+        
+        Args:
+            profile (dict): Perfil (campos de DEFAULT_PROFILE)
+            limit (int): Número de sugestões (padrão: profile['tips'])
+            
+        Returns:
+            list: Sugestões, da melhor para a pior
+        """
+        limit = profile['tips'] if limit is None else limit
+        filters = {field: set(profile[field]) for field in self._postings if profile[field]}
+        
+        candidates = range(len(self.suggestions))
+        if filters:
+            sizes = {field: sum(len(self._postings[field].get(key, ())) for key in keys)
+                     for field, keys in filters.items()}
+            driver = min(sizes, key=sizes.get)
+            lists = [self._postings[driver][key] for key in filters[driver] if key in self._postings[driver]]
+            candidates = lists[0] if len(lists) == 1 else heapq.merge(*lists)
+            
+        leagues = filters.get('leagues')
+        markets = filters.get('markets')
+        bookmakers = filters.get('bookmakers')
+        min_value, min_odds = profile['min_value'], profile['min_odds']
+        
+        results = []
+        for position in candidates:
+            suggestion = self.suggestions[position]
+            if suggestion['value'] < min_value or len(results) >= limit:
+                break
+            if (suggestion['odds'] >= min_odds
+                    and (leagues is None or self.leagues[position] in leagues)
+                    and (markets is None or suggestion['market'] in markets)
+                    and (bookmakers is None or suggestion['bookmaker'] in bookmakers)):
+                results.append(suggestion)
+        return results
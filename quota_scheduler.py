@@ -0,0 +1,226 @@
+"""
+Módulo de Agendamento por Cota da API
+-------------------------------------
+Este módulo acompanha a cota da TheOddsAPI (cabeçalhos
+x-requests-remaining / x-requests-used) e distribui as requisições
+de odds restantes ao longo do período, priorizando ligas com jogos
+prestes a começar.
+"""
+
+import time
+import logging
+from datetime import datetime, timezone
+
+from config import QUOTA_RESERVE, QUOTA_MIN_INTERVAL, QUOTA_MAX_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Peso da liga conforme a proximidade do próximo jogo (horas, peso)
+KICKOFF_WEIGHTS = [
+    (2, 8.0),
+    (6, 4.0),
+    (24, 2.0)
+]
+
+class QuotaScheduler:
+    """Distribui a cota de requisições de odds entre as ligas."""
+    
+    def __init__(self, reserve=QUOTA_RESERVE, min_interval=QUOTA_MIN_INTERVAL,
+                 max_interval=QUOTA_MAX_INTERVAL, clock=time.time):
+        """
+        Inicializa o agendador.
+        
+        Args:
+            reserve (int): Créditos mantidos em reserva (não gastos automaticamente)
+            min_interval (float): Intervalo mínimo entre atualizações de uma liga (segundos)
+            max_interval (float): Intervalo máximo entre atualizações de uma liga (segundos)
+            clock (callable): Relógio em segundos desde a época (substituível em testes)
+        """
+        self.reserve = reserve
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.clock = clock
+        self.remaining = None
+        self.used = None
+        self.last_cost = 1
+        self._last_fetch = {}
+        self._kickoffs = {}
+    
+    def update_from_headers(self, headers):
+        """
+        Atualiza a cota a partir dos cabeçalhos de uma resposta da API.
+        
+        Args:
+            headers (Mapping): Cabeçalhos da resposta
+        """
+        remaining = headers.get("x-requests-remaining")
+        used = headers.get("x-requests-used")
+        last = headers.get("x-requests-last")
+        
+        try:
+            if remaining is not None:
+                self.remaining = int(float(remaining))
+            if used is not None:
+                self.used = int(float(used))
+            if last is not None and int(float(last)) > 0:
+                self.last_cost = int(float(last))
+        except ValueError:
+            logger.warning(f"Cabeçalhos de cota inválidos: {remaining}/{used}/{last}")
+    
+    def observe_games(self, sport, games):
+        """
+        Registra o próximo início de jogo de uma liga.
+        
+        Args:
+            sport (str): Chave do esporte
+            games (list): Jogos da liga (com commence_time ISO)
+        """
+        now = self.clock()
+        upcoming = []
+        for game in games:
+            try:
+                kickoff = datetime.fromisoformat(game['commence_time'].replace('Z', '+00:00')).timestamp()
+            except (KeyError, ValueError, AttributeError):
+                continue
+            if kickoff >= now:
+                upcoming.append(kickoff)
+        self._kickoffs[sport] = min(upcoming) if upcoming else None
+    
+    def seconds_until_reset(self, now=None):
+        """
+        Calcula os segundos até a renovação mensal da cota (dia 1, UTC).
+        
+        Args:
+            now (float): Instante atual (segundos desde a época)
+            
+        Returns:
+            float: Segundos até a renovação
+        """
+        now = self.clock() if now is None else now
+        current = datetime.fromtimestamp(now, tz=timezone.utc)
+        if current.month == 12:
+            reset = datetime(current.year + 1, 1, 1, tzinfo=timezone.utc)
+        else:
+            reset = datetime(current.year, current.month + 1, 1, tzinfo=timezone.utc)
+        return max(reset.timestamp() - now, 1.0)
+    
+    def daily_budget(self, now=None):
+        """
+        Calcula quantas requisições de odds podem ser feitas por dia.
+        
+        Args:
+            now (float): Instante atual (segundos desde a época)
+            
+        Returns:
+            float: Requisições por dia (None se a cota ainda é desconhecida)
+        """
+        if self.remaining is None:
+            return None
+        spendable = max(self.remaining - self.reserve, 0)
+        days_left = self.seconds_until_reset(now) / 86400.0
+        return spendable / self.last_cost / max(days_left, 1.0)
+    
+    def weight(self, sport, now=None):
+        """
+        Calcula o peso de uma liga conforme a proximidade do próximo jogo.
+        
+        Args:
+            sport (str): Chave do esporte
+            now (float): Instante atual (segundos desde a época)
+            
+        Returns:
+            float: Peso da liga
+        """
+        now = self.clock() if now is None else now
+        kickoff = self._kickoffs.get(sport)
+        if kickoff is None:
+            return 1.0
+            
+        hours = (kickoff - now) / 3600.0
+        for limit, weight in KICKOFF_WEIGHTS:
+            if hours <= limit:
+                return weight
+        return 1.0
+    
+    def refresh_interval(self, sport, sports=None, now=None):
+        """
+        Calcula o intervalo entre atualizações de odds de uma liga.
+        
+        O orçamento diário é dividido entre as ligas proporcionalmente
+        ao peso; com a cota no fim, o intervalo cresce até o máximo
+        em vez de as requisições falharem.
+        
+        Args:
+            sport (str): Chave do esporte
+            sports (list): Ligas que dividem o orçamento (padrão: ligas conhecidas)
+            now (float): Instante atual (segundos desde a época)
+            
+        Returns:
+            float: Intervalo em segundos
+        """
+        now = self.clock() if now is None else now
+        budget = self.daily_budget(now)
+        if budget is None:
+            return self.min_interval
+        if budget <= 0:
+            return self.max_interval
+            
+        sports = list(sports) if sports else list(set(self._kickoffs) | set(self._last_fetch) | {sport})
+        total_weight = sum(self.weight(s, now) for s in sports) or 1.0
+        share = budget * self.weight(sport, now) / total_weight
+        
+        interval = 86400.0 / share if share > 0 else self.max_interval
+        return min(max(interval, self.min_interval), self.max_interval)
+    
+    def is_due(self, sport, sports=None, now=None):
+        """
+        Indica se as odds de uma liga podem ser buscadas agora.
+        
+        Args:
+            sport (str): Chave do esporte
+            sports (list): Ligas que dividem o orçamento
+            now (float): Instante atual (segundos desde a época)
+            
+        Returns:
+            bool: True se a liga está liberada para atualização
+        """
+        now = self.clock() if now is None else now
+        last = self._last_fetch.get(sport)
+        if last is None:
+            return self.remaining is None or self.remaining > 0
+        return now - last >= self.refresh_interval(sport, sports, now)
+    
+    def record_fetch(self, sport, now=None):
+        """
+        Registra que as odds de uma liga foram buscadas.
+        
+        Args:
+            sport (str): Chave do esporte
+            now (float): Instante atual (segundos desde a época)
+        """
+        self._last_fetch[sport] = self.clock() if now is None else now
+    
+    def prioritize(self, sports):
+        """
+        Ordena ligas pela proximidade do próximo jogo.
+        
+        Args:
+            sports (list): Chaves de esportes
+            
+        Returns:
+            list: Ligas ordenadas (jogos mais próximos primeiro)
+        """
+        return sorted(sports, key=lambda s: self._kickoffs.get(s) or float('inf'))
+    
+    def status(self):
+        """
+        Retorna o estado da cota.
+        
+        Returns:
+            dict: Créditos restantes, usados e orçamento diário
+        """
+        return {
+            "remaining": self.remaining,
+            "used": self.used,
+            "daily_budget": self.daily_budget()
+        }
@@ -0,0 +1,388 @@
+"""
+Módulo de Atualização em Segundo Plano
+--------------------------------------
+Este módulo atualiza os dados de cada liga dentro do loop de eventos
+do bot, com intervalo adaptativo: ligas com jogos perto de começar
+(ou em andamento) são atualizadas com mais frequência que ligas com
+jogos distantes. Pedidos de atualização simultâneos são unidos em uma
+única busca, e os comandos do bot nunca esperam por uma busca: eles
+leem o snapshot atual e, no máximo, pedem uma atualização.
+
+Também executa as tarefas diárias (ex: envio das sugestões no
+horário DAILY_NOTIFICATION_TIME).
+
+Com vários workers, só o líder eleito no backend de estado busca os
+dados, publica snapshots e executa as tarefas diárias; os seguidores
+carregam a versão publicada pelo líder a cada verificação.
+"""
+
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from analyzer import kickoff_timestamp
+from odds_matrix import OddsMatrix
+from state_backend import LocalStateBackend
+from config import SPORTS, REFRESH_MIN_INTERVAL, REFRESH_MAX_INTERVAL, REFRESH_TICK
+
+logger = logging.getLogger(__name__)
+
+# Jogos iniciados há mais tempo que isso já não aceleram a atualização
+LIVE_WINDOW = 3 * 3600
+
+class LeagueState:
+    """Últimos dados e horários de atualização de uma liga."""
+    
+    __slots__ = ("games", "odds", "refreshed_at", "next_due", "failures")
+    
+    def __init__(self):
+        self.games = []
+        self.odds = []
+        self.refreshed_at = None
+        self.next_due = 0.0
+        self.failures = 0
+
+class RefreshScheduler:
+    """Atualiza as ligas em segundo plano e publica snapshots."""
+    
+    def __init__(self, collector, store, sports=SPORTS, min_interval=REFRESH_MIN_INTERVAL,
+                 max_interval=REFRESH_MAX_INTERVAL, tick=REFRESH_TICK, clock=time.time, backend=None):
+        """
+        Inicializa o agendador.
+        
+        Args:
+            collector (AsyncDataCollector): Coletor de dados
+            store (SnapshotStore): Repositório onde os snapshots são publicados
+            sports (list): Ligas acompanhadas ("all" = catálogo completo)
+            min_interval (float): Intervalo (s) para ligas com jogos começando ou em andamento
+            max_interval (float): Intervalo (s) para ligas sem jogos próximos
+            tick (float): Intervalo (s) entre verificações de ligas vencidas
+            clock (callable): Relógio em segundos desde a época (substituível em testes)
+            backend (LocalStateBackend | SQLiteStateBackend): Eleição do líder e
+                snapshot compartilhado (padrão: processo único, sem gravar em disco)
+        """
+        self.collector = collector
+        self.store = store
+        self.sports = sports
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.tick = tick
+        self.clock = clock
+        self.backend = backend or LocalStateBackend(snapshot_path=None)
+        self.leader = None
+        self.leagues = {}
+        self._inflight = None
+        self._daily = []
+        self._jobs = set()
+        self._task = None
+        self.fetches = 0
+    
+    async def resolve_leagues(self):
+        """Resolve a lista de ligas acompanhadas (uma única vez)."""
+        if not self.leagues:
+            for league in await self.collector.resolve_sports(self.sports):
+                self.leagues.setdefault(league, LeagueState())
+        return list(self.leagues)
+    
+    def interval_for(self, league):
+        """
+        Calcula o intervalo de atualização de uma liga.
+        
+        O intervalo dobra a cada duas horas até o próximo jogo: jogos em
+        andamento ou começando usam min_interval; ligas sem jogos
+        próximos, max_interval. Nunca fica abaixo do intervalo que a
+        cota da API permite (QuotaScheduler do coletor), para não
+        disparar buscas que só devolveriam o cache.
+        
+        Args:
+            league (str): Chave da liga
+            
+        Returns:
+            float: Intervalo em segundos
+        """
+        state = self.leagues.get(league)
+        now = self.clock()
+        upcoming = [
+            kickoff - now for kickoff in (kickoff_timestamp(game.get('commence_time')) for game in state.games)
+            if kickoff - now > -LIVE_WINDOW
+        ] if state is not None else []
+        
+        if upcoming:
+            hours = max(min(upcoming), 0.0) / 3600
+            interval = min(self.max_interval, self.min_interval * 2 ** (hours / 2))
+        else:
+            interval = self.max_interval
+        return max(interval, self.collector.scheduler.refresh_interval(league, list(self.leagues), now))
+    
+    def due_leagues(self):
+        """Retorna as ligas cuja atualização venceu."""
+        now = self.clock()
+        return [league for league, state in self.leagues.items() if state.next_due <= now]
+    
+    def data_age(self, league=None):
+        """
+        Idade dos dados, em segundos.
+        
+        Args:
+            league (str): Liga (padrão: a liga com os dados mais antigos)
+            
+        Returns:
+            float: Segundos desde a última atualização (None se nunca atualizada)
+        """
+        states = [self.leagues[league]] if league else list(self.leagues.values())
+        if not states or any(state.refreshed_at is None for state in states):
+            return None
+        return self.clock() - min(state.refreshed_at for state in states)
+    
+    def status(self):
+        """
+        Situação de cada liga.
+        
+        Returns:
+            list: Dicts com league, games, age, interval e next_in (segundos)
+        """
+        now = self.clock()
+        return [{
+            'league': league,
+            'games': len(state.games),
+            'age': None if state.refreshed_at is None else now - state.refreshed_at,
+            'interval': self.interval_for(league),
+            'next_in': max(state.next_due - now, 0.0)
+        } for league, state in self.leagues.items()]
+    
+    async def elect(self):
+        """
+        Obtém ou renova a liderança no backend de estado.
+        
+        Ao assumir a liderança, carrega antes a última versão publicada
+        (para continuar a numeração) e marca todas as ligas como
+        vencidas: os dados brutos das ligas estavam só no líder anterior.
+        
+        Returns:
+            bool: True se este processo é o líder
+        """
+        try:
+            leader = await asyncio.to_thread(self.backend.acquire_leadership)
+        except Exception as e:
+            logger.error(f"Erro na eleição do líder: {e}")
+            leader = False
+            
+        if leader and not self.leader:
+            logger.info(f"Este processo atualiza os dados (líder, backend {self.backend.name}).")
+            if self.leader is False:
+                await self.sync()
+                for state in self.leagues.values():
+                    state.next_due = 0.0
+        elif not leader and self.leader is not False:
+            logger.info("Outro processo atualiza os dados; este lê os snapshots publicados (seguidor).")
+        self.leader = leader
+        return leader
+    
+    async def sync(self):
+        """
+        Carrega o snapshot publicado pelo líder, se for outra versão.
+        
+        Returns:
+            DataSnapshot: Snapshot atual
+        """
+        current = self.store.current
+        try:
+            published = await asyncio.to_thread(self.backend.load_newer, current.version if current else None)
+        except Exception as e:
+            logger.error(f"Erro ao carregar o snapshot publicado: {e}")
+            published = None
+        if published is None:
+            return current
+            
+        snapshot, leagues = published
+        self.store.restore(snapshot)
+        for league, (refreshed_at, next_due) in leagues.items():
+            state = self.leagues.setdefault(league, LeagueState())
+            state.refreshed_at = refreshed_at
+            state.next_due = next_due
+        logger.info(f"Snapshot v{snapshot.version} do líder carregado.")
+        return snapshot
+    
+    async def refresh(self, leagues=None):
+        """
+        Atualiza ligas e publica um novo snapshot.
+        
+        Se uma atualização já está em andamento, quem pede só ligas que
+        ela cobre espera por ela e recebe o mesmo resultado; os demais
+        esperam ela terminar e disparam uma nova. Em um seguidor, só
+        carrega a versão publicada pelo líder.
+        
+        Args:
+            leagues (list): Ligas a atualizar (padrão: todas)
+            
+        Returns:
+            DataSnapshot: Snapshot publicado (None se nada foi publicado)
+        """
+        if self.leader is None:
+            await self.elect()
+        if not self.leader:
+            return await self.sync()
+            
+        requested = set(leagues) if leagues else set(await self.resolve_leagues())
+        
+        while self._inflight is not None and not self._inflight[1].done():
+            covered, task = self._inflight
+            if requested <= covered:
+                return await asyncio.shield(task)
+            await asyncio.wait([task])
+            
+        task = asyncio.ensure_future(self._refresh(sorted(requested)))
+        self._inflight = (requested, task)
+        return await asyncio.shield(task)
+    
+    def request_refresh(self, leagues=None):
+        """
+        Pede uma atualização sem esperar por ela (para os comandos do bot).
+        
+        Args:
+            leagues (list): Ligas a atualizar (padrão: todas)
+            
+        Returns:
+            asyncio.Task: Tarefa da atualização
+        """
+        task = asyncio.ensure_future(self.refresh(leagues))
+        self._jobs.add(task)
+        task.add_done_callback(self._jobs.discard)
+        return task
+    
+    async def _refresh(self, leagues):
+        """Busca as ligas, junta com os dados das demais e publica o snapshot."""
+        self.fetches += 1
+        try:
+            collected = await self.collector.get_games_and_odds_by_sport(leagues)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar ligas {', '.join(leagues)}: {e}")
+            collected = {}
+            
+        now = self.clock()
+        refreshed = 0
+        for league in leagues:
+            state = self.leagues.setdefault(league, LeagueState())
+            games, odds = collected.get(league, ([], []))
+            if games or odds:
+                state.games, state.odds = games, odds
+                state.refreshed_at = now
+                state.failures = 0
+                state.next_due = now + self.interval_for(league)
+                refreshed += 1
+            else:
+                # Erro ou resposta vazia: mantém os últimos dados da liga e tenta
+                # de novo logo, com espera crescente a cada falha
+                state.failures += 1
+                state.next_due = now + min(self.max_interval, self.min_interval * 2 ** (state.failures - 1))
+                
+        if not refreshed:
+            logger.warning("Não foi possível atualizar os dados: nenhuma liga respondeu.")
+            return None
+            
+        games, odds = self.collector.merge_results(
+            (state.games, state.odds) for state in self.leagues.values() if state.refreshed_at is not None
+        )
+        if not games or not odds:
+            logger.warning("Não foi possível atualizar os dados: dados vazios.")
+            return None
+            
+        # Análise fora do loop de eventos, para os comandos continuarem respondendo
+        try:
+            snapshot = await asyncio.to_thread(
+                self.store.publish, self.collector.format_games_data(games), OddsMatrix.from_games(odds)
+            )
+        except Exception as e:
+            logger.error(f"Erro ao publicar snapshot: {e}")
+            return None
+            
+        logger.info(f"Dados atualizados ({', '.join(leagues)}): {len(games)} jogos e {len(odds)} jogos com odds "
+                    f"(mudanças: {snapshot.changes.summary()}).")
+                    
+        # Disponibilizar a versão para os demais workers (e para o próximo reinício)
+        league_times = {
+            league: [state.refreshed_at, state.next_due]
+            for league, state in self.leagues.items() if state.refreshed_at is not None
+        }
+        try:
+            if not await asyncio.to_thread(self.backend.publish, snapshot, league_times):
+                self.leader = False
+        except Exception as e:
+            logger.error(f"Erro ao gravar o snapshot v{snapshot.version}: {e}")
+        return snapshot
+    
+    def schedule_daily(self, at, callback):
+        """
+        Agenda uma tarefa diária.
+        
+        Args:
+            at (str): Horário local no formato HH:MM
+            callback (callable): Corrotina executada todos os dias no horário
+        """
+        hour, minute = (int(part) for part in at.split(":"))
+        self._daily.append([hour, minute, callback, self._next_daily_run(hour, minute)])
+    
+    def _next_daily_run(self, hour, minute):
+        """Próxima ocorrência (timestamp) de um horário local."""
+        now = datetime.fromtimestamp(self.clock())
+        run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if run <= now:
+            run += timedelta(days=1)
+        return run.timestamp()
+    
+    async def run_once(self):
+        """
+        Renova a liderança; no líder, atualiza as ligas vencidas e dispara
+        as tarefas diárias vencidas; no seguidor, carrega a versão publicada.
+        """
+        await self.resolve_leagues()
+        leader = await self.elect()
+        
+        now = self.clock()
+        for job in self._daily:
+            hour, minute, callback, next_run = job
+            if next_run <= now:
+                job[3] = self._next_daily_run(hour, minute)
+                # No seguidor a tarefa só avança (o líder a executa)
+                if leader:
+                    task = asyncio.ensure_future(callback())
+                    self._jobs.add(task)
+                    task.add_done_callback(self._jobs.discard)
+                    
+        if not leader:
+            await self.sync()
+            return
+                
+        due = self.due_leagues()
+        if due:
+            await self.refresh(due)
+    
+    async def run(self):
+        """Loop do agendador (roda até ser cancelado)."""
+        logger.info("Agendador de atualizações iniciado.")
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Erro no agendador de atualizações: {e}")
+            await asyncio.sleep(self.tick)
+    
+    def start(self):
+        """Inicia o agendador no loop de eventos atual."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+    
+    async def stop(self):
+        """Para o agendador e libera a liderança."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.leader:
+            await asyncio.to_thread(self.backend.release_leadership)
+            self.leader = None
@@ -0,0 +1,185 @@
+"""
+Módulo de Cache de Mensagens
+----------------------------
+Este módulo guarda as mensagens do bot já formatadas (card de odds de
+cada jogo, páginas do /odds e do /jogos, sugestões) em um cache LRU com
+chave (versão do snapshot, visão, idioma). Cada mensagem é montada uma
+vez por versão dos dados; as visualizações seguintes custam uma
+consulta ao dicionário.
+"""
+
+import threading
+from datetime import datetime
+from collections import OrderedDict
+
+from telegram.helpers import escape_markdown
+
+from odds_matrix import market_base
+from config import RENDER_CACHE_SIZE
+
+# Idioma das mensagens (o bot só fala português por enquanto)
+DEFAULT_LOCALE = "pt_BR"
+
+class RenderCache:
+    """Cache LRU de mensagens formatadas, por versão do snapshot."""
+    
+    def __init__(self, max_entries=RENDER_CACHE_SIZE):
+        """
+        Inicializa o cache.
+        
+        Args:
+            max_entries (int): Número máximo de mensagens mantidas
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Acessado pelo loop do bot e pela thread que publica os snapshots
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, version, view, build, locale=DEFAULT_LOCALE):
+        """
+        Retorna uma mensagem do cache, montando-a se necessário.
+        
+        Args:
+            version (int): Versão do snapshot
+            view (tuple): Visão (ex: ("odds", jogo), ("games_page", liga, página))
+            build (callable): Função sem argumentos que monta a mensagem
+            locale (str): Idioma da mensagem
+            
+        Returns:
+            str: Mensagem formatada
+        """
+        key = (version, view, locale)
+        with self._lock:
+            message = self._entries.get(key)
+            if message is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return message
+            self.misses += 1
+            
+        # Montar fora do lock: duas montagens simultâneas dão o mesmo texto
+        message = build()
+        self.put(version, view, message, locale)
+        return message
+    
+    def put(self, version, view, message, locale=DEFAULT_LOCALE):
+        """Armazena uma mensagem já formatada."""
+        if message is None:
+            return
+        with self._lock:
+            self._store((version, view, locale), message)
+    
+    def carry_over(self, old_version, new_version, views, locale=DEFAULT_LOCALE):
+        """
+        Reaproveita na nova versão as mensagens de visões que não mudaram.
+        
+        Args:
+            old_version (int): Versão anterior
+            new_version (int): Nova versão
+            views (iterable): Visões iguais nas duas versões
+            
+        Returns:
+            int: Mensagens reaproveitadas
+        """
+        carried = 0
+        with self._lock:
+            for view in views:
+                message = self._entries.get((old_version, view, locale))
+                if message is not None:
+                    self._store((new_version, view, locale), message)
+                    carried += 1
+        return carried
+    
+    def _store(self, key, message):
+        """Grava uma entrada e remove as menos usadas (com o lock já obtido)."""
+        self._entries[key] = message
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self):
+        """Remove todas as mensagens do cache."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        """
+        Retorna os contadores do cache.
+        
+        Returns:
+            dict: Acertos, falhas, remoções e tamanho
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+def render_odds_card(odds_data, game):
+    """
+    Formata as odds de um jogo, agrupadas por casa e mercado.
+    
+    Args:
+        odds_data (OddsMatrix): Matriz de odds
+        game (str): Chave "casa x fora" do jogo
+        
+    Returns:
+        str: Mensagem formatada
+    """
+    bookmakers = {}
+    for bookie_name, market, outcome, price in odds_data.iter_game_odds(game):
+        markets = bookmakers.setdefault(bookie_name, {})
+        markets.setdefault(market_base(market), []).append((outcome, price))
+        
+    # Nomes fora do negrito: no Markdown do Telegram, a barra só escapa fora de entidades
+    lines = [f"📊 *Odds para* {escape_markdown(game)}", ""]
+    for bookie_name, markets in bookmakers.items():
+        lines.append(f"🏦 {escape_markdown(bookie_name.upper())}")
+        
+        # Resultado Final (h2h)
+        if 'h2h' in markets:
+            lines.append("🏆 *Resultado Final*")
+            lines.extend(f"• {'Empate' if outcome == 'Draw' else f'Vitória {escape_markdown(outcome)}'}: {price:.2f}"
+                         for outcome, price in markets['h2h'])
+            lines.append("")
+            
+        # Total de Gols (totals)
+        if 'totals' in markets:
+            lines.append("🎯 *Total de Gols*")
+            lines.extend(f"• {escape_markdown(outcome)}: {price:.2f}" for outcome, price in markets['totals'])
+            lines.append("")
+            
+    return "\n".join(lines) + "\n"
+
+def render_games_page(entries, page, pages, total):
+    """
+    Formata uma página do /jogos, com os jogos agrupados por liga.
+    
+    Args:
+        entries (list): Jogos da página (dicts com league, home_team, away_team e time)
+        page (int): Número da página (a partir de 0)
+        pages (int): Total de páginas
+        total (int): Total de jogos
+        
+    Returns:
+        str: Mensagem formatada
+    """
+    lines = [f"🗓️ *Jogos de Hoje - {datetime.now().strftime('%d/%m/%Y')}*"]
+    league = None
+    for entry in entries:
+        if entry['league'] != league:
+            league = entry['league']
+            lines.append(f"\n⚽ {escape_markdown(league)}")
+        lines.append(f"• {escape_markdown(entry['home_team'])} x {escape_markdown(entry['away_team'])} - "
+                     f"{entry.get('time', 'Horário não disponível')}")
+    return "\n".join(lines) + f"\n\n_Página {page + 1} de {pages} ({total} jogos)_"
@@ -0,0 +1,202 @@
+"""
+Módulo de Cache de Respostas da API
+-----------------------------------
+Este módulo implementa um cache LRU com TTL por endpoint para as
+respostas da API de odds, com suporte a revalidação condicional
+(ETag / If-Modified-Since).
+"""
+
+import time
+from collections import OrderedDict
+
+from config import CACHE_TTL_SPORTS, CACHE_TTL_EVENTS, CACHE_TTL_ODDS, CACHE_MAX_ENTRIES
+
+# TTL padrão (segundos) por tipo de endpoint
+DEFAULT_TTLS = {
+    "sports": CACHE_TTL_SPORTS,
+    "events": CACHE_TTL_EVENTS,
+    "odds": CACHE_TTL_ODDS
+}
+
+class CacheEntry:
+    """Resposta armazenada no cache."""
+    
+    __slots__ = ("payload", "expires_at", "etag", "last_modified")
+    
+    def __init__(self, payload, expires_at, etag=None, last_modified=None):
+        self.payload = payload
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+class ResponseCache:
+    """Cache LRU de respostas, com TTL configurável por endpoint."""
+    
+    def __init__(self, ttls=None, max_entries=CACHE_MAX_ENTRIES, clock=time.monotonic):
+        """
+        Inicializa o cache.
+        
+        Args:
+            ttls (dict): TTL em segundos por endpoint (sports, events, odds)
+            max_entries (int): Número máximo de respostas mantidas
+            clock (callable): Relógio monotônico (substituível em testes)
+        """
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def endpoint_of(path):
+        """
+        Identifica o tipo de endpoint a partir do caminho.
+        
+        Args:
+            path (str): Caminho da requisição (ex: /sports/soccer_epl/odds)
+            
+        Returns:
+            str: sports, events ou odds
+        """
+        return path.rstrip('/').rsplit('/', 1)[-1]
+    
+    @staticmethod
+    def make_key(path, params):
+        """
+        Monta a chave do cache a partir do endpoint e dos parâmetros.
+        
+        A chave da API não faz parte da chave do cache.
+        
+        Args:
+            path (str): Caminho da requisição
+            params (dict): Parâmetros da requisição
+            
+        Returns:
+            tuple: Chave do cache
+        """
+        return (path, tuple(sorted((k, str(v)) for k, v in params.items() if k != "apiKey")))
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, key):
+        """
+        Retorna a resposta em cache se ainda estiver válida.
+        
+        Args:
+            key (tuple): Chave do cache
+            
+        Returns:
+            object: Resposta armazenada ou None (ausente ou expirada)
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > self.clock():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.payload
+            
+        self.misses += 1
+        return None
+    
+    def get_stale(self, key):
+        """
+        Retorna a resposta em cache mesmo que expirada.
+        
+        Args:
+            key (tuple): Chave do cache
+            
+        Returns:
+            object: Resposta armazenada ou None
+        """
+        entry = self._entries.get(key)
+        return entry.payload if entry is not None else None
+    
+    def conditional_headers(self, key):
+        """
+        Monta os cabeçalhos de revalidação para uma entrada expirada.
+        
+        Args:
+            key (tuple): Chave do cache
+            
+        Returns:
+            dict: Cabeçalhos If-None-Match / If-Modified-Since
+        """
+        entry = self._entries.get(key)
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+    
+    def store(self, key, payload, headers=None):
+        """
+        Armazena uma resposta nova.
+        
+        Args:
+            key (tuple): Chave do cache
+            payload (object): Resposta decodificada
+            headers (Mapping): Cabeçalhos da resposta (ETag, Last-Modified)
+            
+        Returns:
+            object: A própria resposta
+        """
+        headers = headers or {}
+        ttl = self.ttls.get(self.endpoint_of(key[0]), CACHE_TTL_ODDS)
+        self._entries[key] = CacheEntry(
+            payload,
+            self.clock() + ttl,
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified")
+        )
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+            
+        return payload
+    
+    def revalidate(self, key):
+        """
+        Renova o TTL de uma entrada após resposta 304 (Not Modified).
+        
+        Args:
+            key (tuple): Chave do cache
+            
+        Returns:
+            object: Resposta armazenada (None se a entrada saiu do cache
+                durante a requisição; quem chamou busca de novo sem revalidar)
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        entry.expires_at = self.clock() + self.ttls.get(self.endpoint_of(key[0]), CACHE_TTL_ODDS)
+        self._entries.move_to_end(key)
+        self.revalidations += 1
+        return entry.payload
+    
+    def clear(self):
+        """Remove todas as entradas do cache."""
+        self._entries.clear()
+    
+    def stats(self):
+        """
+        Retorna os contadores do cache.
+        
+        Returns:
+            dict: Acertos, falhas, revalidações, remoções e tamanho
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "hit_rate": self.hits / total if total else 0.0
+        }
@@ -0,0 +1,63 @@
+"""
+Módulo de Chamadas Únicas (single-flight)
+-----------------------------------------
+Este módulo une chamadas assíncronas simultâneas com a mesma chave em
+uma única execução: a primeira chamada executa a corrotina e as que
+chegam enquanto ela está em andamento esperam pelo mesmo resultado (ou
+pela mesma exceção). Assim uma rajada de comandos ou de atualizações
+gera uma só requisição à API.
+"""
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Une chamadas simultâneas com a mesma chave em uma única execução."""
+    
+    def __init__(self):
+        """Inicializa o grupo de chamadas."""
+        self._calls = {}
+        self.executions = 0
+        self.shared = 0
+    
+    def in_flight(self, key):
+        """Indica se há uma chamada em andamento para a chave."""
+        return key in self._calls
+    
+    async def do(self, key, func, *args, **kwargs):
+        """
+        Executa func(*args, **kwargs) uma única vez por chave em andamento.
+        
+        Quem chega enquanto a chamada da chave está em andamento recebe o
+        resultado dela. Cancelar quem espera não cancela a chamada
+        compartilhada.
+        
+        Args:
+            key (hashable): Chave da chamada
+            func (callable): Função que retorna uma corrotina
+            
+        Returns:
+            object: Resultado da chamada
+            
+        Raises:
+            Exception: A mesma exceção da chamada compartilhada
+        """
+        future = self._calls.get(key)
+        if future is None:
+            self.executions += 1
+            future = asyncio.ensure_future(func(*args, **kwargs))
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(future)
+    
+    def _finish(self, key, future):
+        """Libera a chave ao fim da chamada."""
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Marcar a exceção como lida mesmo se todos que esperavam foram cancelados
+        if not future.cancelled() and future.exception() is not None:
+            logger.debug(f"Chamada {key!r} falhou: {future.exception()}")
@@ -0,0 +1,266 @@
+"""
+Módulo de Snapshot dos Dados
+----------------------------
+Este módulo guarda o resultado de cada atualização de dados (jogos,
+odds, sugestões, arbitragens e mensagens já formatadas) em um
+snapshot versionado.
+A análise é feita uma única vez por atualização, e só para os jogos
+cujas odds mudaram; os comandos do bot apenas leem o snapshot atual.
+"""
+
+import logging
+from datetime import datetime
+
+from analyzer import BettingAnalyzer
+from odds_delta import diff_odds
+from arbitrage import scan_arbitrage, format_arbitrage_message
+from profiles import SuggestionIndex
+from render_cache import RenderCache
+from catalog import GameCatalog
+from config import MAX_SUGGESTIONS, MAX_SUGGESTIONS_LIMIT
+
+logger = logging.getLogger(__name__)
+
+class DataSnapshot:
+    """Dados e resultados de análise de uma atualização (somente leitura)."""
+    
+    __slots__ = ("version", "created_at", "games", "odds", "value_bets", "changes",
+                 "suggestions", "suggestions_message",
+                 "arbitrage", "arbitrage_message", "stale", "_messages", "_suggestion_index",
+                 "_catalogs")
+    
+    def __init__(self, version, created_at, games, odds, value_bets, changes,
+                 suggestions, suggestions_message,
+                 arbitrage=(), arbitrage_message=None, stale=False):
+        self.version = version
+        self.created_at = created_at
+        self.games = games
+        self.odds = odds
+        self.value_bets = value_bets
+        self.changes = changes
+        self.suggestions = suggestions
+        self.suggestions_message = suggestions_message
+        self.arbitrage = arbitrage
+        self.arbitrage_message = arbitrage_message
+        # True para um snapshot carregado do disco, até a próxima atualização
+        self.stale = stale
+        self._messages = {}
+        self._suggestion_index = None
+        self._catalogs = {}
+    
+    def top_suggestions(self, k):
+        """
+        Retorna as k melhores sugestões (já ordenadas).
+        
+        Args:
+            k (int): Número de sugestões
+            
+        Returns:
+            tuple: Até k sugestões
+        """
+        return self.suggestions[:k]
+    
+    def suggestions_message_for(self, k):
+        """
+        Retorna a mensagem do /apostas com as k melhores sugestões.
+        
+        A mensagem padrão já vem pronta; as demais são formatadas uma
+        vez por snapshot e reaproveitadas.
+        
+        Args:
+            k (int): Número de sugestões
+            
+        Returns:
+            str: Mensagem formatada
+        """
+        k = min(k, len(self.suggestions))
+        message = self._messages.get(k)
+        if message is None:
+            message = self._messages[k] = BettingAnalyzer(None, None).format_suggestions_message(list(self.suggestions[:k]))
+        return message
+    
+    def suggestion_index(self):
+        """
+        Retorna o índice das apostas com valor para os perfis dos usuários.
+        
+        Montado no primeiro /apostas com filtros e reaproveitado até o
+        próximo snapshot.
+        
+        Returns:
+            SuggestionIndex: Índice por liga, mercado e casa
+        """
+        if self._suggestion_index is None:
+            self._suggestion_index = SuggestionIndex(self)
+        return self._suggestion_index
+    
+    def catalog(self, source="odds"):
+        """
+        Retorna o catálogo paginável dos jogos (montado uma vez por snapshot).
+        
+        Args:
+            source (str): odds (jogos com odds, /odds) ou games (jogos do dia, /jogos)
+            
+        Returns:
+            GameCatalog: Jogos por início, liga e ID curto
+        """
+        catalog = self._catalogs.get(source)
+        if catalog is None:
+            catalog = GameCatalog.from_odds(self.odds) if source == "odds" else GameCatalog.from_games(self.games)
+            self._catalogs[source] = catalog
+        return catalog
+
+class SnapshotStore:
+    """Mantém o snapshot atual e publica novas versões."""
+    
+    def __init__(self, max_suggestions=MAX_SUGGESTIONS_LIMIT, default_suggestions=MAX_SUGGESTIONS):
+        """
+        Inicializa o repositório de snapshots.
+        
+        Args:
+            max_suggestions (int): Número de sugestões ordenadas por atualização
+                (o maior K que um usuário pode pedir)
+            default_suggestions (int): Número de sugestões da mensagem padrão
+        """
+        self.max_suggestions = max_suggestions
+        self.default_suggestions = default_suggestions
+        self._current = None
+        self._previous = None
+        self._version = 0
+        self._subscribers = []
+        # Mensagens formatadas por versão (cards de odds, páginas, sugestões)
+        self.renders = RenderCache()
+    
+    @property
+    def current(self):
+        """Snapshot atual (None antes da primeira atualização)."""
+        return self._current
+    
+    @property
+    def previous(self):
+        """
+        Snapshot substituído pela última publicação (base das mudanças
+        entregues aos consumidores; None na primeira publicação).
+        """
+        return self._previous
+    
+    def restore(self, snapshot):
+        """
+        Usa um snapshot carregado do disco como o atual.
+        
+        Os consumidores não são notificados (as mudanças já foram
+        publicadas antes de o snapshot ser gravado); a próxima
+        publicação compara as odds com as dele e continua a numeração
+        de versões.
+        
+        Args:
+            snapshot (DataSnapshot): Snapshot carregado
+        """
+        self._current = snapshot
+        self._version = max(self._version, snapshot.version)
+    
+    def subscribe(self, callback):
+        """
+        Registra um consumidor das mudanças de cada atualização.
+        
+        Args:
+            callback (callable): Função chamada com (snapshot, changes)
+                após cada publicação
+        """
+        self._subscribers.append(callback)
+    
+    def unsubscribe(self, callback):
+        """Remove um consumidor registrado com subscribe."""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+    
+    def publish(self, games_data, odds_data, created_at=None):
+        """
+        Analisa os dados e publica um novo snapshot.
+        
+        As odds novas são comparadas com as do snapshot anterior e só os
+        jogos novos ou com odds alteradas são reanalisados; os demais
+        reaproveitam a análise anterior. O snapshot é montado por
+        completo antes de substituir o atual, então os leitores nunca
+        veem uma atualização pela metade. Se a análise falhar, o
+        snapshot anterior continua valendo.
+        
+        Args:
+            games_data (pd.DataFrame): DataFrame com dados dos jogos
+            odds_data (OddsMatrix): Matriz de odds
+            created_at (datetime): Momento da atualização (padrão: agora)
+            
+        Returns:
+            DataSnapshot: Snapshot publicado
+        """
+        previous = self._current
+        version = self._version + 1
+        changes = diff_odds(previous.odds if previous else None, odds_data, version)
+        analyzer = BettingAnalyzer(games_data, odds_data)
+        
+        if previous is not None and changes.is_empty():
+            # Nada mudou: reaproveitar a análise inteira
+            value_bets = previous.value_bets
+            suggestions = previous.suggestions
+            suggestions_message = previous.suggestions_message
+            if previous.created_at.date() != datetime.now().date():
+                # A mensagem traz a data do dia: depois da meia-noite, montar de novo
+                suggestions_message = analyzer.format_suggestions_message(list(suggestions[:self.default_suggestions]))
+            arbitrage = previous.arbitrage
+            arbitrage_message = previous.arbitrage_message
+        else:
+            affected = changes.affected
+            fresh = BettingAnalyzer(games_data, odds_data.take(affected)).find_all_value_bets() if affected else {}
+            value_bets = {
+                key: fresh[key] if key in fresh else previous.value_bets[key]
+                for key in odds_data.game_keys
+            }
+            suggestions = tuple(analyzer.generate_suggestions(self.max_suggestions, value_bets=value_bets))
+            suggestions_message = analyzer.format_suggestions_message(list(suggestions[:self.default_suggestions]))
+            arbitrage = tuple(scan_arbitrage(odds_data))
+            arbitrage_message = format_arbitrage_message(arbitrage)
+            
+        snapshot = DataSnapshot(
+            version=version,
+            created_at=created_at or datetime.now(),
+            games=games_data,
+            odds=odds_data,
+            value_bets=value_bets,
+            changes=changes,
+            suggestions=suggestions,
+            suggestions_message=suggestions_message,
+            arbitrage=arbitrage,
+            arbitrage_message=arbitrage_message
+        )
+        snapshot._messages[min(self.default_suggestions, len(suggestions))] = suggestions_message
+        
+        self._prerender(snapshot, previous)
+        self._version = snapshot.version
+        self._previous = previous
+        self._current = snapshot
+        logger.info(f"Snapshot v{snapshot.version} publicado: {len(changes.affected)} jogos reanalisados, "
+                    f"{len(suggestions)} sugestões, {len(arbitrage)} arbitragens.")
+                    
+        for callback in list(self._subscribers):
+            try:
+                callback(snapshot, changes)
+            except Exception as e:
+                logger.error(f"Erro ao notificar consumidor do snapshot v{snapshot.version}: {e}")
+                
+        return snapshot
+
+    def _prerender(self, snapshot, previous):
+        """
+        Deixa no cache as mensagens da nova versão.
+        
+        Os cards de odds dos jogos que não mudaram são reaproveitados da
+        versão anterior; os demais são montados na primeira visualização.
+        """
+        if previous is None:
+            return
+        version = snapshot.version
+        affected = set(snapshot.changes.affected)
+        self.renders.carry_over(previous.version, version,
+                                [("odds", game) for game in snapshot.odds.game_keys if game not in affected])
+
+# Instância global do repositório de snapshots
+snapshot_store = SnapshotStore()
@@ -0,0 +1,177 @@
+"""
+Módulo de Persistência do Snapshot
+----------------------------------
+Este módulo grava o último snapshot processado (jogos, matriz de odds,
+sugestões, arbitragens e mensagens) em um único arquivo, de forma
+atômica, e o carrega na inicialização sem copiar a matriz de odds: o
+array de preços é lido por np.memmap direto do arquivo.
+
+Formato do arquivo:
+    cabeçalho  magic (8 bytes), tamanho dos metadados e posição do
+               array de preços (uint64 cada)
+    metadados  JSON (UTF-8) com versão, jogos, eixos da matriz e
+               resultados da análise
+    preços     array float64 (jogos, casas, mercados, resultados) em
+               ordem C, alinhado a 64 bytes
+
+O snapshot carregado fica marcado como stale até a próxima atualização.
+"""
+
+import os
+import json
+import struct
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from odds_delta import ChangeSet
+from odds_matrix import OddsMatrix
+from snapshot import DataSnapshot
+from config import SNAPSHOT_PATH
+
+logger = logging.getLogger(__name__)
+
+# Identificação e versão do formato
+SNAPSHOT_MAGIC = b"BETSNAP1"
+
+# Cabeçalho: magic, tamanho dos metadados, posição dos preços
+HEADER = struct.Struct("<8sQQ")
+
+# Alinhamento do array de preços no arquivo
+ALIGNMENT = 64
+
+def _json_default(value):
+    """Converte escalares NumPy para tipos do JSON."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, tuple):
+        return list(value)
+    raise TypeError(f"Tipo não serializável no snapshot: {type(value).__name__}")
+
+def _lines(odds):
+    """Linhas por jogo e coluna (None em arquivos antigos, com a linha no rótulo)."""
+    lines = odds.get('lines')
+    if lines is None:
+        return None
+    return np.array(lines, dtype=float).reshape(len(odds['games']), len(odds['markets']))
+
+def save_snapshot(snapshot, path=SNAPSHOT_PATH):
+    """
+    Grava o snapshot em disco de forma atômica.
+    
+    O arquivo é escrito em um temporário no mesmo diretório e só então
+    substitui o anterior (os.replace), então um leitor nunca encontra
+    um arquivo pela metade — nem após uma queda no meio da gravação.
+    
+    Args:
+        snapshot (DataSnapshot): Snapshot a gravar
+        path (str): Caminho do arquivo
+        
+    Returns:
+        int: Tamanho do arquivo em bytes
+    """
+    odds = snapshot.odds
+    games = snapshot.games
+    prices = np.ascontiguousarray(odds.prices, dtype=np.float64)
+    
+    metadata = json.dumps({
+        'version': snapshot.version,
+        'created_at': snapshot.created_at.isoformat(),
+        'games': None if games is None else {
+            'columns': list(games.columns),
+            'data': games.to_numpy(dtype=object).tolist()
+        },
+        'odds': {
+            'shape': prices.shape,
+            'games': odds.games,
+            'bookmakers': odds.bookmakers,
+            'markets': odds.markets,
+            'lines': np.where(np.isnan(odds.lines), None, odds.lines).tolist(),
+            'outcomes': odds.outcomes
+        },
+        'value_bets': snapshot.value_bets,
+        'suggestions': snapshot.suggestions,
+        'suggestions_message': snapshot.suggestions_message,
+        'arbitrage': snapshot.arbitrage,
+        'arbitrage_message': snapshot.arbitrage_message
+    }, ensure_ascii=False, default=_json_default).encode("utf-8")
+    
+    data_offset = -(-(HEADER.size + len(metadata)) // ALIGNMENT) * ALIGNMENT
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(SNAPSHOT_MAGIC, len(metadata), data_offset))
+        f.write(metadata)
+        f.write(b"\0" * (data_offset - HEADER.size - len(metadata)))
+        f.write(prices.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    
+    # Garantir que a troca de nome também chegou ao disco
+    directory_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(directory_fd)
+    finally:
+        os.close(directory_fd)
+        
+    size = data_offset + prices.nbytes
+    logger.info(f"Snapshot v{snapshot.version} gravado em {path} ({size} bytes).")
+    return size
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    """
+    Carrega o snapshot gravado por save_snapshot.
+    
+    A matriz de odds aponta direto para o arquivo (np.memmap somente
+    leitura), sem cópia; o snapshot volta marcado como stale.
+    
+    Args:
+        path (str): Caminho do arquivo
+        
+    Returns:
+        DataSnapshot: Snapshot carregado (None se não há arquivo ou ele é inválido)
+    """
+    if not os.path.exists(path):
+        return None
+        
+    try:
+        with open(path, "rb") as f:
+            magic, metadata_size, data_offset = HEADER.unpack(f.read(HEADER.size))
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError("formato desconhecido")
+            metadata = json.loads(f.read(metadata_size).decode("utf-8"))
+            
+        odds = metadata['odds']
+        shape = tuple(odds['shape'])
+        if data_offset + int(np.prod(shape)) * 8 > os.path.getsize(path):
+            raise ValueError("arquivo truncado")
+        if all(shape):
+            prices = np.memmap(path, dtype=np.float64, mode="r", offset=data_offset, shape=shape)
+        else:
+            prices = np.full(shape, np.nan)
+            
+        games = metadata['games']
+        snapshot = DataSnapshot(
+            version=metadata['version'],
+            created_at=datetime.fromisoformat(metadata['created_at']),
+            games=None if games is None else pd.DataFrame(games['data'], columns=games['columns']),
+            odds=OddsMatrix(prices, odds['games'], odds['bookmakers'], odds['markets'], odds['outcomes'], _lines(odds)),
+            value_bets=metadata['value_bets'],
+            changes=ChangeSet(metadata['version']),
+            suggestions=tuple(metadata['suggestions']),
+            suggestions_message=metadata['suggestions_message'],
+            arbitrage=tuple(metadata['arbitrage']),
+            arbitrage_message=metadata['arbitrage_message'],
+            stale=True
+        )
+    except (OSError, ValueError, KeyError, TypeError, struct.error) as e:
+        logger.warning(f"Não foi possível carregar o snapshot de {path}: {e}")
+        return None
+        
+    logger.info(f"Snapshot v{snapshot.version} de {snapshot.created_at:%d/%m/%Y %H:%M:%S} carregado de {path}.")
+    return snapshot
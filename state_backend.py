@@ -0,0 +1,272 @@
+"""
+Módulo de Estado Compartilhado
+------------------------------
+Este módulo define onde fica o snapshot publicado e quem tem o direito
+de atualizar os dados. Com vários workers (gunicorn -w N), só um deles,
+o líder, busca as odds e publica snapshots; os demais (seguidores) leem
+o snapshot publicado pelo líder. Assim todos os workers respondem com a
+mesma versão dos dados e a cota da API não é multiplicada.
+
+Backends:
+    local   Um único processo: ele é sempre o líder e o snapshot só é
+            gravado em SNAPSHOT_PATH para sobreviver a reinícios.
+    sqlite  Vários processos na mesma máquina (ou volume): o líder é
+            eleito por uma concessão (lease) renovada no SQLite, e a
+            versão publicada fica registrada no mesmo banco. Os snapshots
+            são arquivos carregados via np.memmap, então os workers
+            compartilham as páginas da matriz de odds pelo cache do
+            sistema operacional.
+"""
+
+import os
+import re
+import json
+import time
+import socket
+import sqlite3
+import logging
+from contextlib import closing
+
+from snapshot_persistence import save_snapshot, load_snapshot
+from config import STATE_BACKEND, STATE_DB_PATH, SNAPSHOT_PATH, LEADER_LEASE_TTL
+
+logger = logging.getLogger(__name__)
+
+class LocalStateBackend:
+    """Estado de um único processo: sempre líder, sem nada a sincronizar."""
+    
+    name = "local"
+    
+    def __init__(self, snapshot_path=SNAPSHOT_PATH):
+        """
+        Inicializa o backend local.
+        
+        Args:
+            snapshot_path (str): Arquivo do último snapshot (None = não gravar)
+        """
+        self.snapshot_path = snapshot_path
+    
+    def acquire_leadership(self):
+        """Sempre líder."""
+        return True
+    
+    def release_leadership(self):
+        """Nada a liberar."""
+    
+    def publish(self, snapshot, leagues=None):
+        """
+        Grava o snapshot para o próximo reinício.
+        
+        Args:
+            snapshot (DataSnapshot): Snapshot publicado
+            leagues (dict): Situação das ligas (não usada)
+            
+        Returns:
+            bool: True (o processo é sempre o líder)
+        """
+        if self.snapshot_path:
+            save_snapshot(snapshot, self.snapshot_path)
+        return True
+    
+    def load_latest(self):
+        """Último snapshot gravado (None se não há)."""
+        return load_snapshot(self.snapshot_path) if self.snapshot_path else None
+    
+    def load_newer(self, version):
+        """Nunca há snapshot de outro processo."""
+        return None
+
+class SQLiteStateBackend:
+    """Estado compartilhado entre processos por um banco SQLite e arquivos de snapshot."""
+    
+    name = "sqlite"
+    
+    def __init__(self, db_path=STATE_DB_PATH, snapshot_path=SNAPSHOT_PATH, lease_ttl=LEADER_LEASE_TTL,
+                 node_id=None, clock=time.time):
+        """
+        Inicializa o backend e cria as tabelas se necessário.
+        
+        Args:
+            db_path (str): Arquivo do banco SQLite
+            snapshot_path (str): Base do nome dos arquivos de snapshot
+                (data/snapshot.bin vira data/snapshot-v12-host_4242.bin)
+            lease_ttl (float): Validade (s) da concessão do líder; precisa ser
+                maior que o intervalo entre renovações (REFRESH_TICK)
+            node_id (str): Identificação deste processo (padrão: host:pid)
+            clock (callable): Relógio em segundos desde a época (substituível em testes)
+        """
+        self.db_path = db_path
+        self.snapshot_path = snapshot_path
+        self.lease_ttl = lease_ttl
+        self._node_id = node_id
+        self.clock = clock
+        
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS leader ("
+                         "id INTEGER PRIMARY KEY CHECK (id = 1), owner TEXT NOT NULL, expires_at REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS snapshot ("
+                         "id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL, path TEXT NOT NULL, "
+                         "published_at REAL NOT NULL, leagues TEXT NOT NULL)")
+    
+    @property
+    def node_id(self):
+        """Identificação deste processo (calculada na hora, para valer após um fork)."""
+        return self._node_id or f"{socket.gethostname()}:{os.getpid()}"
+    
+    def _connect(self):
+        """
+        Abre uma conexão em modo autocommit.
+        
+        Cada operação usa a sua conexão: elas rodam em threads diferentes
+        (asyncio.to_thread) e conexões SQLite não sobrevivem a um fork.
+        """
+        return sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+    
+    def acquire_leadership(self):
+        """
+        Obtém ou renova a concessão do líder.
+        
+        A concessão passa para este processo se estiver livre, vencida ou
+        já for dele; a troca é um único UPSERT, então dois processos nunca
+        saem líderes do mesmo instante.
+        
+        Returns:
+            bool: True se este processo é o líder
+        """
+        now = self.clock()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO leader (id, owner, expires_at) VALUES (1, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leader.owner = excluded.owner OR leader.expires_at <= ?",
+                (self.node_id, now + self.lease_ttl, now)
+            )
+            owner, = conn.execute("SELECT owner FROM leader WHERE id = 1").fetchone()
+        return owner == self.node_id
+    
+    def release_leadership(self):
+        """Libera a concessão (ao encerrar), para outro processo assumir logo."""
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE leader SET expires_at = 0 WHERE owner = ?", (self.node_id,))
+    
+    def _snapshot_file(self, version):
+        """Arquivo de uma versão do snapshot (inclui o processo, para líderes nunca colidirem)."""
+        root, ext = os.path.splitext(self.snapshot_path)
+        node = re.sub(r"[^\w.-]", "_", self.node_id)
+        return f"{root}-v{version}-{node}{ext}"
+    
+    def publish(self, snapshot, leagues=None):
+        """
+        Grava o snapshot e o registra como a versão atual.
+        
+        O arquivo é gravado antes do registro, então um seguidor nunca
+        encontra uma versão sem arquivo. O registro só acontece se este
+        processo ainda é o líder (na mesma transação); senão, o arquivo é
+        descartado. O arquivo da versão anterior é apagado: quem já o
+        mapeou em memória continua lendo até soltar.
+        
+        Args:
+            snapshot (DataSnapshot): Snapshot publicado
+            leagues (dict): Situação das ligas ({liga: [atualizada_em, próxima]})
+            
+        Returns:
+            bool: True se publicado; False se este processo perdeu a liderança
+        """
+        path = self._snapshot_file(snapshot.version)
+        save_snapshot(snapshot, path)
+        
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT owner, expires_at FROM leader WHERE id = 1").fetchone()
+                leader = row is not None and row[0] == self.node_id and row[1] > self.clock()
+                previous = conn.execute("SELECT path FROM snapshot WHERE id = 1").fetchone()
+                if leader:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO snapshot (id, version, path, published_at, leagues) "
+                        "VALUES (1, ?, ?, ?, ?)",
+                        (snapshot.version, path, self.clock(), json.dumps(leagues or {}))
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+                
+        if not leader:
+            os.remove(path)
+            logger.warning(f"Snapshot v{snapshot.version} descartado: este processo não é mais o líder.")
+            return False
+        if previous is not None and previous[0] != path and os.path.exists(previous[0]):
+            os.remove(previous[0])
+        return True
+    
+    def _published(self):
+        """Registro da versão publicada e se há um líder ativo (None se nada foi publicado)."""
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT version, path, leagues, "
+                "EXISTS (SELECT 1 FROM leader WHERE id = 1 AND expires_at > ?) FROM snapshot WHERE id = 1",
+                (self.clock(),)
+            ).fetchone()
+    
+    def load_latest(self):
+        """
+        Carrega o snapshot publicado (na inicialização do processo).
+        
+        Returns:
+            DataSnapshot: Snapshot, marcado como stale se nenhum líder o
+                mantém atualizado (None se não há)
+        """
+        row = self._published()
+        snapshot = load_snapshot(row[1]) if row is not None else None
+        if snapshot is not None and row[3]:
+            snapshot.stale = False
+        return snapshot
+    
+    def load_newer(self, version):
+        """
+        Carrega o snapshot publicado pelo líder se ele não é a versão dada.
+        
+        Args:
+            version (int): Versão que o processo já tem (None se nenhuma)
+            
+        Returns:
+            tuple: (DataSnapshot, situação das ligas), ou None se não há versão diferente
+        """
+        row = self._published()
+        if row is None or row[0] == version:
+            return None
+            
+        snapshot = load_snapshot(row[1])
+        if snapshot is None:
+            # O líder publicou outra versão e apagou o arquivo; fica para a próxima verificação
+            return None
+            
+        # Publicado pelo líder durante a vida deste processo: não é um snapshot antigo
+        snapshot.stale = False
+        return snapshot, json.loads(row[2])
+
+# Backends disponíveis em STATE_BACKEND
+STATE_BACKENDS = {
+    LocalStateBackend.name: LocalStateBackend,
+    SQLiteStateBackend.name: SQLiteStateBackend
+}
+
+def create_state_backend(kind=STATE_BACKEND):
+    """
+    Cria o backend de estado configurado.
+    
+    Args:
+        kind (str): Nome do backend (local ou sqlite)
+        
+    Returns:
+        LocalStateBackend | SQLiteStateBackend: Backend criado
+        
+    Raises:
+        ValueError: Se o backend não existe
+    """
+    if kind not in STATE_BACKENDS:
+        raise ValueError(f"Backend de estado desconhecido: {kind} (use {', '.join(STATE_BACKENDS)})")
+    return STATE_BACKENDS[kind]()
@@ -0,0 +1,241 @@
+"""
+Módulo de Inscrições
+--------------------
+Este módulo guarda os chats inscritos nas sugestões diárias, o
+progresso de cada envio em massa e as regras de alerta de cada chat,
+em um banco SQLite. O banco fica em disco, então os dados são os mesmos
+para todos os workers e sobrevivem a reinícios; um envio interrompido
+continua de onde parou.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+from contextlib import closing
+
+from config import SUBSCRIPTIONS_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+class SubscriptionStore:
+    """Chats inscritos e progresso dos envios em massa (SQLite)."""
+    
+    def __init__(self, db_path=SUBSCRIPTIONS_DB_PATH, clock=time.time):
+        """
+        Abre (ou cria) o banco de inscrições.
+        
+        Args:
+            db_path (str): Arquivo do banco SQLite
+            clock (callable): Relógio em segundos desde a época (substituível em testes)
+        """
+        self.db_path = db_path
+        self.clock = clock
+        
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS subscribers ("
+                         "chat_id INTEGER PRIMARY KEY, subscribed_at REAL NOT NULL, active INTEGER NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS broadcasts ("
+                         "id TEXT PRIMARY KEY, text TEXT NOT NULL, parse_mode TEXT, created_at REAL NOT NULL, "
+                         "cursor INTEGER NOT NULL, sent INTEGER NOT NULL, failed INTEGER NOT NULL, "
+                         "finished_at REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS alert_rules ("
+                         "chat_id INTEGER PRIMARY KEY, min_value REAL, leagues TEXT NOT NULL, "
+                         "markets TEXT NOT NULL, revision INTEGER NOT NULL)")
+    
+    def _connect(self):
+        """Abre uma conexão em modo autocommit (uma por operação, como no backend de estado)."""
+        return sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+    
+    def subscribe(self, chat_id):
+        """
+        Inscreve um chat (ou reativa uma inscrição cancelada).
+        
+        Args:
+            chat_id (int): ID do chat
+            
+        Returns:
+            bool: True se o chat não estava inscrito
+        """
+        with closing(self._connect()) as conn:
+            changed = conn.execute(
+                "INSERT INTO subscribers (chat_id, subscribed_at, active) VALUES (?, ?, 1) "
+                "ON CONFLICT (chat_id) DO UPDATE SET active = 1, subscribed_at = excluded.subscribed_at "
+                "WHERE subscribers.active = 0",
+                (chat_id, self.clock())
+            ).rowcount
+        return changed > 0
+    
+    def subscribe_many(self, chat_ids):
+        """Inscreve vários chats de uma vez (importação e testes)."""
+        now = self.clock()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT INTO subscribers (chat_id, subscribed_at, active) VALUES (?, ?, 1) "
+                "ON CONFLICT (chat_id) DO UPDATE SET active = 1",
+                ((chat_id, now) for chat_id in chat_ids)
+            )
+            conn.execute("COMMIT")
+    
+    def unsubscribe(self, chat_id):
+        """
+        Cancela a inscrição de um chat.
+        
+        Args:
+            chat_id (int): ID do chat
+            
+        Returns:
+            bool: True se o chat estava inscrito
+        """
+        with closing(self._connect()) as conn:
+            return conn.execute("UPDATE subscribers SET active = 0 WHERE chat_id = ? AND active = 1",
+                                (chat_id,)).rowcount > 0
+    
+    def is_subscribed(self, chat_id):
+        """Indica se o chat está inscrito."""
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT 1 FROM subscribers WHERE chat_id = ? AND active = 1",
+                                (chat_id,)).fetchone() is not None
+    
+    def count(self):
+        """Número de chats inscritos."""
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM subscribers WHERE active = 1").fetchone()[0]
+    
+    def chat_ids(self, after=None, limit=1000):
+        """
+        Lista os chats inscritos em ordem de ID (paginação por chave).
+        
+        Args:
+            after (int): Listar só chats com ID maior que este
+            limit (int): Máximo de chats
+            
+        Returns:
+            list: IDs dos chats
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT chat_id FROM subscribers WHERE active = 1 AND chat_id > ? ORDER BY chat_id LIMIT ?",
+                (after if after is not None else -(1 << 63), limit)
+            ).fetchall()
+        return [row[0] for row in rows]
+    
+    def start_broadcast(self, broadcast_id, text, parse_mode=None):
+        """
+        Registra um envio em massa (ou retorna o já registrado com esse ID).
+        
+        Args:
+            broadcast_id (str): ID do envio (ex: daily-2024-01-01)
+            text (str): Mensagem enviada
+            parse_mode (str): Formatação da mensagem
+            
+        Returns:
+            dict: Envio com id, text, parse_mode, cursor, sent, failed e finished_at
+        """
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO broadcasts (id, text, parse_mode, created_at, cursor, sent, failed) "
+                "VALUES (?, ?, ?, ?, ?, 0, 0)",
+                (broadcast_id, text, parse_mode, self.clock(), -(1 << 63))
+            )
+        return self.get_broadcast(broadcast_id)
+    
+    def get_broadcast(self, broadcast_id):
+        """Retorna um envio em massa (None se não existe)."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT id, text, parse_mode, cursor, sent, failed, finished_at "
+                               "FROM broadcasts WHERE id = ?", (broadcast_id,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("id", "text", "parse_mode", "cursor", "sent", "failed", "finished_at"), row))
+    
+    def save_progress(self, broadcast_id, cursor, sent, failed, deactivate=()):
+        """
+        Grava o progresso de um envio, em uma única transação.
+        
+        Args:
+            broadcast_id (str): ID do envio
+            cursor (int): Maior ID de chat já processado
+            sent (int): Mensagens entregues neste lote
+            failed (int): Chats que falharam neste lote
+            deactivate (iterable): Chats que bloquearam o bot (inscrição cancelada)
+        """
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN")
+            conn.execute("UPDATE broadcasts SET cursor = ?, sent = sent + ?, failed = failed + ? WHERE id = ?",
+                         (cursor, sent, failed, broadcast_id))
+            conn.executemany("UPDATE subscribers SET active = 0 WHERE chat_id = ?",
+                             ((chat_id,) for chat_id in deactivate))
+            conn.execute("COMMIT")
+    
+    def finish_broadcast(self, broadcast_id):
+        """Marca um envio como concluído."""
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE broadcasts SET finished_at = ? WHERE id = ?", (self.clock(), broadcast_id))
+    
+    def set_alert(self, chat_id, min_value, leagues=(), markets=()):
+        """
+        Cria ou substitui a regra de alerta de um chat.
+        
+        Args:
+            chat_id (int): ID do chat
+            min_value (float): Valor esperado mínimo das apostas alertadas
+            leagues (iterable): Ligas (sport_key) acompanhadas (vazio = todas)
+            markets (iterable): Mercados (h2h, totals, spreads) acompanhados (vazio = todos)
+        """
+        self._write_alert(chat_id, min_value, sorted(set(leagues)), sorted(set(markets)))
+    
+    def remove_alert(self, chat_id):
+        """Remove a regra de alerta de um chat."""
+        self._write_alert(chat_id, None, [], [])
+    
+    def _write_alert(self, chat_id, min_value, leagues, markets):
+        """Grava uma regra com a próxima revisão (regra removida = min_value nulo)."""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO alert_rules (chat_id, min_value, leagues, markets, revision) "
+                "VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(revision), 0) + 1 FROM alert_rules))",
+                (chat_id, min_value, json.dumps(leagues), json.dumps(markets))
+            )
+    
+    def get_alert(self, chat_id):
+        """
+        Retorna a regra de alerta de um chat.
+        
+        Returns:
+            dict: min_value, leagues e markets (None se o chat não tem alerta)
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT min_value, leagues, markets FROM alert_rules "
+                               "WHERE chat_id = ? AND min_value IS NOT NULL", (chat_id,)).fetchone()
+        if row is None:
+            return None
+        return {'min_value': row[0], 'leagues': json.loads(row[1]), 'markets': json.loads(row[2])}
+    
+    def alert_rules(self):
+        """
+        Lista as regras de alerta ativas.
+        
+        Returns:
+            tuple: (revisão, lista de (chat_id, min_value, ligas, mercados))
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT chat_id, min_value, leagues, markets, revision FROM alert_rules").fetchall()
+        revision = max((row[4] for row in rows), default=0)
+        return revision, [(row[0], row[1], json.loads(row[2]), json.loads(row[3]))
+                          for row in rows if row[1] is not None]
+    
+    def alert_revision(self):
+        """Revisão das regras de alerta (muda a cada alteração, em qualquer worker)."""
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COALESCE(MAX(revision), 0) FROM alert_rules").fetchone()[0]
+    
+    def pending_broadcasts(self):
+        """IDs dos envios registrados e não concluídos (interrompidos), do mais antigo ao mais novo."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT id FROM broadcasts WHERE finished_at IS NULL ORDER BY created_at").fetchall()
+        return [row[0] for row in rows]
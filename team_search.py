@@ -0,0 +1,242 @@
+"""
+Módulo de Busca de Times
+------------------------
+Este módulo mantém um índice de trigramas sobre os nomes dos times com
+odds (e seus apelidos), usado pelo /odds <busca>:
+
+- nomes normalizados: minúsculas, sem acentos e sem pontuação
+  ("São Paulo" e "sao paulo" são o mesmo termo);
+- cada time é indexado pelo nome completo, por cada palavra do nome e
+  pelos apelidos de TEAM_ALIASES ("man utd", "mengão");
+- a busca tolera erros de digitação: os termos são comparados pelos
+  trigramas em comum (coeficiente de Dice), percorrendo só as listas dos
+  trigramas da busca.
+
+O índice é atualizado de forma incremental a cada snapshot: só os jogos
+que entraram ou saíram mexem nas listas.
+"""
+
+import re
+import threading
+import unicodedata
+
+from analyzer import kickoff_timestamp
+
+# Similaridade mínima (Dice sobre trigramas) para um termo casar com a busca
+MIN_SIMILARITY = 0.4
+
+# Apelidos comuns (nome normalizado do time -> apelidos)
+TEAM_ALIASES = {
+    "manchester united": ["man utd", "man united", "mufc"],
+    "manchester city": ["man city", "city"],
+    "tottenham hotspur": ["spurs", "tottenham"],
+    "wolverhampton wanderers": ["wolves"],
+    "paris saint germain": ["psg", "paris"],
+    "bayern munich": ["bayern", "fc bayern"],
+    "borussia dortmund": ["bvb", "dortmund"],
+    "atletico madrid": ["atleti"],
+    "barcelona": ["barca"],
+    "juventus": ["juve"],
+    "inter milan": ["inter", "internazionale"],
+    "ac milan": ["milan"],
+    "flamengo": ["mengao", "fla"],
+    "corinthians": ["timao"],
+    "palmeiras": ["verdao"],
+    "sao paulo": ["spfc", "tricolor paulista"],
+    "vasco da gama": ["vasco"],
+    "atletico mineiro": ["galo"],
+    "gremio": ["tricolor gaucho"],
+    "fluminense": ["flu"],
+}
+
+# Separadores de "time x time" na busca
+_VERSUS = re.compile(r"\s+(?:x|vs?|contra)\s+")
+
+def normalize(text):
+    """
+    Normaliza um nome para a busca (minúsculas, sem acentos e pontuação).
+    
+    Args:
+        text (str): Nome ou busca
+        
+    Returns:
+        str: Nome normalizado (ex: "São Paulo FC" -> "sao paulo fc")
+    """
+    folded = unicodedata.normalize("NFKD", str(text))
+    folded = "".join(char for char in folded if not unicodedata.combining(char)).lower()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", folded).split())
+
+def trigrams(term):
+    """Trigramas de um termo, com bordas marcadas (ex: "fla" -> "  f", " fl", "fla", "la ")."""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TeamSearchIndex:
+    """Índice de trigramas dos times com odds, atualizado a cada snapshot."""
+    
+    def __init__(self, aliases=TEAM_ALIASES, min_similarity=MIN_SIMILARITY):
+        """
+        Inicializa o índice vazio.
+        
+        Args:
+            aliases (dict): Apelidos por nome normalizado do time
+            min_similarity (float): Similaridade mínima de um termo com a busca
+        """
+        self.aliases = {normalize(team): [normalize(alias) for alias in names] for team, names in aliases.items()}
+        self.min_similarity = min_similarity
+        self.version = None
+        self._games = {}        # jogo -> (mandante, visitante, início)
+        self._team_games = {}   # time -> jogos
+        self._term_teams = {}   # termo -> times
+        self._term_size = {}    # termo -> número de trigramas
+        self._postings = {}     # trigrama -> termos
+        # Atualizado pela thread que publica os snapshots e lido pelo loop do bot
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._team_games)
+    
+    def _terms(self, team):
+        """Termos de um time: nome completo, palavras do nome e apelidos."""
+        name = normalize(team)
+        terms = {name} | {word for word in name.split() if len(word) >= 3}
+        terms.update(self.aliases.get(name, ()))
+        return terms
+    
+    def _add_team(self, team):
+        for term in self._terms(team):
+            teams = self._term_teams.get(term)
+            if teams is None:
+                teams = self._term_teams[term] = set()
+                grams = trigrams(term)
+                self._term_size[term] = len(grams)
+                for gram in grams:
+                    self._postings.setdefault(gram, set()).add(term)
+            teams.add(team)
+    
+    def _remove_team(self, team):
+        for term in self._terms(team):
+            teams = self._term_teams.get(term)
+            if teams is None:
+                continue
+            teams.discard(team)
+            if not teams:
+                del self._term_teams[term], self._term_size[term]
+                for gram in trigrams(term):
+                    terms = self._postings[gram]
+                    terms.discard(term)
+                    if not terms:
+                        del self._postings[gram]
+    
+    def update(self, games):
+        """
+        Atualiza o índice com os jogos atuais (só os que entraram ou saíram).
+        
+        Args:
+            games (iterable): Metadados dos jogos (key, home_team, away_team, commence_time)
+            
+        Returns:
+            tuple: (jogos adicionados, jogos removidos)
+        """
+        current = {game['key']: (game['home_team'], game['away_team'], game.get('commence_time'))
+                   for game in games}
+        with self._lock:
+            removed = [key for key in self._games if key not in current]
+            added = [key for key in current if key not in self._games]
+            for key in removed:
+                for team in self._games.pop(key)[:2]:
+                    team_games = self._team_games[team]
+                    team_games.discard(key)
+                    if not team_games:
+                        del self._team_games[team]
+                        self._remove_team(team)
+            for key, game in current.items():
+                # Jogos que continuam podem ter mudado de horário
+                self._games[key] = game
+            for key in added:
+                for team in current[key][:2]:
+                    if team not in self._team_games:
+                        self._team_games[team] = set()
+                        self._add_team(team)
+                    self._team_games[team].add(key)
+        return len(added), len(removed)
+    
+    def sync(self, snapshot):
+        """Atualiza o índice para um snapshot, se ainda não está nele."""
+        if snapshot is not None and snapshot.version != self.version:
+            self.update(snapshot.odds.games)
+            self.version = snapshot.version
+    
+    def match_teams(self, query):
+        """
+        Encontra os times parecidos com uma busca.
+        
+        Args:
+            query (str): Nome, apelido ou parte do nome (com ou sem erros)
+            
+        Returns:
+            dict: Similaridade (0 a 1) por time
+        """
+        term = normalize(query)
+        if not term:
+            return {}
+        with self._lock:
+            return self._match(term)
+    
+    def _match(self, term):
+        """Similaridade por time de um termo já normalizado (com o lock já obtido)."""
+        # Termo exato (nome, palavra do nome ou apelido): sem busca aproximada
+        teams = self._term_teams.get(term)
+        if teams:
+            return dict.fromkeys(teams, 1.0)
+            
+        grams = trigrams(term)
+        shared = {}
+        for gram in grams:
+            for candidate in self._postings.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+                
+        scores = {}
+        for candidate, count in shared.items():
+            similarity = 2 * count / (len(grams) + self._term_size[candidate])
+            if similarity >= self.min_similarity:
+                for team in self._term_teams[candidate]:
+                    if similarity > scores.get(team, 0):
+                        scores[team] = similarity
+        return scores
+    
+    def search(self, query, limit=10):
+        """
+        Busca jogos pelo nome de um ou dos dois times.
+        
+        "flamengo" traz os jogos do Flamengo; "fla x palmeiras" (ou vs,
+        contra) traz só os jogos em que os dois times se enfrentam.
+        
+        Args:
+            query (str): Busca do usuário
+            limit (int): Máximo de jogos
+            
+        Returns:
+            list: Chaves dos jogos, dos mais parecidos aos menos (empate:
+                o que começa antes)
+        """
+        sides = [side for side in _VERSUS.split(normalize(query)) if side]
+        if not sides:
+            return []
+            
+        with self._lock:
+            game_scores = None
+            for side in sides[:2]:
+                side_scores = {}
+                for team, score in self._match(side).items():
+                    for key in self._team_games.get(team, ()):
+                        side_scores[key] = max(side_scores.get(key, 0), score)
+                if game_scores is None:
+                    game_scores = side_scores
+                else:
+                    game_scores = {key: score + side_scores[key] for key, score in game_scores.items()
+                                   if key in side_scores}
+                                   
+            ranked = sorted(game_scores, key=lambda key: (-game_scores[key],
+                                                          kickoff_timestamp(self._games[key][2]), key))
+        return ranked[:limit]
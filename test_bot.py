@@ -5,14 +5,46 @@ Script de teste para verificar se o bot está funcionando corretamente
 
 import sys
 import os
+import json
+import time
+import random
 import asyncio
 import logging
+import tempfile
+import threading
+import numpy as np
+from datetime import datetime, timedelta, timezone
 
 # Adicionar o diretório atual ao path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from data_collector import DataCollector
-from analyzer import BettingAnalyzer
+from data_collector import DataCollector, AsyncDataCollector
+from fake_odds_api import FakeOddsAPIServer
+from mock_data import MOCK_GAMES, MOCK_ODDS
+from response_cache import ResponseCache
+from quota_scheduler import QuotaScheduler
+from odds_parser import parse_odds_stream
+from odds_matrix import OddsMatrix
+from odds_delta import diff_odds
+from analyzer import BettingAnalyzer, suggestion_rank
+from snapshot import SnapshotStore
+from snapshot_persistence import save_snapshot, load_snapshot
+from refresh_scheduler import RefreshScheduler
+from state_backend import SQLiteStateBackend
+from single_flight import SingleFlight
+from update_dispatcher import UpdateDispatcher
+from fake_telegram_api import FakeTelegramAPI
+from subscriptions import SubscriptionStore
+from broadcast import BroadcastEngine, TokenBucket
+from alerts import AlertIndex, AlertPipeline, format_alert_message
+from profiles import ProfileStore, DEFAULT_PROFILE
+from render_cache import RenderCache, render_odds_card, render_games_page
+from catalog import GameCatalog, ALL_LEAGUES, short_id
+from team_search import TeamSearchIndex
+from odds_parser import compact_event
+from arbitrage import scan_arbitrage, split_stakes, format_arbitrage_message
+from consensus import devig, DEVIG_METHODS
+from odds_history import OddsHistory, RECORD_DTYPE, format_line_movement_message
 from config import TELEGRAM_TOKEN, USE_MOCK_DATA
 
 logging.basicConfig(level=logging.INFO)
@@ -62,6 +94,1481 @@ async def test_analysis():
         logger.error(f"❌ Erro na análise: {e}")
         return False
 
+async def test_async_collector():
+    """Testa o coletor assíncrono contra o servidor falso da API."""
+    logger.info("Testando coletor assíncrono...")
+    
+    try:
+        with FakeOddsAPIServer(delay=0.5) as server:
+            collector = AsyncDataCollector(api_key="test", base_url=server.url, use_mock=False)
+            
+            # Jogos e odds devem ser buscados em paralelo, no mesmo pool
+            start = asyncio.get_running_loop().time()
+            games, odds = await collector.get_todays_games_and_odds("soccer")
+            elapsed = asyncio.get_running_loop().time() - start
+            await collector.aclose()
+        
+        if not games or not odds:
+            logger.error("❌ Coletor assíncrono não retornou dados")
+            return False
+        
+        if elapsed >= 1.0:
+            logger.error(f"❌ Requisições não foram concorrentes ({elapsed:.2f}s)")
+            return False
+        
+        logger.info(f"✅ Coletor assíncrono OK - {len(games)} jogos, {len(odds)} jogos com odds em {elapsed:.2f}s")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro no coletor assíncrono: {e}")
+        return False
+
+async def test_single_flight():
+    """Testa a união de chamadas simultâneas em uma única busca."""
+    logger.info("Testando chamadas únicas (single-flight)...")
+    
+    try:
+        flights = SingleFlight()
+        calls = []
+        
+        async def fetch(fail=False):
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            if fail:
+                raise RuntimeError("API fora do ar")
+            return object()
+            
+        results = await asyncio.gather(*(flights.do("odds", fetch) for _ in range(1000)))
+        if len(calls) != 1 or any(result is not results[0] for result in results) or flights.in_flight("odds"):
+            logger.error(f"❌ Rajada gerou {len(calls)} buscas")
+            return False
+            
+        # A exceção é compartilhada e a chave fica livre para a próxima chamada
+        errors = await asyncio.gather(*(flights.do("odds", fetch, True) for _ in range(10)), return_exceptions=True)
+        if len(calls) != 2 or not all(isinstance(error, RuntimeError) for error in errors):
+            logger.error("❌ Falha não foi compartilhada")
+            return False
+            
+        # Rajada de 1.000 pedidos das mesmas odds: uma única requisição à API
+        with FakeOddsAPIServer(delay=0.2) as server:
+            collector = AsyncDataCollector(api_key="test", base_url=server.url, use_mock=False)
+            odds = await asyncio.gather(*(collector.get_odds("soccer") for _ in range(1000)))
+            await collector.aclose()
+            requests_made = server.request_count
+            
+        if requests_made != 1 or not odds[0] or any(result != odds[0] for result in odds):
+            logger.error(f"❌ Rajada gerou {requests_made} requisições à API")
+            return False
+            
+        logger.info(f"✅ Single-flight OK - 1000 chamadas, {requests_made} requisição, "
+                    f"{collector.flights.shared} compartilhadas")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro no single-flight: {e}")
+        return False
+
+def make_todays_fixtures(items):
+    """Copia jogos simulados ajustando o início para hoje."""
+    today = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
+    return [dict(item, commence_time=today) for item in items]
+
+def make_random_h2h_games(count, seed=7, start=0):
+    """Gera jogos com odds h2h aleatórias (algumas ausentes) em cinco casas."""
+    rng = random.Random(seed)
+    games = []
+    for i in range(start, start + count):
+        home, away = f"Casa {i}", f"Fora {i}"
+        bookmakers = []
+        for bookie in ("bet365", "pinnacle", "betfair", "unibet", "williamhill"):
+            outcomes = [{"name": name, "price": round(rng.uniform(1.2, 9.0), 2)}
+                        for name in (home, "Draw", away) if rng.random() > 0.1]
+            bookmakers.append({"key": bookie, "markets": [{"key": "h2h", "outcomes": outcomes}]})
+        games.append({"id": f"g{i}", "home_team": home, "away_team": away,
+                      "commence_time": "2024-01-01T20:00:00Z", "bookmakers": bookmakers})
+    return games
+
+async def test_fan_out_collection():
+    """Testa a coleta paralela de várias ligas com falha isolada."""
+    logger.info("Testando coleta paralela de ligas...")
+    
+    try:
+        sports = ["soccer_epl", "soccer_laliga", "soccer_serie_a", "soccer_bundesliga", "soccer_brazil"]
+        with FakeOddsAPIServer(games=make_todays_fixtures(MOCK_GAMES), odds=make_todays_fixtures(MOCK_ODDS),
+                               delay=0.3, fail_sports={"soccer_brazil"}) as server:
+            collector = AsyncDataCollector(api_key="test", base_url=server.url, use_mock=False)
+            
+            start = asyncio.get_running_loop().time()
+            games, odds = await collector.get_games_and_odds_for_sports(sports, max_concurrency=5)
+            elapsed = asyncio.get_running_loop().time() - start
+            failed = list(collector.failed_sports)
+            
+            # A liga com erro HTTP fica fora do resultado e entra em failed_sports
+            collected = await collector.get_games_and_odds_by_sport(sports, max_concurrency=5)
+            await collector.aclose()
+            
+        if failed != ["soccer_brazil"] or collector.failed_sports != ["soccer_brazil"] or "soccer_brazil" in collected:
+            logger.error(f"❌ Falha da liga não foi isolada: failed_sports={collector.failed_sports}, "
+                         f"ligas={sorted(collected)}")
+            return False
+            
+        if len(games) != len(MOCK_GAMES) or len(odds) != len(MOCK_ODDS):
+            logger.error(f"❌ Resultado incompleto: {len(games)} jogos, {len(odds)} jogos com odds")
+            return False
+            
+        # 5 ligas x 2 requisições de 0.3s: sequencial levaria 3s
+        if elapsed >= 1.5:
+            logger.error(f"❌ Ligas não foram buscadas em paralelo ({elapsed:.2f}s)")
+            return False
+            
+        logger.info(f"✅ Coleta paralela OK - {len(sports)} ligas em {elapsed:.2f}s")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro na coleta paralela: {e}")
+        return False
+
+async def test_response_cache():
+    """Testa o cache de respostas com revalidação condicional e LRU."""
+    logger.info("Testando cache de respostas...")
+    
+    try:
+        with FakeOddsAPIServer() as server:
+            # TTL zero para odds: toda leitura de odds precisa revalidar
+            cache = ResponseCache(ttls={"odds": 0}, max_entries=2)
+            collector = AsyncDataCollector(api_key="test", base_url=server.url, use_mock=False, cache=cache,
+                                           scheduler=QuotaScheduler(min_interval=0))
+            
+            await collector.get_games("soccer")
+            await collector.get_games("soccer")
+            await collector.get_odds("soccer")
+            odds = await collector.get_odds("soccer")
+            await collector.get_sports()
+            await collector.aclose()
+            
+            requests_made = server.request_count
+            not_modified = server.not_modified_count
+            
+        stats = cache.stats()
+        if stats["hits"] != 1 or requests_made != 4:
+            logger.error(f"❌ Cache não evitou requisições: {stats}, {requests_made} requisições")
+            return False
+            
+        if stats["revalidations"] != 1 or not_modified != 1 or not odds:
+            logger.error(f"❌ Revalidação condicional falhou: {stats}")
+            return False
+            
+        if stats["entries"] != 2 or stats["evictions"] != 1:
+            logger.error(f"❌ Remoção LRU falhou: {stats}")
+            return False
+            
+        # Entrada removida entre os cabeçalhos de revalidação e o 304: nova busca sem revalidar
+        class EvictingCache(ResponseCache):
+            def conditional_headers(self, key):
+                headers = super().conditional_headers(key)
+                self.clear()
+                return headers
+                
+        with FakeOddsAPIServer() as server:
+            results = []
+            for make in (DataCollector, AsyncDataCollector):
+                collector = make(api_key="test", base_url=server.url, use_mock=False,
+                                 cache=EvictingCache(ttls={"odds": 0}), scheduler=QuotaScheduler(min_interval=0))
+                if make is DataCollector:
+                    results.append([collector.get_odds("soccer") for _ in range(2)])
+                else:
+                    results.append([await collector.get_odds("soccer") for _ in range(2)])
+                    await collector.aclose()
+            evicted_304 = server.not_modified_count
+            
+        if evicted_304 != 2 or any(not first or second != first for first, second in results):
+            logger.error(f"❌ 304 sem entrada no cache não buscou as odds de novo: {evicted_304} respostas 304")
+            return False
+            
+        logger.info(f"✅ Cache de respostas OK - {stats}")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro no cache de respostas: {e}")
+        return False
+
+async def test_quota_scheduler():
+    """Testa a distribuição da cota da API entre as ligas."""
+    logger.info("Testando agendador de cota...")
+    
+    try:
+        now = datetime.now(timezone.utc).timestamp()
+        scheduler = QuotaScheduler(reserve=10, min_interval=60, max_interval=6 * 3600, clock=lambda: now)
+        scheduler.update_from_headers({"x-requests-remaining": "500", "x-requests-used": "0", "x-requests-last": "2"})
+        
+        soon = datetime.fromtimestamp(now + 3600, tz=timezone.utc).isoformat()
+        later = datetime.fromtimestamp(now + 3 * 86400, tz=timezone.utc).isoformat()
+        scheduler.observe_games("soccer_epl", [{"commence_time": soon}])
+        scheduler.observe_games("soccer_laliga", [{"commence_time": later}])
+        
+        near = scheduler.refresh_interval("soccer_epl")
+        far = scheduler.refresh_interval("soccer_laliga")
+        if not near < far:
+            logger.error(f"❌ Liga com jogo próximo não foi priorizada ({near:.0f}s vs {far:.0f}s)")
+            return False
+            
+        # Cota no fim: intervalo máximo em vez de falhar
+        scheduler.update_from_headers({"x-requests-remaining": "5"})
+        if scheduler.refresh_interval("soccer_epl") != scheduler.max_interval:
+            logger.error("❌ Intervalo não foi reduzido com a cota no fim")
+            return False
+            
+        # Integração: a segunda busca reaproveita as odds em cache
+        with FakeOddsAPIServer(quota=100) as server:
+            collector = AsyncDataCollector(api_key="test", base_url=server.url, use_mock=False,
+                                           cache=ResponseCache(ttls={"odds": 0}))
+            first = await collector.get_odds("soccer")
+            second = await collector.get_odds("soccer")
+            await collector.aclose()
+            used = server.quota_used
+            
+        if used != 2 or first != second or collector.scheduler.remaining != 98:
+            logger.error(f"❌ Cota não foi respeitada: {used} créditos usados")
+            return False
+            
+        # Respostas do cache ou 304 não gastam créditos: não adiam a próxima busca da liga
+        clock = [now]
+        with FakeOddsAPIServer(quota=100) as server:
+            shared = ResponseCache()
+            warm = AsyncDataCollector(api_key="test", base_url=server.url, use_mock=False, cache=shared)
+            await warm.get_odds("soccer")
+            await warm.aclose()
+            cached = AsyncDataCollector(api_key="test", base_url=server.url, use_mock=False, cache=shared,
+                                        scheduler=QuotaScheduler(clock=lambda: clock[0]))
+            await cached.get_odds("soccer")
+            await cached.aclose()
+            
+            revalidating = AsyncDataCollector(api_key="test", base_url=server.url, use_mock=False,
+                                              cache=ResponseCache(ttls={"odds": 0}),
+                                              scheduler=QuotaScheduler(clock=lambda: clock[0]))
+            await revalidating.get_odds("soccer")
+            clock[0] += 10 * revalidating.scheduler.max_interval
+            await revalidating.get_odds("soccer")
+            await revalidating.aclose()
+            not_modified = server.not_modified_count
+            
+        if not cached.scheduler.is_due("soccer") or not_modified != 1 or not revalidating.scheduler.is_due("soccer"):
+            logger.error("❌ Resposta sem gasto de cota adiou a próxima busca da liga")
+            return False
+            
+        logger.info(f"✅ Agendador de cota OK - intervalos {near:.0f}s (jogo próximo) e {far:.0f}s (distante)")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro no agendador de cota: {e}")
+        return False
+
+def test_odds_stream_parser():
+    """Testa a leitura incremental de odds em trechos pequenos."""
+    logger.info("Testando leitura incremental de odds...")
+    
+    try:
+        body = json.dumps(MOCK_ODDS).encode("utf-8")
+        collector = DataCollector()
+        
+        # Trechos de 7 bytes cortam nomes, números e caracteres UTF-8 ao meio
+        games = parse_odds_stream(body, chunk_size=7)
+        expected = collector.format_odds_data(MOCK_ODDS)
+        
+        if collector.format_odds_data(games) != expected:
+            logger.error("❌ Leitura incremental difere da leitura completa")
+            return False
+            
+        try:
+            parse_odds_stream(body[:-20])
+            logger.error("❌ Resposta truncada não foi detectada")
+            return False
+        except ValueError:
+            pass
+            
+        logger.info(f"✅ Leitura incremental OK - {len(games)} jogos")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro na leitura incremental: {e}")
+        return False
+
+def test_odds_matrix():
+    """Testa a matriz de odds e a compatibilidade com o dicionário de odds."""
+    logger.info("Testando matriz de odds...")
+    
+    try:
+        collector = DataCollector()
+        odds_dict = collector.format_odds_data(MOCK_ODDS)
+        matrix = OddsMatrix.from_games(collector.get_odds())
+        
+        if dict(matrix.items()) != odds_dict:
+            logger.error("❌ Visão de dicionário da matriz difere de format_odds_data")
+            return False
+            
+        # Handicaps dos dois lados caem no mesmo mercado
+        spread_game = {
+            "id": "spread_001", "home_team": "Flamengo", "away_team": "Palmeiras",
+            "commence_time": "2024-01-01T20:00:00Z",
+            "bookmakers": [{"key": "pinnacle", "markets": [{"key": "spreads", "outcomes": [
+                {"name": "Flamengo", "price": 1.95, "point": -0.5},
+                {"name": "Palmeiras", "price": 1.90, "point": 0.5}
+            ]}]}]
+        }
+        spreads = OddsMatrix.from_games([spread_game])
+        if (spreads.markets != ["spreads #1"] or spreads.market_label(0, 0) != "spreads -0.5"
+                or spreads["Flamengo x Palmeiras"]["bookmakers"]["pinnacle"]["spreads"] != {
+                    "Flamengo -0.5": 1.95, "Palmeiras +0.5": 1.90}):
+            logger.error(f"❌ Mercado de handicap mal indexado: {spreads.markets}")
+            return False
+            
+        # Ligas com linhas diferentes não alargam o eixo de mercados dos outros jogos
+        def totals_game(game_id, home, lines):
+            return {
+                "id": game_id, "home_team": home, "away_team": "Visitante",
+                "commence_time": "2024-01-01T20:00:00Z",
+                "bookmakers": [{"key": "pinnacle", "markets": [{"key": "totals", "outcomes": [
+                    outcome for line in lines for outcome in (
+                        {"name": "Over", "price": 1.9, "point": line}, {"name": "Under", "price": 1.9, "point": line})
+                ]}]}]
+            }
+            
+        lined = OddsMatrix.from_games([totals_game(f"tot_{i:03d}", f"Time {i}", (0.5 + i, 1.5 + i)) for i in range(50)])
+        if (lined.markets != ["totals #1", "totals #2"] or lined.prices.shape != (50, 1, 2, len(lined.outcomes))
+                or lined.market_label(49, 1) != "totals 50.5"
+                or lined["Time 7 x Visitante"]["bookmakers"]["pinnacle"]["totals"] != {
+                    "Over 7.5": 1.9, "Under 7.5": 1.9, "Over 8.5": 1.9, "Under 8.5": 1.9}
+                or np.count_nonzero(~np.isnan(lined.market_prices("totals 2.5")[:, 0, :])) != 4):
+            logger.error(f"❌ Linhas por jogo mal distribuídas: {lined.markets}, densidade {lined.density:.2f}")
+            return False
+            
+        # Linha nova na mesma coluna conta como mudança, com o rótulo novo
+        moved = diff_odds(lined, OddsMatrix.from_games([totals_game("tot_000", "Time 0", (0.5, 2.0))]))
+        if moved.changed != {"Time 0 x Visitante": (("pinnacle", "totals 2"),)}:
+            logger.error(f"❌ Mudança de linha não detectada: {moved.changed}")
+            return False
+            
+        logger.info(f"✅ Matriz de odds OK - formato {matrix.prices.shape}, {matrix.nbytes} bytes")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro na matriz de odds: {e}")
+        return False
+
+def test_vectorized_analysis():
+    """Testa se a análise vetorizada coincide com a análise jogo a jogo."""
+    logger.info("Testando análise vetorizada...")
+    
+    try:
+        matrix = OddsMatrix.from_games(make_random_h2h_games(60))
+        vectorized = BettingAnalyzer(None, matrix)
+        scalar = BettingAnalyzer(None, dict(matrix.items()))
+        
+        if not vectorized.vectorized or scalar.vectorized:
+            logger.error("❌ Caminho de análise escolhido incorretamente")
+            return False
+            
+        for threshold in (0.0, 0.05, 0.2):
+            if vectorized.find_all_value_bets(threshold) != scalar.find_all_value_bets(threshold):
+                logger.error(f"❌ Apostas com valor divergem (limite {threshold})")
+                return False
+                
+        if vectorized.analyze_market_trends() != scalar.analyze_market_trends():
+            logger.error("❌ Tendências de mercado divergem")
+            return False
+            
+        if vectorized.generate_suggestions(max_suggestions=10) != scalar.generate_suggestions(max_suggestions=10):
+            logger.error("❌ Sugestões divergem")
+            return False
+            
+        total = sum(len(bets) for bets in vectorized.find_all_value_bets().values())
+        logger.info(f"✅ Análise vetorizada OK - {total} apostas com valor, idênticas ao caminho escalar")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro na análise vetorizada: {e}")
+        return False
+
+def test_snapshot():
+    """Testa o snapshot de sugestões calculado a cada atualização."""
+    logger.info("Testando snapshot de dados...")
+    
+    try:
+        collector = DataCollector()
+        games, odds = collector.get_todays_games_and_odds()
+        games_df = collector.format_games_data(games)
+        matrix = OddsMatrix.from_games(odds)
+        
+        store = SnapshotStore(max_suggestions=3)
+        if store.current is not None:
+            logger.error("❌ Snapshot deveria estar vazio antes da primeira atualização")
+            return False
+            
+        first = store.publish(games_df, matrix)
+        analyzer = BettingAnalyzer(games_df, matrix)
+        expected = analyzer.generate_suggestions(max_suggestions=3)
+        
+        if list(first.suggestions) != expected or first.suggestions_message != analyzer.format_suggestions_message(expected):
+            logger.error("❌ Snapshot difere da análise direta")
+            return False
+            
+        second = store.publish(games_df, matrix)
+        if store.current is not second or (first.version, second.version) != (1, 2):
+            logger.error(f"❌ Versionamento incorreto: {first.version}, {second.version}")
+            return False
+            
+        # Sem mudanças depois da meia-noite: a mensagem reaproveitada não pode ficar com a data de ontem
+        yesterday = datetime.now() - timedelta(days=1)
+        second.created_at = yesterday
+        second.suggestions_message = analyzer.format_suggestions_message(expected).replace(
+            datetime.now().strftime("%d/%m/%Y"), yesterday.strftime("%d/%m/%Y"))
+        third = store.publish(games_df, matrix)
+        if not third.changes.is_empty() or third.suggestions_message != analyzer.format_suggestions_message(expected):
+            logger.error("❌ Mensagem de sugestões ficou com a data do dia anterior")
+            return False
+            
+        logger.info(f"✅ Snapshot OK - versão {second.version}, {len(second.suggestions)} sugestões pré-calculadas")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro no snapshot: {e}")
+        return False
+
+def test_incremental_snapshot():
+    """Testa a reanálise apenas dos jogos cujas odds mudaram."""
+    logger.info("Testando reanálise incremental...")
+    
+    try:
+        games = make_random_h2h_games(40)
+        store = SnapshotStore(max_suggestions=10)
+        published = []
+        store.subscribe(lambda snapshot, changes: published.append(changes))
+        store.publish(None, OddsMatrix.from_games(games))
+        
+        # Alterar uma odd, remover uma casa de um jogo, tirar um jogo e incluir outro
+        updated = json.loads(json.dumps(games))
+        updated[3]["bookmakers"][1]["markets"][0]["outcomes"][0]["price"] += 0.5
+        del updated[7]["bookmakers"][4]
+        removed = updated.pop(12)
+        updated.extend(make_random_h2h_games(1, seed=99, start=100))
+        
+        matrix = OddsMatrix.from_games(updated)
+        snapshot = store.publish(None, matrix)
+        changes = published[-1]
+        
+        expected_changed = {"Casa 3 x Fora 3": ("pinnacle", "h2h"), "Casa 7 x Fora 7": ("williamhill", "h2h")}
+        if ({key: pairs[0] for key, pairs in changes.changed.items()} != expected_changed
+                or changes.added != ("Casa 100 x Fora 100",)
+                or changes.removed != (f"{removed['home_team']} x {removed['away_team']}",)):
+            logger.error(f"❌ Diferenças incorretas: {changes.summary()}")
+            return False
+            
+        full = BettingAnalyzer(None, matrix)
+        if snapshot.value_bets != full.find_all_value_bets() or list(snapshot.suggestions) != full.generate_suggestions(10):
+            logger.error("❌ Reanálise incremental difere da análise completa")
+            return False
+            
+        unchanged = store.publish(None, matrix)
+        if not published[-1].is_empty() or unchanged.suggestions is not snapshot.suggestions:
+            logger.error("❌ Atualização sem mudanças não reaproveitou a análise")
+            return False
+            
+        logger.info(f"✅ Reanálise incremental OK - {len(changes.affected)} de {len(matrix)} jogos reanalisados")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro na reanálise incremental: {e}")
+        return False
+
+def test_snapshot_persistence():
+    """Testa a gravação atômica e a carga sem cópia do snapshot."""
+    logger.info("Testando persistência do snapshot...")
+    
+    try:
+        collector = DataCollector()
+        games, odds = collector.get_todays_games_and_odds()
+        games_df = collector.format_games_data(games)
+        matrix = OddsMatrix.from_games(odds)
+        store = SnapshotStore(max_suggestions=3)
+        snapshot = store.publish(games_df, matrix)
+        
+        with tempfile.TemporaryDirectory() as path:
+            file_path = os.path.join(path, "snapshot.bin")
+            save_snapshot(snapshot, file_path)
+            if os.path.exists(file_path + ".tmp"):
+                logger.error("❌ Arquivo temporário não foi substituído")
+                return False
+                
+            loaded = load_snapshot(file_path)
+            if not isinstance(loaded.odds.prices, np.memmap) or loaded.odds.prices.flags.writeable:
+                logger.error("❌ Matriz de odds não foi mapeada do arquivo")
+                return False
+            if (not loaded.stale or snapshot.stale
+                    or not np.array_equal(loaded.odds.prices, matrix.prices, equal_nan=True)
+                    or not np.array_equal(loaded.odds.lines, matrix.lines, equal_nan=True)
+                    or loaded.odds.game_keys != matrix.game_keys
+                    or loaded.suggestions != snapshot.suggestions
+                    or loaded.suggestions_message != snapshot.suggestions_message
+                    or not loaded.games.equals(games_df)):
+                logger.error("❌ Snapshot carregado difere do gravado")
+                return False
+                
+            # Após o reinício: responde com o snapshot do disco e continua a numeração
+            restored = SnapshotStore(max_suggestions=3)
+            restored.restore(loaded)
+            refreshed = restored.publish(games_df, OddsMatrix.from_games(odds))
+            if (refreshed.version != snapshot.version + 1 or refreshed.stale
+                    or not refreshed.changes.is_empty() or refreshed.suggestions != snapshot.suggestions):
+                logger.error("❌ Atualização após restaurar o snapshot incorreta")
+                return False
+                
+            # Arquivo corrompido é ignorado
+            with open(file_path, "r+b") as f:
+                f.write(b"XXXXXXXX")
+            if load_snapshot(file_path) is not None:
+                logger.error("❌ Arquivo corrompido foi carregado")
+                return False
+                
+            logger.info(f"✅ Persistência do snapshot OK - v{loaded.version}, {loaded.odds.nbytes} bytes mapeados")
+            return True
+    except Exception as e:
+        logger.error(f"❌ Erro na persistência do snapshot: {e}")
+        return False
+
+class FakeLeagueCollector(DataCollector):
+    """Coletor que conta as buscas por liga e falha nas ligas marcadas."""
+    def __init__(self, kickoffs):
+        super().__init__()
+        self.kickoffs = kickoffs
+        self.calls = []
+        self.failing = set()
+        self.empty = set()
+            
+    async def resolve_sports(self, sports):
+        return list(sports)
+            
+    async def get_games_and_odds_by_sport(self, sports):
+        self.calls.append(sorted(sports))
+        await asyncio.sleep(0.01)
+        collected = {}
+        for n, sport in enumerate(sports):
+            if sport in self.failing:
+                continue
+            if sport in self.empty:
+                collected[sport] = ([], [])
+                continue
+            games = [dict(game, sport_key=sport, sport_title=sport, commence_time=self.kickoffs[sport])
+                     for game in make_random_h2h_games(3, start=10 * n + 100 * len(self.calls))]
+            collected[sport] = (games, [compact_event(game) for game in games])
+        return collected
+                
+async def test_refresh_scheduler():
+    """Testa a atualização em segundo plano com intervalo adaptativo por liga."""
+    logger.info("Testando agendador de atualizações...")
+    
+    try:
+        now = [datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc).timestamp()]
+        kickoffs = {"soccer_epl": "2024-01-01T12:20:00Z", "soccer_brazil": "2024-01-03T12:00:00Z"}
+        
+        collector = FakeLeagueCollector(kickoffs)
+        store = SnapshotStore(max_suggestions=3)
+        scheduler = RefreshScheduler(collector, store, list(kickoffs), min_interval=60,
+                                     max_interval=3600, clock=lambda: now[0])
+                                     
+        # Pedidos simultâneos viram uma única busca
+        snapshots = await asyncio.gather(*(scheduler.refresh() for _ in range(1000)))
+        if len(collector.calls) != 1 or any(snapshot is not snapshots[0] for snapshot in snapshots):
+            logger.error(f"❌ Atualizações simultâneas não foram unidas: {len(collector.calls)} buscas")
+            return False
+            
+        # Jogo em 20 min: intervalo mínimo; jogo em 2 dias: máximo
+        if scheduler.interval_for("soccer_epl") > 70 or scheduler.interval_for("soccer_brazil") != 3600:
+            logger.error(f"❌ Intervalos incorretos: {scheduler.status()}")
+            return False
+            
+        now[0] += 120
+        await scheduler.run_once()
+        if collector.calls[-1] != ["soccer_epl"] or scheduler.data_age("soccer_brazil") != 120:
+            logger.error(f"❌ Ligas vencidas incorretas: {collector.calls}")
+            return False
+            
+        # Falha de uma liga: dados anteriores continuam e a liga volta logo
+        collector.failing.add("soccer_epl")
+        before = store.current
+        now[0] += 120
+        await scheduler.run_once()
+        if store.current is not before or scheduler.leagues["soccer_epl"].next_due != now[0] + 60:
+            logger.error("❌ Falha de liga tratada incorretamente")
+            return False
+            
+        # Liga que já respondeu volta vazia enquanto outra atualiza: seus jogos continuam no snapshot
+        epl_games = {f"{game['home_team']} x {game['away_team']}" for game in scheduler.leagues["soccer_epl"].games}
+        collector.failing.clear()
+        collector.empty.add("soccer_epl")
+        now[0] += 120
+        snapshot = await scheduler.refresh(list(kickoffs))
+        published = {game['key'] for game in snapshot.odds.games} if snapshot else set()
+        if (snapshot is None or not epl_games or not epl_games <= published
+                or scheduler.leagues["soccer_epl"].failures != 2
+                or scheduler.leagues["soccer_epl"].next_due != now[0] + 120):
+            logger.error("❌ Resposta vazia apagou os dados da liga")
+            return False
+        collector.empty.clear()
+            
+        # Tarefa diária dispara no horário
+        sent = []
+        async def daily():
+            sent.append(now[0])
+        scheduler.schedule_daily(datetime.fromtimestamp(now[0] + 600).strftime("%H:%M"), daily)
+        now[0] += 660
+        await scheduler.run_once()
+        await asyncio.sleep(0)
+        if len(sent) != 1:
+            logger.error("❌ Tarefa diária não foi executada")
+            return False
+            
+        logger.info(f"✅ Agendador OK - {len(collector.calls)} buscas, status: "
+                    f"{[(s['league'], round(s['interval'])) for s in scheduler.status()]}")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro no agendador de atualizações: {e}")
+        return False
+
+async def test_state_backend():
+    """Testa vários workers com um único líder e o mesmo snapshot versionado."""
+    logger.info("Testando estado compartilhado entre workers...")
+    
+    try:
+        now = [datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc).timestamp()]
+        kickoffs = {"soccer_epl": "2024-01-01T12:20:00Z", "soccer_brazil": "2024-01-03T12:00:00Z"}
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            workers = []
+            for i in range(3):
+                backend = SQLiteStateBackend(db_path=os.path.join(tmp, "state.db"),
+                                             snapshot_path=os.path.join(tmp, "snapshot.bin"),
+                                             lease_ttl=60, node_id=f"worker-{i}", clock=lambda: now[0])
+                collector = FakeLeagueCollector(kickoffs)
+                store = SnapshotStore(max_suggestions=3)
+                scheduler = RefreshScheduler(collector, store, list(kickoffs), min_interval=60, max_interval=3600,
+                                             clock=lambda: now[0], backend=backend)
+                workers.append((collector, store, scheduler))
+            
+            def fetches():
+                return sum(len(collector.calls) for collector, _, _ in workers)
+            
+            def versions():
+                return {store.current.version if store.current else None for _, store, _ in workers}
+                
+            # Um único líder busca; os seguidores leem a mesma versão
+            for _, _, scheduler in workers:
+                await scheduler.run_once()
+            await workers[2][2].refresh()
+            leaders = [i for i, (_, _, scheduler) in enumerate(workers) if scheduler.leader]
+            if leaders != [0] or fetches() != 1 or versions() != {1}:
+                logger.error(f"❌ Líderes {leaders}, {fetches()} buscas, versões {versions()}")
+                return False
+            if not np.array_equal(workers[1][1].current.odds.prices, workers[0][1].current.odds.prices, equal_nan=True):
+                logger.error("❌ Seguidor com odds diferentes do líder")
+                return False
+                
+            now[0] += 120
+            for _, _, scheduler in workers:
+                await scheduler.run_once()
+            if fetches() != 2 or versions() != {2} or workers[2][2].data_age("soccer_brazil") != 120:
+                logger.error(f"❌ Seguidores não acompanharam o líder: versões {versions()}")
+                return False
+                
+            # O líder para de renovar a concessão: outro worker assume e busca todas as ligas
+            now[0] += 61
+            await workers[1][2].run_once()
+            await workers[0][2].run_once()
+            await workers[2][2].run_once()
+            if not workers[1][2].leader or workers[0][2].leader or workers[1][0].calls[-1] != sorted(kickoffs):
+                logger.error("❌ Liderança não passou para outro worker")
+                return False
+            if versions() != {3}:
+                logger.error(f"❌ Numeração de versões não continuou: {versions()}")
+                return False
+                
+            # O antigo líder não consegue mais publicar
+            if workers[0][2].backend.publish(workers[0][1].current):
+                logger.error("❌ Antigo líder publicou um snapshot")
+                return False
+            files = sorted(name for name in os.listdir(tmp) if name.startswith("snapshot"))
+            if len(files) != 1:
+                logger.error(f"❌ Arquivos de snapshot antigos ficaram no disco: {files}")
+                return False
+                
+        logger.info(f"✅ Estado compartilhado OK - 3 workers, {fetches()} buscas, versão {versions().pop()}")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro no estado compartilhado: {e}")
+        return False
+
+def test_top_k_suggestions():
+    """Testa a seleção das K melhores sugestões com desempate."""
+    logger.info("Testando seleção top-K de sugestões...")
+    
+    try:
+        def game(kickoff, home_price):
+            return {"commence_time": kickoff, "bookmakers": {
+                "pinnacle": {"h2h": {"Casa": 2.0, "Empate": 3.4, "Fora": 4.0}},
+                "bet365": {"h2h": {"Casa": home_price, "Empate": 3.0, "Fora": 3.3}}
+            }}
+            
+        # A melhor aposta está no último jogo; duas empatam no valor e diferem no horário
+        odds_dict = {
+            "A x B": game("2024-01-01T20:00:00Z", 2.5),
+            "C x D": game("2024-01-01T22:00:00Z", 2.8),
+            "E x F": game("2024-01-01T18:00:00Z", 2.8),
+            "G x H": game("2024-01-01T21:00:00Z", 3.2)
+        }
+        top = BettingAnalyzer(None, odds_dict).generate_suggestions(max_suggestions=3)
+        if [s['game'] for s in top] != ["G x H", "E x F", "C x D"]:
+            logger.error(f"❌ Ordem incorreta: {[(s['game'], s['outcome']) for s in top]}")
+            return False
+            
+        # Caminho vetorizado (partição) = heap sobre todas as apostas = ordenação completa
+        matrix = OddsMatrix.from_games(make_random_h2h_games(200))
+        analyzer = BettingAnalyzer(None, matrix)
+        everything = sorted(
+            (analyzer._make_suggestion(key, bet) for key, bets in analyzer.find_all_value_bets().items() for bet in bets),
+            key=suggestion_rank, reverse=True
+        )
+        for k in (1, 5, 37, len(everything) + 10):
+            vectorized = analyzer.generate_suggestions(k)
+            heap = analyzer.generate_suggestions(k, value_bets=analyzer.find_all_value_bets())
+            if vectorized != heap or [suggestion_rank(s) for s in heap] != [suggestion_rank(s) for s in everything[:k]]:
+                logger.error(f"❌ Top-{k} difere da ordenação completa")
+                return False
+                
+        logger.info(f"✅ Seleção top-K OK - {len(everything)} apostas com valor")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro na seleção top-K: {e}")
+        return False
+
+def test_arbitrage():
+    """Testa a varredura de arbitragem entre casas."""
+    logger.info("Testando varredura de arbitragem...")
+    
+    try:
+        def bookmaker(key, markets):
+            return {"key": key, "markets": [{"key": market, "outcomes": outcomes} for market, outcomes in markets.items()]}
+            
+        game = {
+            "id": "arb_001", "home_team": "Flamengo", "away_team": "Palmeiras",
+            "commence_time": "2024-01-01T20:00:00Z",
+            "bookmakers": [
+                bookmaker("bet365", {
+                    # h2h de três vias: casa e fora altos, mas o empate impede a arbitragem
+                    "h2h": [{"name": "Flamengo", "price": 3.2}, {"name": "Draw", "price": 2.5}, {"name": "Palmeiras", "price": 2.0}],
+                    "totals": [{"name": "Over", "price": 2.10, "point": 2.5}, {"name": "Under", "price": 1.70, "point": 2.5}],
+                    "spreads": [{"name": "Flamengo", "price": 2.08, "point": -0.5}, {"name": "Palmeiras", "price": 1.75, "point": 0.5}]
+                }),
+                bookmaker("pinnacle", {
+                    "h2h": [{"name": "Flamengo", "price": 2.4}, {"name": "Draw", "price": 2.5}, {"name": "Palmeiras", "price": 3.3}],
+                    "totals": [{"name": "Over", "price": 1.80, "point": 2.5}, {"name": "Under", "price": 2.05, "point": 2.5}],
+                    "spreads": [{"name": "Flamengo", "price": 1.85, "point": -0.5}, {"name": "Palmeiras", "price": 1.95, "point": 0.5}]
+                })
+            ]
+        }
+        opportunities = scan_arbitrage(OddsMatrix.from_games([game]))
+        
+        if sorted(o['market'] for o in opportunities) != ["spreads -0.5", "totals 2.5"]:
+            logger.error(f"❌ Mercados com arbitragem incorretos: {[o['market'] for o in opportunities]}")
+            return False
+            
+        totals = next(o for o in opportunities if o['market'] == "totals 2.5")
+        legs = {leg['outcome']: (leg['bookmaker'], leg['odds']) for leg in totals['legs']}
+        if legs != {"Over 2.5": ("bet365", 2.10), "Under 2.5": ("pinnacle", 2.05)}:
+            logger.error(f"❌ Pernas da arbitragem incorretas: {legs}")
+            return False
+            
+        # Chaves de casas com "_" não podem quebrar o Markdown da mensagem
+        exchange = dict(totals, legs=[dict(totals['legs'][0], bookmaker="betfair_ex_eu")] + totals['legs'][1:])
+        message = format_arbitrage_message([exchange])
+        if "(betfair\\_ex\\_eu)" not in message:
+            logger.error(f"❌ Casa não escapada na mensagem: {message}")
+            return False
+            
+        # Retorno igual em qualquer resultado
+        stakes, payout = split_stakes(totals, 100.0)
+        if abs(sum(stakes) - 100.0) > 1e-9 or any(abs(s * leg['odds'] - payout) > 1e-9 for s, leg in zip(stakes, totals['legs'])):
+            logger.error(f"❌ Divisão de valores incorreta: {stakes} -> {payout}")
+            return False
+            
+        matrix = OddsMatrix.from_games(make_random_h2h_games(3000))
+        start = time.perf_counter()
+        found = scan_arbitrage(matrix)
+        elapsed = time.perf_counter() - start
+        
+        logger.info(f"✅ Arbitragem OK - retorno de {totals['profit'] * 100:.2f}% no totals; "
+                    f"{len(found)} oportunidades em {len(matrix)} jogos em {elapsed * 1000:.1f}ms")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro na varredura de arbitragem: {e}")
+        return False
+
+def test_consensus():
+    """Testa a probabilidade de consenso sem margem entre casas."""
+    logger.info("Testando probabilidade de consenso...")
+    
+    try:
+        # Favorito, empate e azarão com margem de ~6%
+        implied = np.array([[1 / 1.40, 1 / 4.60, 1 / 8.00]])
+        fair = {method: devig(implied, method)[0] for method in DEVIG_METHODS}
+        
+        for method, probs in fair.items():
+            if abs(probs.sum() - 1.0) > 1e-9:
+                logger.error(f"❌ Probabilidades de {method} não somam 1: {probs}")
+                return False
+                
+        # Shin e potência tiram mais margem do azarão (viés favorito-azarão)
+        if not (fair["shin"][2] < fair["multiplicative"][2] and fair["power"][2] < fair["multiplicative"][2]):
+            logger.error(f"❌ Viés favorito-azarão não corrigido: {fair}")
+            return False
+            
+        # Casa "sharp" pesa mais no consenso
+        game_odds = {"bookmakers": {
+            "pinnacle": {"h2h": {"A": 1.50, "Draw": 4.20, "B": 7.00}},
+            "softbook": {"h2h": {"A": 1.90, "Draw": 3.40, "B": 4.20}}
+        }}
+        sharp = BettingAnalyzer(None, {}, devig_method="multiplicative", weights={"pinnacle": 3.0})
+        flat = BettingAnalyzer(None, {}, devig_method="multiplicative", weights={})
+        if not sharp.consensus_probabilities(game_odds)["A"] > flat.consensus_probabilities(game_odds)["A"]:
+            logger.error("❌ Peso das casas sharp não aplicado")
+            return False
+            
+        # Com 1/N, o azarão parecia ter valor; contra o consenso, não tem
+        if any(bet['outcome'] == "B" for bet in sharp.find_value_bets(game_odds)):
+            logger.error("❌ Aposta no azarão marcada como valor")
+            return False
+            
+        # Caminho vetorizado idêntico ao escalar em todos os métodos
+        matrix = OddsMatrix.from_games(make_random_h2h_games(80, seed=3))
+        for method in DEVIG_METHODS:
+            vectorized = BettingAnalyzer(None, matrix, devig_method=method).find_all_value_bets()
+            scalar = BettingAnalyzer(None, dict(matrix.items()), devig_method=method).find_all_value_bets()
+            if vectorized != scalar:
+                logger.error(f"❌ Caminhos vetorizado e escalar divergem com {method}")
+                return False
+                
+        logger.info(f"✅ Consenso OK - azarão a 8.00: {', '.join(f'{m} {p[2]:.4f}' for m, p in fair.items())}")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro no consenso: {e}")
+        return False
+
+def test_market_kernels():
+    """Testa a análise de valor nos mercados totals e spreads."""
+    logger.info("Testando kernels de mercado...")
+    
+    try:
+        def book(key, over_25, under_25, over_35, under_35, home_spread, away_spread):
+            return {"key": key, "markets": [
+                {"key": "h2h", "outcomes": [{"name": "Flamengo", "price": 2.1}, {"name": "Draw", "price": 3.3}, {"name": "Palmeiras", "price": 3.6}]},
+                {"key": "totals", "outcomes": [
+                    {"name": "Over", "price": over_25, "point": 2.5}, {"name": "Under", "price": under_25, "point": 2.5},
+                    {"name": "Over", "price": over_35, "point": 3.5}, {"name": "Under", "price": under_35, "point": 3.5}
+                ]},
+                {"key": "spreads", "outcomes": [
+                    {"name": "Flamengo", "price": home_spread, "point": -0.5}, {"name": "Palmeiras", "price": away_spread, "point": 0.5}
+                ]}
+            ]}
+            
+        game = {
+            "id": "mk_001", "home_team": "Flamengo", "away_team": "Palmeiras",
+            "commence_time": "2024-01-01T20:00:00Z",
+            "bookmakers": [
+                book("pinnacle", 1.95, 1.95, 3.20, 1.36, 1.90, 1.95),
+                # Casa "mole": Over 2.5 e Flamengo -0.5 acima do consenso; linha 3.5 alinhada
+                book("softbook", 2.60, 1.50, 3.10, 1.35, 2.45, 1.55)
+            ]
+        }
+        analyzer = BettingAnalyzer(None, OddsMatrix.from_games([game]), weights={"pinnacle": 3.0})
+        bets = {(bet['market'], bet['outcome'], bet['bookmaker']) for bet in analyzer.find_all_value_bets()["Flamengo x Palmeiras"]}
+        
+        if bets != {("totals", "Over 2.5", "softbook"), ("spreads", "Flamengo -0.5", "softbook")}:
+            logger.error(f"❌ Apostas com valor incorretas: {bets}")
+            return False
+            
+        # Cada linha tem o seu consenso
+        markets = analyzer.analyze_markets()
+        matrix = analyzer.odds_data
+        for label in ("totals 2.5", "totals 3.5", "spreads -0.5"):
+            fair = markets['fair'][0, matrix.market_column(0, label)]
+            if abs(np.nansum(fair) - 1.0) > 1e-9:
+                logger.error(f"❌ Consenso de {label} não soma 1: {fair}")
+                return False
+                
+        suggestions = analyzer.generate_suggestions(5)
+        message = analyzer.format_suggestions_message(suggestions)
+        if "Total de Gols - Mais de 2.5" not in message or "Handicap - Flamengo -0.5" not in message:
+            logger.error("❌ Sugestões de totals/spreads mal formatadas")
+            return False
+            
+        logger.info(f"✅ Kernels de mercado OK - {len(bets)} apostas com valor em totals/spreads")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro nos kernels de mercado: {e}")
+        return False
+
+def test_odds_history():
+    """Testa o histórico de odds em disco e as consultas de movimento de linha."""
+    logger.info("Testando histórico de odds...")
+    
+    try:
+        def matrix(prices, event_id="hist_001", kickoff="2024-01-01T20:00:00Z"):
+            return OddsMatrix.from_games([{
+                "id": event_id, "home_team": "Flamengo", "away_team": "Palmeiras",
+                "commence_time": kickoff,
+                "bookmakers": [{"key": bookie, "markets": [{"key": "h2h", "outcomes": [
+                    {"name": "Flamengo", "price": home}, {"name": "Draw", "price": 3.3}, {"name": "Palmeiras", "price": 3.6}
+                ]}]} for bookie, home in prices.items()]
+            }])
+            
+        with tempfile.TemporaryDirectory() as path:
+            history = OddsHistory(path, clock=lambda: 10_000)
+            
+            # Abertura: 4 casas x 3 resultados
+            if history.record(matrix({"a": 2.10, "b": 2.12, "c": 2.08, "d": 2.15}), ts=1_000) != 12:
+                logger.error("❌ Abertura não gravou todas as séries")
+                return False
+            # Nada mudou: nenhum registro
+            if history.record(matrix({"a": 2.10, "b": 2.12, "c": 2.08, "d": 2.15}), ts=5_000) != 0:
+                logger.error("❌ Atualização sem mudanças gravou registros")
+                return False
+            # Steam: três casas encurtam o mandante; d retira a odd
+            if history.record(matrix({"a": 1.90, "b": 1.92, "c": 1.88}), ts=9_500) != 6:
+                logger.error("❌ Mudanças gravadas incorretamente")
+                return False
+                
+            if os.path.getsize(os.path.join(path, "records.bin")) != 18 * RECORD_DTYPE.itemsize:
+                logger.error("❌ Tamanho do arquivo de registros incorreto")
+                return False
+                
+            moves = history.steam_moves(window=900, min_move=0.05, min_bookmakers=3)
+            if len(moves) != 1 or moves[0]['outcome'] != "Flamengo" or moves[0]['bookmakers'] != ["a", "b", "c"]:
+                logger.error(f"❌ Steam move não detectado: {moves}")
+                return False
+            if history.steam_moves(window=300, min_move=0.05, min_bookmakers=3):
+                logger.error("❌ Steam move fora da janela")
+                return False
+                
+            drifts = history.biggest_drifts(limit=2)
+            if [d['bookmaker'] for d in drifts] != ["c", "a"] or abs(drifts[0]['change'] - (1.88 / 2.08 - 1)) > 1e-12:
+                logger.error(f"❌ Maiores variações incorretas: {drifts}")
+                return False
+            message = format_line_movement_message(moves, [dict(drifts[0], bookmaker="betfair_ex_uk")])
+            if "(betfair\\_ex\\_uk)" not in message:
+                logger.error(f"❌ Casa não escapada na mensagem: {message}")
+                return False
+                
+            # Reabrir reconstrói o estado a partir do disco
+            reopened = OddsHistory(path, clock=lambda: 10_000)
+            if reopened.opening_vs_current("hist_001") != history.opening_vs_current("hist_001"):
+                logger.error("❌ Histórico reaberto difere do original")
+                return False
+                
+            points = reopened.price_history("hist_001", bookmaker="d")[0]['points']
+            if points != [(1_000, 2.15), (9_500, 0.0)]:
+                logger.error(f"❌ Evolução de preço incorreta: {points}")
+                return False
+                
+            # Outro processo (o líder) grava; o histórico aberto acompanha com catch_up
+            history.record(matrix({"a": 1.80, "b": 1.92, "c": 1.88, "e": 2.00}), ts=9_800)
+            if reopened.catch_up() != 4 or reopened.opening_vs_current() != history.opening_vs_current():
+                logger.error("❌ Histórico aberto não acompanhou as gravações de outro processo")
+                return False
+                
+            # Jogo de volta entre os mesmos times: outro evento, outras séries
+            before = history.opening_vs_current("hist_001")
+            history.record(matrix({"a": 2.50, "b": 2.55}, event_id="hist_002", kickoff="2024-02-01T20:00:00Z"), ts=9_900)
+            openings = {(o['bookmaker'], o['outcome']): o['opening'] for o in history.opening_vs_current("hist_002")}
+            if (history.opening_vs_current("hist_001") != before or openings.get(("a", "Flamengo")) != 2.50
+                    or len(openings) != 6 or history.opening_vs_current("hist_002")[0]['game'] != "Flamengo x Palmeiras"):
+                logger.error(f"❌ Jogos diferentes entre os mesmos times dividiram séries: {openings}")
+                return False
+                
+            # Gravação na thread que publica os snapshots e catch_up no loop do bot, ao mesmo tempo
+            shared_path = os.path.join(path, "concorrente")
+            shared = OddsHistory(shared_path, clock=lambda: 10_000)
+            done = threading.Event()
+            def publish():
+                for i in range(150):
+                    shared.record(matrix({"a": 2.0 + i / 100, "b": 2.10, f"x{i}": 1.50}), ts=20_000 + i)
+                done.set()
+            writer = threading.Thread(target=publish)
+            writer.start()
+            while not done.is_set():
+                shared.catch_up()
+                shared.biggest_drifts(limit=3)
+            writer.join()
+            rebuilt = OddsHistory(shared_path, clock=lambda: 10_000)
+            if rebuilt.series != shared.series or rebuilt.opening_vs_current() != shared.opening_vs_current():
+                logger.error("❌ Gravação e catch_up simultâneos corromperam o histórico")
+                return False
+                
+            logger.info(f"✅ Histórico de odds OK - {len(reopened)} registros, steam em {len(moves[0]['bookmakers'])} casas")
+            return True
+    except Exception as e:
+        logger.error(f"❌ Erro no histórico de odds: {e}")
+        return False
+
+def test_update_dispatcher():
+    """Testa a fila limitada do webhook: aceite imediato, contrapressão e entrega."""
+    logger.info("Testando fila de updates do webhook...")
+    
+    try:
+        from telegram import Bot
+        
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        
+        def run(coro):
+            return asyncio.run_coroutine_threadsafe(coro, loop).result(30)
+            
+        with FakeTelegramAPI(delay=0.005) as api:
+            bot = Bot("123:teste", base_url=api.bot_url)
+            run(bot.initialize())
+            
+            async def handle(payload):
+                await bot.send_message(chat_id=payload["message"]["chat"]["id"], text="ok")
+                
+            dispatcher = UpdateDispatcher(handle, loop, workers=4, max_queue=50)
+            run(dispatcher.start())
+            
+            # Rajada muito maior que a fila: o excedente é recusado na hora
+            timings, accepted = [], 0
+            for update_id in range(500):
+                start = time.perf_counter()
+                accepted += dispatcher.submit({"update_id": update_id, "message": {"chat": {"id": update_id}}})
+                timings.append(time.perf_counter() - start)
+                
+            run(dispatcher.stop())
+            run(bot.shutdown())
+            stats = dispatcher.stats()
+            sent = api.sent_count
+            
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+        
+        median = sorted(timings)[len(timings) // 2]
+        if not stats['rejected'] or stats['rejected'] + accepted != 500:
+            logger.error(f"❌ Fila não recusou o excedente: {stats}")
+            return False
+        if stats['processed'] != accepted or stats['pending'] or sent != accepted:
+            logger.error(f"❌ Updates aceitos não foram entregues: {stats}, {sent} mensagens")
+            return False
+        if median > 0.001:
+            logger.error(f"❌ Enfileirar levou {median * 1e3:.3f} ms")
+            return False
+            
+        logger.info(f"✅ Fila de updates OK - {accepted} entregues, {stats['rejected']} recusados, "
+                    f"enfileirar em {median * 1e6:.0f} µs")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro na fila de updates: {e}")
+        return False
+
+async def test_broadcast():
+    """Testa o envio em massa: limites de taxa, 429, chats bloqueados e retomada após queda."""
+    logger.info("Testando envio em massa...")
+    
+    try:
+        from telegram import Bot
+        
+        # Balde: rajada até a capacidade, depois a taxa média
+        clock = [0.0]
+        bucket = TokenBucket(10, capacity=5, clock=lambda: clock[0])
+        burst = sum(bucket.reserve() == 0 for _ in range(10))
+        clock[0] += 0.5
+        refill = sum(bucket.reserve() == 0 for _ in range(10))
+        if burst != 5 or refill != 5:
+            logger.error(f"❌ Balde de fichas incorreto: {burst} na rajada, {refill} após 0,5s")
+            return False
+            
+        chats = list(range(1000, 1600))
+        blocked = {1003, 1250, 1599}
+        
+        with tempfile.TemporaryDirectory() as tmp, FakeTelegramAPI(fail_chats=blocked) as api:
+            bot = Bot("123:teste", base_url=api.bot_url)
+            await bot.initialize()
+            store = SubscriptionStore(os.path.join(tmp, "subscriptions.db"))
+            store.subscribe_many(chats)
+            
+            # 429 no meio do envio: tudo pausa pelo retry_after e os chats são reenviados
+            api.fail_next(3, retry_after=1)
+            engine = BroadcastEngine(bot, store, rate=1000, concurrency=32, batch_size=100)
+            start = time.perf_counter()
+            result = await engine.broadcast("daily-teste", "Sugestões do dia")
+            elapsed = time.perf_counter() - start
+            
+            delivered = [chat for chat, _ in api.sent]
+            if sorted(delivered) != sorted(set(chats) - blocked) or result['sent'] != len(chats) - len(blocked):
+                logger.error(f"❌ Entregas incorretas: {len(delivered)} mensagens, {result}")
+                return False
+            if api.rate_limited != 3 or elapsed < 1.0:
+                logger.error(f"❌ retry_after não respeitado ({elapsed:.2f}s)")
+                return False
+            if store.count() != len(chats) - len(blocked) or store.is_subscribed(1250):
+                logger.error("❌ Chats bloqueados continuaram inscritos")
+                return False
+                
+            # Mesmo ID: nada é reenviado
+            await engine.broadcast("daily-teste", "Sugestões do dia")
+            if len(api.sent) != len(delivered):
+                logger.error("❌ Envio concluído foi repetido")
+                return False
+                
+            # Queda no meio do envio: outro motor retoma do último lote gravado
+            api.sent.clear()
+            crashed = BroadcastEngine(bot, store, rate=200, concurrency=8, batch_size=50)
+            task = asyncio.ensure_future(crashed.broadcast("daily-queda", "Sugestões de amanhã"))
+            while api.sent_count < 230:
+                await asyncio.sleep(0.01)
+            await crashed.stop()
+            await asyncio.gather(task, return_exceptions=True)
+            
+            resumed = await BroadcastEngine(bot, store, rate=1000, batch_size=50).resume_pending()
+            counts = {}
+            for chat, _ in api.sent:
+                counts[chat] = counts.get(chat, 0) + 1
+            duplicates = sum(count - 1 for count in counts.values())
+            await bot.shutdown()
+            
+            if len(resumed) != 1 or set(counts) != set(chats) - blocked or duplicates > 50:
+                logger.error(f"❌ Retomada incorreta: {len(counts)} chats, {duplicates} repetidos")
+                return False
+                
+        logger.info(f"✅ Envio em massa OK - {len(delivered)} entregues em {elapsed:.2f}s (3 respostas 429), "
+                    f"retomada com {duplicates} reenvios")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro no envio em massa: {e}")
+        return False
+
+async def test_alerts():
+    """Testa os alertas de valor: índice de regras, apostas novas ou melhores e envio."""
+    logger.info("Testando alertas de valor...")
+    
+    try:
+        from telegram import Bot
+        
+        # Índice: mesmo resultado que percorrer todas as regras
+        rng = random.Random(5)
+        leagues, markets = ["soccer_epl", "soccer_laliga", "soccer_brazil"], ["h2h", "totals", "spreads"]
+        rules = [(chat_id, round(rng.uniform(0, 0.3), 3),
+                  rng.sample(leagues, rng.randint(0, 2)), rng.sample(markets, rng.randint(0, 2)))
+                 for chat_id in range(20000)]
+        index = AlertIndex(rules)
+        for chat_id in range(0, 20000, 7):
+            index.remove(chat_id)
+        live = [rule for rule in rules if rule[0] % 7]
+        bets = [(rng.choice(leagues), rng.choice(markets), rng.uniform(0, 0.3)) for _ in range(200)]
+        start = time.perf_counter()
+        matched = [sorted(index.match(*bet)) for bet in bets]
+        match_time = (time.perf_counter() - start) / len(bets)
+        expected = [sorted(chat_id for chat_id, min_value, rule_leagues, rule_markets in live
+                           if value >= min_value and (not rule_leagues or league in rule_leagues)
+                           and (not rule_markets or market in rule_markets))
+                    for league, market, value in bets]
+        if matched != expected:
+            logger.error("❌ Índice de alertas difere da busca em todas as regras")
+            return False
+            
+        # Pipeline: só apostas novas ou melhores, para os chats cuja regra aceita
+        games = [dict(game, sport_key="soccer_epl") for game in make_random_h2h_games(30)]
+        snapshots = SnapshotStore(max_suggestions=10)
+        first = snapshots.publish(None, OddsMatrix.from_games(games))
+        
+        updated = json.loads(json.dumps(games))
+        updated[4]["bookmakers"][0]["markets"][0]["outcomes"][0]["price"] = 40.0
+        updated[9]["bookmakers"][2]["markets"][0]["outcomes"][-1]["price"] += 6.0
+        second = snapshots.publish(None, OddsMatrix.from_games(updated))
+        
+        with tempfile.TemporaryDirectory() as tmp, FakeTelegramAPI(fail_chats={3}) as api:
+            store = SubscriptionStore(os.path.join(tmp, "subscriptions.db"))
+            store.set_alert(1, 0.0)
+            store.set_alert(2, 0.05, ["soccer_epl"], ["h2h"])
+            store.set_alert(3, 0.0, markets=["h2h"])
+            store.set_alert(4, 0.0, ["soccer_laliga"])
+            store.set_alert(5, 1000.0)
+            pipeline = AlertPipeline(store, min_improvement=0.02)
+            
+            if pipeline.process(None, first, first.changes):
+                logger.error("❌ Primeira atualização gerou alertas")
+                return False
+            messages = pipeline.process(snapshots.previous, second, second.changes)
+            
+            before = {(game, bet['bookmaker'], bet['market'], bet['outcome']): bet['value']
+                      for game, game_bets in first.value_bets.items() for bet in game_bets}
+            fresh = [game for game, game_bets in second.value_bets.items() for bet in game_bets
+                     if before.get((game, bet['bookmaker'], bet['market'], bet['outcome']), -1) + 0.02 <= bet['value']]
+            if not fresh or set(fresh) - {"Casa 4 x Fora 4", "Casa 9 x Fora 9"}:
+                logger.error(f"❌ Cenário sem alertas esperados: {fresh}")
+                return False
+            if set(messages) != {1, 2, 3} or messages[1].count("⚽") != min(len(fresh), pipeline.max_per_message):
+                logger.error(f"❌ Alertas para os chats errados: {sorted(messages)}")
+                return False
+            if pipeline.process(second, second, second.changes):
+                logger.error("❌ Apostas já alertadas geraram alertas de novo")
+                return False
+                
+            # Envio com os limites do BroadcastEngine; quem bloqueou o bot perde a regra
+            bot = Bot("123:teste", base_url=api.bot_url)
+            await bot.initialize()
+            outcomes = await pipeline.deliver(BroadcastEngine(bot, store, rate=1000), messages)
+            await bot.shutdown()
+            
+            if outcomes != {1: "sent", 2: "sent", 3: "blocked"} or store.get_alert(3) is not None:
+                logger.error(f"❌ Envio dos alertas incorreto: {outcomes}")
+                return False
+            if not pipeline.refresh_rules() or len(pipeline.index) != 4:
+                logger.error("❌ Índice não acompanhou a mudança das regras")
+                return False
+                
+        # Nomes com "_" não podem quebrar o Markdown do alerta (o envio falharia para todos os chats)
+        message = format_alert_message([{'game': "Atletico_MG x Fora", 'market': "h2h", 'outcome': "Atletico_MG",
+                                         'odds': 2.5, 'value': 0.1, 'previous_value': None,
+                                         'bookmaker': "betfair_ex_eu"}])
+        if "Atletico_MG" in message or "⚽ Atletico\\_MG x Fora" not in message or "betfair\\_ex\\_eu" not in message:
+            logger.error(f"❌ Nomes não escapados no alerta: {message}")
+            return False
+            
+        logger.info(f"✅ Alertas de valor OK - {len(fresh)} apostas novas ou melhores, "
+                    f"{match_time * 1e6:.0f} µs por aposta com {len(live)} regras")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro nos alertas de valor: {e}")
+        return False
+
+def test_profiles():
+    """Testa os perfis dos usuários e a busca das sugestões filtradas nos índices."""
+    logger.info("Testando perfis dos usuários...")
+    
+    try:
+        leagues = ["soccer_epl", "soccer_laliga", "soccer_brazil", "basketball_nba"]
+        games = [dict(game, sport_key=leagues[i % len(leagues)])
+                 for i, game in enumerate(make_random_h2h_games(300, seed=11))]
+        snapshot = SnapshotStore(max_suggestions=20).publish(None, OddsMatrix.from_games(games))
+        index = snapshot.suggestion_index()
+        league_of = {f"{game['home_team']} x {game['away_team']}": game['sport_key'] for game in games}
+        
+        if index.query(dict(DEFAULT_PROFILE, tips=20)) != list(snapshot.suggestions):
+            logger.error("❌ Perfil padrão difere das sugestões do snapshot")
+            return False
+            
+        rng = random.Random(3)
+        bookmakers = ["bet365", "pinnacle", "betfair", "unibet", "williamhill"]
+        profiles = [dict(DEFAULT_PROFILE,
+                         leagues=rng.sample(leagues, rng.randint(0, 2)),
+                         markets=rng.sample(["h2h", "totals"], rng.randint(0, 1)),
+                         bookmakers=rng.sample(bookmakers, rng.randint(0, 3)),
+                         min_odds=rng.choice([1.0, 2.0, 4.0]),
+                         min_value=rng.choice([0.0, 0.1, 0.3]),
+                         tips=rng.randint(1, 20))
+                    for _ in range(300)]
+        start = time.perf_counter()
+        results = [index.query(profile) for profile in profiles]
+        query_time = (time.perf_counter() - start) / len(profiles)
+        
+        for profile, result in zip(profiles, results):
+            expected = [s for s in index.suggestions
+                        if s['value'] >= profile['min_value'] and s['odds'] >= profile['min_odds']
+                        and (not profile['leagues'] or league_of[s['game']] in profile['leagues'])
+                        and (not profile['markets'] or s['market'] in profile['markets'])
+                        and (not profile['bookmakers'] or s['bookmaker'] in profile['bookmakers'])][:profile['tips']]
+            if result != expected:
+                logger.error(f"❌ Busca pelo perfil difere do filtro completo: {profile}")
+                return False
+                
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ProfileStore(os.path.join(tmp, "profiles.db"))
+            store.update(42, leagues=["soccer_epl", "soccer_epl"], min_value=0.05)
+            store.update(42, tips=500)
+            reopened = ProfileStore(os.path.join(tmp, "profiles.db")).get(42)
+            if reopened != dict(DEFAULT_PROFILE, leagues=["soccer_epl"], min_value=0.05, tips=20):
+                logger.error(f"❌ Perfil gravado incorretamente: {reopened}")
+                return False
+            store.reset(42)
+            if store.get(42) != DEFAULT_PROFILE:
+                logger.error("❌ Perfil não voltou ao padrão")
+                return False
+                
+        logger.info(f"✅ Perfis OK - {len(index)} apostas indexadas, {query_time * 1e6:.0f} µs por busca")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro nos perfis: {e}")
+        return False
+
+def test_render_cache():
+    """Testa o cache de mensagens formatadas por versão do snapshot."""
+    logger.info("Testando cache de mensagens...")
+    
+    try:
+        import pandas as pd
+        
+        rng = random.Random(9)
+        games_df = pd.DataFrame([{"league": rng.choice(["Premier League", "La Liga", "Brasileirão"]),
+                                  "home_team": f"Casa {i}", "away_team": f"Fora {i}", "time": f"{i % 24:02d}:00"}
+                                 for i in range(60)])
+        
+        # LRU: acerto na repetição, remoção da menos usada
+        cache = RenderCache(max_entries=2)
+        builds = []
+        for view in (("odds", "a"), ("odds", "b"), ("odds", "a"), ("odds", "c"), ("odds", "b")):
+            cache.get(1, view, lambda: builds.append(view) or f"card {view[1]}")
+        if builds != [("odds", "a"), ("odds", "b"), ("odds", "c"), ("odds", "b")] or cache.stats()['evictions'] != 2:
+            logger.error(f"❌ LRU incorreto: {builds}, {cache.stats()}")
+            return False
+            
+        # Cards de odds: montados uma vez por versão, reaproveitados se o jogo não mudou
+        games = make_random_h2h_games(30)
+        store = SnapshotStore(max_suggestions=5)
+        first = store.publish(games_df, OddsMatrix.from_games(games))
+        card = lambda snapshot, game: store.renders.get(snapshot.version, ("odds", game),
+                                                        lambda: render_odds_card(snapshot.odds, game))
+        cards = {game: card(first, game) for game in first.odds.game_keys}
+        if "🏦 PINNACLE" not in cards["Casa 0 x Fora 0"] or "🏆 *Resultado Final*" not in cards["Casa 0 x Fora 0"]:
+            logger.error("❌ Card de odds incompleto")
+            return False
+            
+        # Nomes com "_" não podem quebrar o Markdown do card nem da página do /jogos
+        odd_names = json.loads(json.dumps(games[:1]).replace("Casa 0", "Atletico_MG"))
+        odd_card = render_odds_card(OddsMatrix.from_games(odd_names), "Atletico_MG x Fora 0")
+        odd_page = render_games_page([{"league": "Serie_A", "home_team": "Atletico_MG", "away_team": "Fora 0",
+                                       "time": "20:00"}], 0, 1, 1)
+        if any("Atletico_MG" in text or "Atletico\\_MG" not in text for text in (odd_card, odd_page)) \
+                or "Serie\\_A" not in odd_page:
+            logger.error(f"❌ Nomes não escapados: {odd_card} / {odd_page}")
+            return False
+            
+        updated = json.loads(json.dumps(games))
+        updated[2]["bookmakers"][1]["markets"][0]["outcomes"][0]["price"] = 7.77
+        second = store.publish(games_df, OddsMatrix.from_games(updated))
+        misses = store.renders.stats()['misses']
+        start = time.perf_counter()
+        second_cards = {game: card(second, game) for game in second.odds.game_keys}
+        lookup_time = (time.perf_counter() - start) / len(second_cards)
+        
+        if store.renders.stats()['misses'] - misses != 1 or "7.77" not in second_cards["Casa 2 x Fora 2"]:
+            logger.error("❌ Cards não foram reaproveitados (ou o jogo alterado não foi remontado)")
+            return False
+        if any(second_cards[game] is not cards[game] for game in cards if game != "Casa 2 x Fora 2"):
+            logger.error("❌ Card de jogo sem mudanças foi remontado")
+            return False
+            
+        logger.info(f"✅ Cache de mensagens OK - {len(second_cards)} cards, {lookup_time * 1e6:.1f} µs por consulta")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro no cache de mensagens: {e}")
+        return False
+
+def test_game_catalog():
+    """Testa o catálogo paginado de jogos (IDs curtos, índice por liga e início)."""
+    logger.info("Testando catálogo de jogos...")
+    
+    try:
+        rng = random.Random(4)
+        leagues = ["Premier League", "La Liga", "Brasileirão Série A", "NBA"]
+        entries = [{"key": f"Clube Atlético Muito Comprido {i} x Sociedade Esportiva Longuíssima {i}",
+                    "league": rng.choice(leagues),
+                    "commence_time": f"2024-01-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00Z"}
+                   for i in range(2000)]
+        catalog = GameCatalog(entries)
+        
+        # Páginas em sequência cobrem todos os jogos, em ordem de início
+        for league_id in [ALL_LEAGUES] + list(catalog.leagues):
+            _, _, pages = catalog.page(league_id, 0, size=25)
+            seen = [entry for page in range(pages) for _, entry in catalog.page(league_id, page, size=25)[0]]
+            expected = sorted((entry for entry in entries
+                               if league_id == ALL_LEAGUES or short_id(entry['league']) == league_id),
+                              key=lambda entry: (entry['commence_time'], entry['key']))
+            if seen != expected:
+                logger.error(f"❌ Páginas da liga {catalog.leagues.get(league_id, 'todas')} incorretas")
+                return False
+                
+        # IDs curtos: únicos, estáveis entre catálogos e dentro do limite do callback_data
+        shuffled = GameCatalog(rng.sample(entries, len(entries)))
+        if len(set(catalog.ids)) != len(entries) or any(shuffled.get(game_id) != catalog.get(game_id)
+                                                        for game_id in catalog.ids):
+            logger.error("❌ IDs curtos repetidos ou instáveis")
+            return False
+        longest = max(len(data.encode("utf-8")) for data in
+                      [f"o:{game_id}" for game_id in catalog.ids] +
+                      [f"op:{league_id}:{9999}" for league_id in catalog.leagues])
+        if longest > 64:
+            logger.error(f"❌ callback_data com {longest} bytes")
+            return False
+        if catalog.page(ALL_LEAGUES, 10 ** 6, size=25)[1] != catalog.page(ALL_LEAGUES, 0, size=25)[2] - 1:
+            logger.error("❌ Página fora do intervalo não foi ajustada")
+            return False
+            
+        # Custo de uma página independe do tamanho do catálogo
+        big = GameCatalog(entries * 50)
+        timings = []
+        for page in (0, len(big) // 16):
+            start = time.perf_counter()
+            for _ in range(200):
+                big.page(ALL_LEAGUES, page, size=8)
+            timings.append((time.perf_counter() - start) / 200)
+            
+        logger.info(f"✅ Catálogo OK - {len(catalog.leagues)} ligas, callback_data até {longest} bytes, "
+                    f"página em {timings[0] * 1e6:.1f}/{timings[1] * 1e6:.1f} µs com {len(big)} jogos")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro no catálogo de jogos: {e}")
+        return False
+
+def test_team_search():
+    """Testa a busca aproximada de times (acentos, apelidos, erros de digitação e atualização incremental)."""
+    logger.info("Testando busca de times...")
+    
+    try:
+        rng = random.Random(8)
+        cities = ["Porto", "Lagoa", "Serra", "Vila", "Campo", "Ribeira", "Monte", "Nova", "Santa", "Bela",
+                  "Alto", "Rio", "Pedra", "Ponte", "Costa", "Vale", "Barra", "Cruz", "Lago", "Mar"]
+        places = ["Alegre", "Verde", "Grande", "Branca", "Azul", "Dourada", "Seca", "Funda", "Clara", "Velha"]
+        suffixes = ["FC", "Esporte Clube", "Atlético", "United", "Athletic"]
+        teams = [f"{city} {place} {suffix}" for city in cities for place in places for suffix in suffixes]
+        teams += ["São Paulo", "Grêmio", "Flamengo", "Palmeiras", "Manchester United", "Atlético Mineiro"]
+        rng.shuffle(teams)
+        
+        def fixtures(pairs):
+            return [{"key": f"{home} x {away}", "home_team": home, "away_team": away,
+                     "commence_time": f"2024-01-{day:02d}T20:00:00Z"} for day, (home, away) in pairs]
+                     
+        games = fixtures((1 + i % 28, (teams[i], teams[-1 - i])) for i in range(len(teams) // 2))
+        games += fixtures([(2, ("Flamengo", "Palmeiras")), (3, ("Palmeiras", "Grêmio"))])
+        index = TeamSearchIndex()
+        index.update(games)
+        
+        queries = {
+            "sao paulo": "São Paulo", "GREMIO": "Grêmio", "flamegno": "Flamengo", "palmeras": "Palmeiras",
+            "man utd": "Manchester United", "galo": "Atlético Mineiro", "mengão": "Flamengo",
+            "porto alegre esporte clube": "Porto Alegre Esporte Clube"
+        }
+        start = time.perf_counter()
+        results = {query: index.search(query) for query in queries}
+        search_time = (time.perf_counter() - start) / len(queries)
+        for query, team in queries.items():
+            if not results[query] or team not in results[query][0].split(" x "):
+                logger.error(f"❌ Busca por \"{query}\" não encontrou {team}: {results[query][:3]}")
+                return False
+        if index.search("fla x palmeiras") != ["Flamengo x Palmeiras"] or index.search("qwzk"):
+            logger.error("❌ Busca por confronto (ou sem resultado) incorreta")
+            return False
+            
+        # Atualização incremental: mesmo estado de um índice montado do zero
+        updated = games[40:] + fixtures([(5, ("Nova Verde FC", "Flamengo"))])
+        added, removed = index.update(updated)
+        fresh = TeamSearchIndex()
+        fresh.update(updated)
+        if (added, removed) != (1, 40) or index._postings != fresh._postings or index._term_teams != fresh._term_teams:
+            logger.error("❌ Atualização incremental difere do índice montado do zero")
+            return False
+            
+        logger.info(f"✅ Busca de times OK - {len(index)} times, {search_time * 1e6:.0f} µs por busca")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro na busca de times: {e}")
+        return False
+
 def test_config():
     """Testa as configurações."""
     logger.info("Testando configurações...")
@@ -84,7 +1591,32 @@ async def main():
     tests = [
         ("Configurações", test_config),
         ("Coleta de dados", test_data_collection),
-        ("Análise estatística", test_analysis)
+        ("Coletor assíncrono", test_async_collector),
+        ("Chamadas únicas (single-flight)", test_single_flight),
+        ("Coleta paralela de ligas", test_fan_out_collection),
+        ("Cache de respostas", test_response_cache),
+        ("Agendador de cota", test_quota_scheduler),
+        ("Leitura incremental de odds", test_odds_stream_parser),
+        ("Matriz de odds", test_odds_matrix),
+        ("Análise estatística", test_analysis),
+        ("Análise vetorizada", test_vectorized_analysis),
+        ("Snapshot de dados", test_snapshot),
+        ("Reanálise incremental", test_incremental_snapshot),
+        ("Persistência do snapshot", test_snapshot_persistence),
+        ("Agendador de atualizações", test_refresh_scheduler),
+        ("Estado compartilhado entre workers", test_state_backend),
+        ("Seleção top-K de sugestões", test_top_k_suggestions),
+        ("Varredura de arbitragem", test_arbitrage),
+        ("Probabilidade de consenso", test_consensus),
+        ("Kernels de mercado", test_market_kernels),
+        ("Histórico de odds", test_odds_history),
+        ("Fila de updates do webhook", test_update_dispatcher),
+        ("Envio em massa", test_broadcast),
+        ("Alertas de valor", test_alerts),
+        ("Perfis dos usuários", test_profiles),
+        ("Cache de mensagens", test_render_cache),
+        ("Catálogo de jogos", test_game_catalog),
+        ("Busca de times", test_team_search)
     ]
     
     results = []
@@ -0,0 +1,121 @@
+"""
+Módulo de Despacho de Updates do Webhook
+----------------------------------------
+Este módulo recebe os updates do webhook (chamado pelas threads do
+servidor HTTP) e os entrega a N workers assíncronos que rodam no loop
+de eventos do bot. O webhook só enfileira e responde na hora; o
+processamento acontece depois.
+
+A fila é limitada: com ela cheia, submit recusa o update e o webhook
+responde 503, para o Telegram reenviar mais tarde (contrapressão), em
+vez de a memória crescer sem limite.
+"""
+
+import asyncio
+import logging
+import threading
+
+from config import WEBHOOK_WORKERS, WEBHOOK_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+class UpdateDispatcher:
+    """Fila limitada de updates do webhook com workers no loop do bot."""
+    
+    def __init__(self, handler, loop, workers=WEBHOOK_WORKERS, max_queue=WEBHOOK_QUEUE_SIZE):
+        """
+        Inicializa o despachante.
+        
+        Args:
+            handler (callable): Corrotina chamada com o JSON de cada update
+            loop (asyncio.AbstractEventLoop): Loop de eventos onde os workers rodam
+            workers (int): Número de updates processados ao mesmo tempo
+            max_queue (int): Máximo de updates aceitos e ainda não processados
+        """
+        self.handler = handler
+        self.loop = loop
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self._slots = threading.BoundedSemaphore(self.max_queue)
+        self._queue = None
+        self._tasks = []
+        self._stats_lock = threading.Lock()
+        self.received = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+    
+    async def start(self):
+        """Cria a fila e os workers (deve rodar no loop do despachante)."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.ensure_future(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Despachante de updates iniciado: {self.workers} workers, fila de {self.max_queue}.")
+    
+    def submit(self, payload):
+        """
+        Enfileira um update sem bloquear (seguro para chamar de outras threads).
+        
+        Args:
+            payload (dict): JSON do update
+            
+        Returns:
+            bool: True se aceito; False se a fila está cheia ou o despachante não iniciou
+        """
+        if self._queue is None or not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            return False
+        with self._stats_lock:
+            self.received += 1
+        self.loop.call_soon_threadsafe(self._queue.put_nowait, payload)
+        return True
+    
+    async def _worker(self, number):
+        """Processa updates da fila até ser cancelado."""
+        while True:
+            payload = await self._queue.get()
+            failed = False
+            try:
+                await self.handler(payload)
+            except Exception as e:
+                logger.error(f"Erro ao processar update {payload.get('update_id')} (worker {number}): {e}")
+                failed = True
+            finally:
+                with self._stats_lock:
+                    if failed:
+                        self.failed += 1
+                    else:
+                        self.processed += 1
+                self._queue.task_done()
+                self._slots.release()
+    
+    async def join(self):
+        """Espera a fila esvaziar."""
+        if self._queue is not None:
+            await self._queue.join()
+    
+    async def stop(self):
+        """Processa o que já está na fila e para os workers."""
+        await self.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    def stats(self):
+        """
+        Retorna as estatísticas do despachante.
+        
+        Returns:
+            dict: Updates recebidos, recusados, processados, com erro e pendentes
+        """
+        with self._stats_lock:
+            return {
+                'received': self.received,
+                'rejected': self.rejected,
+                'processed': self.processed,
+                'failed': self.failed,
+                'pending': self.received - self.processed - self.failed
+            }